@@ -971,7 +971,7 @@ if FASTAPI_AVAILABLE:
                 "recommendation": analysis.recommendation,
                 "worth_it": analysis.worth_it,
                 "confidence": analysis.confidence,
-                "breakdown": analysis.breakdown,
+                "breakdown": analysis.as_display(),
                 "factors": analysis.factors,
             }
 
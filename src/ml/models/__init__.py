@@ -31,6 +31,7 @@ from .savings_validator import (
     ValidationResult,
     CorrectionFactor,
     ROIAnalysis,
+    Strategy,
 )
 from .weight_predictor import WeightPredictor
 from .ingredient_substitution import IngredientSubstitutionModel
@@ -94,6 +95,7 @@ __all__ = [
     "ValidationResult",
     "CorrectionFactor",
     "ROIAnalysis",
+    "Strategy",
     # Route optimization models
     "StoreVisitPredictor",
     "StoreVisitFeatures",
@@ -0,0 +1,27 @@
+"""
+Ahead-of-time build of the savings kernels.
+
+Compiles predict_savings_core into a native savings_kernels extension next to
+this file, so the predictor starts without a JIT warmup:
+
+    python -m src.ml.models._build_savings_aot
+
+Requires Numba and a C compiler at build time only.
+"""
+from pathlib import Path
+
+from numba.pycc import CC
+
+from ._savings_kernels import predict_savings_core
+
+cc = CC('savings_kernels')
+cc.output_dir = str(Path(__file__).parent)
+
+# Same arguments and results as predict_savings_core, all float64
+cc.export('predict_core', 'UniTuple(f8, 8)(' + ', '.join(['f8'] * 9) + ')')(
+    predict_savings_core.py_func
+)
+
+
+if __name__ == '__main__':
+    cc.compile()
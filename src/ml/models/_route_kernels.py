@@ -0,0 +1,104 @@
+"""
+Numeric kernels for the route sequence optimizer.
+Compiled with Numba when it is installed; otherwise they run as plain Python.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def score_perm(
+    perm_idx: np.ndarray,
+    D: np.ndarray,
+    D_home: np.ndarray,
+    position_costs: np.ndarray,
+    store_time: np.ndarray,
+    perish_store: np.ndarray,
+    perish_limit: np.ndarray,
+    perish_items: np.ndarray,
+    has_cooler: bool,
+) -> float:
+    """
+    Score one complete ordering; mirrors RouteSequenceOptimizer._score_order.
+
+    Args:
+        perm_idx: Store indices in visit order
+        D: (N, N) store-to-store distances in miles
+        D_home: (N,) home-to-store distances in miles
+        position_costs: (N, N) hours/parking/priority score, [position, store]
+        store_time: (N,) minutes spent shopping at each store
+        perish_store: Store of each (store, perishable category) group
+        perish_limit: Minutes the group's category can stay out of the fridge
+        perish_items: Number of items in each group
+        has_cooler: Whether a cooler doubles the limits
+    """
+    n = len(perm_idx)
+
+    # One pass over the ordering: legs, time shopped so far, position terms.
+    # Distances are stored as float32 but summed in float64
+    distance = np.float64(D_home[perm_idx[0]]) + np.float64(D_home[perm_idx[n - 1]])
+    shopped = np.zeros(len(D_home))
+    elapsed = 0.0
+    position_score = 0.0
+    for k in range(n):
+        store = perm_idx[k]
+        if k:
+            distance += np.float64(D[perm_idx[k - 1], store])
+        elapsed += store_time[store]
+        shopped[store] = elapsed
+        position_score += position_costs[k, store]
+
+    # Travel at 30 mph plus time in each store
+    total_time = (distance / 30) * 60 + elapsed
+
+    penalty = 0.0
+    for g in range(len(perish_store)):
+        limit = perish_limit[g] * 2 if has_cooler else perish_limit[g]
+        over = total_time - shopped[perish_store[g]] - limit
+        if over > 0:
+            penalty += perish_items[g] * over / 10
+
+    return distance * 5 + penalty * 10 + position_score
+
+
+@njit(parallel=True, cache=True)
+def score_all_perms(
+    perms: np.ndarray,
+    D: np.ndarray,
+    D_home: np.ndarray,
+    position_costs: np.ndarray,
+    store_time: np.ndarray,
+    perish_store: np.ndarray,
+    perish_limit: np.ndarray,
+    perish_items: np.ndarray,
+    has_cooler: bool,
+) -> np.ndarray:
+    """
+    Score every ordering in perms, one per row, across threads.
+
+    Args:
+        perms: (P, N) store indices, one ordering per row
+        Others: as for score_perm
+
+    Returns:
+        (P,) scores in row order
+    """
+    scores = np.empty(len(perms))
+    for p in prange(len(perms)):
+        scores[p] = score_perm(
+            perms[p], D, D_home, position_costs, store_time,
+            perish_store, perish_limit, perish_items, has_cooler,
+        )
+    return scores
@@ -0,0 +1,147 @@
+"""
+Numeric kernels for the savings predictor.
+Compiled with Numba when it is installed; otherwise they run as plain Python.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def predict_savings_core(
+    single_price: float,
+    single_distance: float,
+    single_travel: float,
+    single_shop: float,
+    multi_price: float,
+    multi_distance: float,
+    multi_time: float,
+    gas_per_mile: float,
+    hourly_value: float,
+) -> tuple:
+    """
+    Savings arithmetic for one multi-store vs single-store comparison.
+
+    Args:
+        single_distance: One-way miles to the single store
+        multi_distance: Total miles of the multi-store trip
+        gas_per_mile: Gas price over mpg, in $ per mile
+        Others: prices in $, times in minutes, as on the trip and option
+
+    Returns:
+        (gross, net, time_cost, effective, hourly_rate, extra_time,
+        multi_gas, single_gas)
+    """
+    # Gas for a round trip to the single store vs the whole multi-store loop
+    single_gas = single_distance * 2 * gas_per_mile
+    multi_gas = multi_distance * gas_per_mile
+
+    gross = single_price - multi_price
+    net = (single_price + single_gas) - (multi_price + multi_gas)
+
+    # Value of the extra time at the user's hourly rate
+    extra_time = multi_time - (single_travel + single_shop)
+    time_cost = (extra_time / 60) * hourly_value
+    effective = net - time_cost
+
+    if extra_time > 0:
+        hourly_rate = (net / extra_time) * 60
+    elif net > 0:
+        hourly_rate = np.inf
+    else:
+        hourly_rate = 0.0
+
+    return gross, net, time_cost, effective, hourly_rate, extra_time, multi_gas, single_gas
+
+
+@njit(cache=True)
+def evaluate_n_store(
+    price: np.ndarray,
+    travel: np.ndarray,
+    shop: np.ndarray,
+    distance: np.ndarray,
+    weights: np.ndarray,
+    time_factors: np.ndarray,
+    distance_factors: np.ndarray,
+    gas_per_mile: float,
+    single_cost: float,
+    single_time: float,
+) -> tuple:
+    """
+    Cost and time of splitting one shop across the first n stores.
+
+    Args:
+        price, travel, shop, distance: (n,) store columns, cheapest first
+        weights: Share of the basket bought at each store
+        time_factors: Share of each store's travel time the route takes
+        distance_factors: Multiple of each store's distance driven
+        gas_per_mile: Gas price over mpg, in $ per mile
+        single_cost: Single-store price plus round-trip gas
+        single_time: Single-store travel plus shopping minutes
+
+    Returns:
+        (total_cost, time, savings, extra_time, efficiency)
+    """
+    # Summed stop by stop: travel then shop at each store in turn
+    combined_cost = 0.0
+    combined_time = 0.0
+    combined_distance = 0.0
+    for k in range(len(weights)):
+        combined_cost += price[k] * weights[k]
+        combined_time += travel[k] * time_factors[k]
+        combined_time += shop[k]
+        combined_distance += distance[k] * distance_factors[k]
+
+    total_cost = combined_cost + combined_distance * gas_per_mile
+    savings = single_cost - total_cost
+    extra_time = combined_time - single_time
+    efficiency = (savings / extra_time * 60) if extra_time > 0 else 0.0
+
+    return total_cost, combined_time, savings, extra_time, efficiency
+
+
+@njit(parallel=True, cache=True)
+def gas_price_scenarios(
+    gas_prices: np.ndarray,
+    mpg: float,
+    single_price: float,
+    single_distance: float,
+    single_travel: float,
+    single_shop: float,
+    multi_price: float,
+    multi_distance: float,
+    multi_time: float,
+    hourly_value: float,
+) -> np.ndarray:
+    """
+    Run predict_savings_core once per gas price, across threads.
+
+    Args:
+        gas_prices: (P,) gas prices in $ per gallon
+        mpg: Vehicle fuel economy
+        Others: as for predict_savings_core
+
+    Returns:
+        (P, 8) results of predict_savings_core, one row per gas price
+    """
+    out = np.empty((len(gas_prices), 8))
+    for p in prange(len(gas_prices)):
+        row = predict_savings_core(
+            single_price, single_distance, single_travel, single_shop,
+            multi_price, multi_distance, multi_time,
+            gas_prices[p] / mpg, hourly_value,
+        )
+        for j in range(8):
+            out[p, j] = row[j]
+    return out
@@ -0,0 +1,93 @@
+"""
+Numeric kernels for the traffic pattern learner.
+Compiled with Numba when it is installed; otherwise they run as plain Python.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+US_PER_HOUR = 3_600_000_000
+US_PER_DAY = 24 * US_PER_HOUR
+
+
+@njit("float64(float64)", cache=True)
+def round_tenth(x: float) -> float:
+    """
+    round(x, 1) as Python computes it, exactly, ties to even.
+
+    Numba's round with ndigits scales and rounds the inexact product x * 10,
+    which goes the wrong way on near-ties such as 9.75. Here x * 10 is split
+    into its rounded value and the rounding error, and the error settles ties.
+    """
+    high = x * 8.0
+    low = x * 2.0
+    scaled = high + low
+    low_part = scaled - high
+    error = (high - (scaled - low_part)) + (low - low_part)
+
+    rounded = np.rint(scaled)
+    if scaled - rounded == 0.5 and error > 0.0:
+        rounded += 1.0
+    elif rounded - scaled == 0.5 and error < 0.0:
+        rounded -= 1.0
+    return rounded / 10.0
+
+
+# One signature, compiled (or loaded from cache) when the module is imported
+@njit(
+    "Tuple((float64[:], int64[:]))(int64[:], float64[:], float64[:], float64[:, :], float64[:, :])",
+    cache=True,
+)
+def route_durations(
+    start_us: np.ndarray,
+    base_durations: np.ndarray,
+    route_factors: np.ndarray,
+    adjustments: np.ndarray,
+    traffic: np.ndarray,
+) -> tuple:
+    """
+    Minutes of a route for each departure time, as predict_traffic gives
+    them segment by segment. Each segment leaves when the previous one
+    arrives, at the traffic of that hour and weekday.
+
+    Args:
+        start_us: (C,) departures in microseconds since Monday 00:00
+        base_durations: (S,) no-traffic minutes of each segment, in order
+        route_factors: (S,) route type factor of each segment
+        adjustments: (S, 24) learned multiplier of each segment by hour, 1.0 if none
+        traffic: (2, 24) traffic multipliers by hour, weekday then weekend
+
+    Returns:
+        (durations, elapsed_us): (C,) summed rounded minutes, and the same
+        in whole microseconds as timedelta would add them
+    """
+    durations = np.zeros(len(start_us))
+    elapsed_us = np.zeros(len(start_us), dtype=np.int64)
+    for c in range(len(start_us)):
+        total = 0.0
+        elapsed = 0
+        for k in range(len(base_durations)):
+            now = start_us[c] + elapsed
+            hour = (now // US_PER_HOUR) % 24
+            is_weekend = 1 if (now // US_PER_DAY) % 7 >= 5 else 0
+
+            multiplier = traffic[is_weekend, hour] * route_factors[k] * adjustments[k, hour]
+            minutes = round_tenth(base_durations[k] * multiplier)
+
+            total += minutes
+            # timedelta(minutes=...) rounds to the microsecond, half to even
+            elapsed += int(np.rint(minutes * 60_000_000.0))
+        durations[c] = total
+        elapsed_us[c] = elapsed
+    return durations, elapsed_us
@@ -0,0 +1,80 @@
+"""
+Numeric kernels for the savings validator.
+Compiled with Numba when it is installed; otherwise they run as plain Python.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def weighted_correction(factors: np.ndarray, weights: np.ndarray) -> float:
+    """
+    Confidence-weighted average of correction multipliers.
+
+    Args:
+        factors: (K,) correction multipliers
+        weights: (K,) weight of each multiplier
+
+    Returns:
+        The weighted average, or 1.0 (no correction) when the weights sum to 0
+    """
+    total = 0.0
+    total_weight = 0.0
+    for k in range(len(factors)):
+        total += factors[k] * weights[k]
+        total_weight += weights[k]
+
+    if total_weight == 0:
+        return 1.0
+    return total / total_weight
+
+
+@njit(cache=True)
+def validate_batch(
+    predicted: np.ndarray,
+    actual: np.ndarray,
+    threshold: float,
+) -> tuple:
+    """
+    Accuracy of many predictions; mirrors SavingsValidator.validate.
+
+    Args:
+        predicted: (N,) predicted savings
+        actual: (N,) actual savings
+        threshold: Largest deviation, as a fraction of the prediction, that
+            still counts as accurate
+
+    Returns:
+        (accuracy, deviation, is_accurate), each (N,)
+    """
+    n = len(predicted)
+    accuracy = np.zeros(n)
+    deviation = np.empty(n)
+    is_accurate = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        if predicted[i] <= 0:
+            # Nothing predicted to compare against
+            deviation[i] = actual[i]
+            continue
+        deviation[i] = actual[i] - predicted[i]
+        accuracy[i] = actual[i] / predicted[i]
+        is_accurate[i] = abs((deviation[i] / predicted[i]) * 100) <= threshold * 100
+
+    return accuracy, deviation, is_accurate
+
+
+if NUMBA_AVAILABLE:
+    # Compile (or load from cache) at import rather than on the first prediction
+    weighted_correction(np.ones(1), np.ones(1))
+    validate_batch(np.ones(1), np.ones(1), 0.15)
@@ -0,0 +1,80 @@
+"""
+Numeric kernels for the store visit predictor.
+Compiled with Numba when it is installed; otherwise they run as plain Python.
+"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# One signature, compiled (or loaded from cache) when the module is imported.
+# Integer minutes and familiarity are cast to float rather than compiling a
+# second specialization on the first prediction that passes them.
+@njit(
+    "UniTuple(float64, 3)(float64, float64, int64, float64, float64, int64, boolean,"
+    " float64, boolean, boolean, boolean, float64, float64)",
+    cache=True,
+)
+def score_visit(
+    base: float,
+    minutes_per_item: float,
+    item_count: int,
+    familiarity: float,
+    crowd_multiplier: float,
+    crowd_value: int,
+    has_list: bool,
+    counter_time: float,
+    self_checkout: bool,
+    is_peak: bool,
+    is_weekend: bool,
+    user_speed: float,
+    store_adj: float,
+) -> tuple:
+    """
+    Visit duration arithmetic for one prediction; mirrors StoreVisitPredictor.predict.
+
+    Args:
+        base: Base minutes for the store type
+        minutes_per_item: Minutes per item for the store type
+        familiarity: 0-1, how well the user knows the store
+        crowd_multiplier: Multiplier for the crowd level
+        crowd_value: CrowdLevel value, 1 (empty) to 5 (packed)
+        counter_time: Minutes waiting at deli and pharmacy counters
+        self_checkout: Whether the visit uses self-checkout
+        user_speed: User's shopping speed vs average
+        store_adj: Learned adjustment for the store type
+
+    Returns:
+        (total_time, item_time, checkout_time) in minutes
+    """
+    item_time = item_count * minutes_per_item
+    familiarity_multiplier = 1.0 + (0.3 * (1 - familiarity))
+    list_multiplier = 1.0 if has_list else 1.2
+
+    # Self-checkout, or a lane that is slower when the store is busy
+    if self_checkout:
+        checkout_time = 3 + (item_count * 0.15)
+    else:
+        checkout_base = 5 if crowd_value <= 2 else 10
+        checkout_time = checkout_base + (item_count * 0.2)
+    checkout_time *= crowd_multiplier
+
+    peak_multiplier = 1.15 if is_peak else 1.0
+    weekend_multiplier = 1.2 if is_weekend else 1.0
+
+    shopping_time = (base + item_time) * familiarity_multiplier
+    total_time = (shopping_time * list_multiplier + counter_time + checkout_time)
+    total_time *= crowd_multiplier * peak_multiplier * weekend_multiplier
+    total_time *= user_speed
+    total_time *= store_adj
+
+    return total_time, item_time, checkout_time
+
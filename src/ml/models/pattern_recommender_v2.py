@@ -12,29 +12,24 @@ New contextual features:
 - Pattern fatigue (days since variety)
 """
 import pickle
-from dataclasses import dataclass, field
+from importlib.util import find_spec
+from dataclasses import dataclass, field, replace
 from datetime import date, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from types import MappingProxyType
+from typing import List, Dict, Any, Callable, Mapping, Optional, Tuple, Union
 import numpy as np
 
-try:
-    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
-    from sklearn.preprocessing import LabelEncoder, StandardScaler
-    from sklearn.model_selection import cross_val_score, GridSearchCV
-    from sklearn.calibration import CalibratedClassifierCV
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
-    LabelEncoder = None
-    StandardScaler = None
+# sklearn is only imported inside the training/evaluation paths so that
+# inference-only consumers don't pay its import cost at startup
+SKLEARN_AVAILABLE = find_spec("sklearn") is not None
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from src.data.models import (
     PatternType, DailyContext, DayType, WeatherCondition,
-    StressLevel, ActivityLevel, Prediction, PATTERN_CONFIGS
+    StressLevel, ActivityLevel, Prediction
 )
 
 
@@ -55,7 +50,7 @@ class PreviousDayOutcome:
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextualFeatures:
     """Extended contextual features for pattern recommendation."""
     # Base features (from v1)
@@ -87,7 +82,7 @@ class ContextualFeatures:
     recent_pattern_variety: int = 3  # unique patterns in last 7 days
 
 
-@dataclass
+@dataclass(slots=True)
 class PatternRecommendationV2:
     """Enhanced pattern recommendation with confidence and explanation."""
     pattern: PatternType
@@ -95,10 +90,91 @@ class PatternRecommendationV2:
     confidence: float  # Calibrated confidence
     reasoning: List[str]
     rank: int
-    context_factors: Dict[str, float]  # Feature importance for this prediction
+    context_factors: Mapping[str, float]  # Feature contributions for this prediction
     suggested_modifications: List[str]  # Suggested tweaks to improve success
 
 
+def _build_reasoning_rules() -> Dict[PatternType, List[Tuple[Callable[[ContextualFeatures], bool], str]]]:
+    """
+    Compile the context reasoning rules into a per-pattern dispatch table.
+
+    Rules are declared once, in output order, with the patterns they apply
+    to; each pattern's list keeps only its own rules, so predict() never
+    tests a rule that cannot fire for that pattern.
+    """
+    all_patterns = tuple(PatternType)
+    rules: List[Tuple[Tuple[PatternType, ...], Callable[[ContextualFeatures], bool], str]] = [
+        ((PatternType.BIG_BREAKFAST,),
+         lambda c: c.has_morning_workout,
+         "Big breakfast supports morning workout recovery"),
+        ((PatternType.IF_NOON, PatternType.MORNING_FEAST),
+         lambda c: c.has_social_dinner,
+         "Early eating window leaves flexibility for social dinner"),
+        (tuple(p for p in all_patterns if p != PatternType.IF_NOON),
+         lambda c: c.has_social_lunch,
+         "Pattern accommodates social lunch commitment"),
+        ((PatternType.GRAZING_4_MEALS, PatternType.BIG_BREAKFAST),
+         lambda c: c.sleep_quality <= 2,
+         "Smaller, frequent meals help with low energy from poor sleep"),
+        ((PatternType.GRAZING_4_MEALS,),
+         lambda c: c.stress_level.value >= 3,
+         "Frequent mini-meals help manage stress-related hunger"),
+        ((PatternType.GRAZING_PLATTER,),
+         lambda c: c.stress_level.value >= 3,
+         "Flexible platter reduces mealtime decision stress"),
+        (all_patterns,
+         lambda c: c.pattern_fatigue_score > 0.5,
+         "Variety helps prevent pattern burnout"),
+        ((PatternType.GRAZING_PLATTER,),
+         lambda c: c.day_type == DayType.WEEKEND,
+         "Platter grazing fits relaxed weekend schedule"),
+        ((PatternType.IF_NOON,),
+         lambda c: c.day_type == DayType.WEEKEND,
+         "Late start works well for weekend sleep-in"),
+        ((PatternType.GRAZING_PLATTER,),
+         lambda c: c.day_type == DayType.WORK_FROM_HOME,
+         "WFH allows flexible platter access throughout day"),
+        ((PatternType.TRADITIONAL,),
+         lambda c: c.weather == WeatherCondition.COLD,
+         "Warm soup breakfast ideal for cold weather"),
+        ((PatternType.IF_NOON,),
+         lambda c: c.weather == WeatherCondition.HOT,
+         "Skipping breakfast may feel better in hot weather"),
+        # Previous day context
+        (all_patterns,
+         lambda c: c.prev_day_outcome == PreviousDayOutcome.FAIL,
+         "Simplified pattern after challenging previous day"),
+    ]
+
+    table: Dict[PatternType, List[Tuple[Callable[[ContextualFeatures], bool], str]]] = {
+        p: [] for p in all_patterns
+    }
+    for patterns, predicate, message in rules:
+        for pattern in patterns:
+            table[pattern].append((predicate, message))
+
+    # The only pattern-dependent rule closes over its pattern
+    for pattern in all_patterns:
+        table[pattern].append((
+            lambda c, p=pattern: c.prev_adherence < 0.6 and c.prev_pattern != p,
+            "Pattern change may improve adherence",
+        ))
+    return table
+
+
+REASONING_RULES = _build_reasoning_rules()
+
+DEFAULT_REASONS: Dict[PatternType, List[str]] = {
+    PatternType.TRADITIONAL: ["Standard 3-meal structure provides consistent energy"],
+    PatternType.REVERSED: ["Heavy dinner option for evening preference"],
+    PatternType.IF_NOON: ["Intermittent fasting supports metabolic flexibility"],
+    PatternType.GRAZING_4_MEALS: ["Mini-meals prevent energy dips"],
+    PatternType.GRAZING_PLATTER: ["Visual variety and eating freedom"],
+    PatternType.BIG_BREAKFAST: ["Front-loaded calories for morning energy"],
+    PatternType.MORNING_FEAST: ["Completes eating early, long overnight fast"],
+}
+
+
 class PatternRecommenderV2:
     """
     Enhanced ML model with 17 contextual features.
@@ -147,15 +223,52 @@ class PatternRecommenderV2:
         "prev_day_outcome",
         "pattern_fatigue_score",
     ]
+    FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+    MODEL_FAMILIES = ("rf", "hgb", "gbc")
+    CALIBRATION_METHODS = ("sigmoid", "isotonic")
+    CALIBRATION_HOLDOUT = 0.2
+    CV_FOLDS = 5
+    # Training sets at least this large are feature-encoded in parallel
+    PARALLEL_MIN_ROWS = 50_000
+
+    def __init__(
+        self,
+        model_path: Optional[Path] = None,
+        calibration_method: str = "sigmoid",
+    ):
+        """
+        Initialize the enhanced recommender.
+
+        Args:
+            model_path: Optional path to a saved model to load
+            calibration_method: Probability calibration applied to the fitted
+                model on a held-out split ("sigmoid" for Platt scaling, or
+                "isotonic")
+        """
+        if calibration_method not in self.CALIBRATION_METHODS:
+            raise ValueError(
+                f"calibration_method must be one of {self.CALIBRATION_METHODS}"
+            )
 
-    def __init__(self, model_path: Optional[Path] = None):
-        """Initialize the enhanced recommender."""
         self.model: Optional[Any] = None
         self.calibrated_model: Optional[Any] = None
         self.is_fitted = False
         self.model_path = model_path
+        self.calibration_method = calibration_method
+        self.model_family: Optional[str] = None
         self.training_accuracy = 0.0
         self.feature_importances: Dict[str, float] = {}
+        # Sparse node -> (feature, pattern) table for per-sample attribution
+        self.path_contributions: Optional[Any] = None
+        # Read-only contributions reported when no per-sample attribution
+        # is available, shared across predictions instead of copied
+        self._global_contributions: Mapping[str, float] = MappingProxyType(
+            dict.fromkeys(self.FEATURE_NAMES, 0.0)
+        )
+        # Models pickled before the float32 tree pipeline were trained on
+        # standardized features; new fits skip the scaler
+        self.scale_features = True
 
         # Initialize encoders
         self._init_encoders()
@@ -166,7 +279,7 @@ class PatternRecommenderV2:
 
     def _init_encoders(self) -> None:
         """Initialize label encoders for categorical features."""
-        self.scaler = StandardScaler() if SKLEARN_AVAILABLE else SimpleScaler()
+        self.scaler = SimpleScaler()
 
         # Categorical encoders
         self.day_type_map = {dt.value: i for i, dt in enumerate(DayType)}
@@ -180,17 +293,63 @@ class PatternRecommenderV2:
             PreviousDayOutcome.UNKNOWN: 1,
         }
 
+        # Member-keyed views of the maps above, so feature extraction indexes
+        # directly by enum member instead of going through .value strings
+        self._day_type_index = {dt: self.day_type_map[dt.value] for dt in DayType}
+        self._weather_index = {w: self.weather_map[w.value] for w in WeatherCondition}
+        self._activity_index = {a: self.activity_map[a.value] for a in ActivityLevel}
+        self._pattern_index = {p: self.pattern_map[p.value] for p in PatternType}
+
         # Pattern decoder
         self.patterns = list(PatternType)
 
+    def _build_feature_matrix(self, X: List[Dict[str, Any]]) -> np.ndarray:
+        """Build the (N, 17) float32 feature matrix for a batch of records."""
+        X_array = np.empty((len(X), len(self.FEATURE_NAMES)), dtype=np.float32)
+        encoders = self._record_encoders()
+
+        if len(X) < self.PARALLEL_MIN_ROWS:
+            _encode_records(X, encoders, X_array)
+            return X_array
+
+        from joblib import Parallel, delayed, effective_n_jobs
+
+        # Encode contiguous slabs in worker processes; only the records and
+        # the small lookup tables are shipped, not the fitted model
+        n_chunks = max(1, effective_n_jobs(-1))
+        bounds = np.linspace(0, len(X), n_chunks + 1).astype(int)
+        blocks = Parallel(n_jobs=-1)(
+            delayed(_encode_records)(X[lo:hi], encoders)
+            for lo, hi in zip(bounds[:-1], bounds[1:])
+        )
+        for lo, block in zip(bounds[:-1], blocks):
+            X_array[lo:lo + len(block)] = block
+        return X_array
+
+    def _record_encoders(self) -> Tuple[Dict[Any, int], ...]:
+        """Lookup tables used by _encode_records."""
+        return (
+            self._day_type_index,
+            self._weather_index,
+            self._activity_index,
+            self._pattern_index,
+            self.outcome_map,
+        )
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        """Apply the feature scaler for models that were trained on scaled input."""
+        if self.scale_features:
+            return self.scaler.transform(X)
+        return X
+
     def _extract_features(self, context: ContextualFeatures) -> np.ndarray:
         """Extract 17-feature vector from contextual features."""
         features = [
             context.date.weekday(),
-            self.day_type_map.get(context.day_type.value, 0),
-            self.weather_map.get(context.weather.value, 0),
+            self._day_type_index[context.day_type],
+            self._weather_index[context.weather],
             context.stress_level.value,
-            self.activity_map.get(context.activity_level.value, 2),
+            self._activity_index[context.activity_level],
             int(context.has_morning_workout),
             int(context.has_evening_social),
             int(context.has_calendar_event),
@@ -198,39 +357,48 @@ class PatternRecommenderV2:
             int(context.has_social_dinner),
             context.sleep_quality / 5.0,  # Normalize to 0-1
             min(context.sleep_hours / 10.0, 1.0),  # Normalize, cap at 10h
-            self.pattern_map.get(
-                (context.prev_pattern or PatternType.TRADITIONAL).value, 0
-            ),
+            self._pattern_index[context.prev_pattern or PatternType.TRADITIONAL],
             context.prev_adherence,
             context.prev_energy / 5.0,  # Normalize to 0-1
             self.outcome_map.get(context.prev_day_outcome, 1),
             context.pattern_fatigue_score,
         ]
-        return np.array(features).reshape(1, -1)
+        return np.array(features, dtype=np.float32).reshape(1, -1)
+
+    def _encode_pattern_history(self, patterns: List[PatternType]) -> np.ndarray:
+        """Encode a pattern history as an int8 array of pattern ids."""
+        return np.fromiter(
+            (self._pattern_index[p] for p in patterns), dtype=np.int8, count=len(patterns)
+        )
 
     def _calculate_pattern_fatigue(
         self,
-        recent_patterns: List[PatternType],
+        recent_patterns: Union[List[PatternType], np.ndarray],
         current_pattern: PatternType,
     ) -> float:
         """
         Calculate pattern fatigue score (0-1).
 
         Higher score = more likely to need a change.
+
+        Args:
+            recent_patterns: Pattern history, oldest first, either as
+                PatternType members or as int8 ids from _encode_pattern_history
+            current_pattern: Pattern being considered for today
         """
-        if not recent_patterns:
+        if len(recent_patterns) == 0:
             return 0.0
 
-        # Count consecutive days on same pattern
-        consecutive = 0
-        for p in reversed(recent_patterns):
-            if p == current_pattern:
-                consecutive += 1
-            else:
-                break
+        history = recent_patterns
+        if not isinstance(history, np.ndarray):
+            history = self._encode_pattern_history(history)
+
+        # Count consecutive days on same pattern (trailing run of matches)
+        matches = history[::-1] == self._pattern_index[current_pattern]
+        consecutive = matches.size if matches.all() else int(np.argmin(matches))
 
         # Calculate variety score
-        unique_patterns = len(set(recent_patterns[-7:]))  # Last 7 days
+        unique_patterns = np.unique(history[-7:]).size  # Last 7 days
         max_patterns = min(7, len(PatternType))
         variety_score = unique_patterns / max_patterns
 
@@ -248,59 +416,13 @@ class PatternRecommenderV2:
         self,
         pattern: PatternType,
         context: ContextualFeatures,
-        feature_contributions: Dict[str, float],
+        feature_contributions: Mapping[str, float],
     ) -> List[str]:
         """Generate human-readable reasoning for recommendation."""
-        reasons = []
-        config = PATTERN_CONFIGS[pattern]
-
-        # Context-based reasoning
-        if context.has_morning_workout and pattern == PatternType.BIG_BREAKFAST:
-            reasons.append("Big breakfast supports morning workout recovery")
-
-        if context.has_social_dinner and pattern in [PatternType.IF_NOON, PatternType.MORNING_FEAST]:
-            reasons.append("Early eating window leaves flexibility for social dinner")
-
-        if context.has_social_lunch and pattern != PatternType.IF_NOON:
-            reasons.append("Pattern accommodates social lunch commitment")
-
-        if context.sleep_quality <= 2:
-            if pattern in [PatternType.GRAZING_4_MEALS, PatternType.BIG_BREAKFAST]:
-                reasons.append("Smaller, frequent meals help with low energy from poor sleep")
-
-        if context.stress_level.value >= 3:
-            if pattern == PatternType.GRAZING_4_MEALS:
-                reasons.append("Frequent mini-meals help manage stress-related hunger")
-            elif pattern == PatternType.GRAZING_PLATTER:
-                reasons.append("Flexible platter reduces mealtime decision stress")
-
-        if context.pattern_fatigue_score > 0.5:
-            reasons.append("Variety helps prevent pattern burnout")
-
-        if context.day_type == DayType.WEEKEND:
-            if pattern == PatternType.GRAZING_PLATTER:
-                reasons.append("Platter grazing fits relaxed weekend schedule")
-            elif pattern == PatternType.IF_NOON:
-                reasons.append("Late start works well for weekend sleep-in")
-
-        if context.day_type == DayType.WORK_FROM_HOME:
-            if pattern == PatternType.GRAZING_PLATTER:
-                reasons.append("WFH allows flexible platter access throughout day")
-
-        if context.weather == WeatherCondition.COLD:
-            if pattern == PatternType.TRADITIONAL:
-                reasons.append("Warm soup breakfast ideal for cold weather")
-
-        if context.weather == WeatherCondition.HOT:
-            if pattern == PatternType.IF_NOON:
-                reasons.append("Skipping breakfast may feel better in hot weather")
-
-        # Previous day context
-        if context.prev_day_outcome == PreviousDayOutcome.FAIL:
-            reasons.append("Simplified pattern after challenging previous day")
-
-        if context.prev_adherence < 0.6 and pattern != context.prev_pattern:
-            reasons.append("Pattern change may improve adherence")
+        # Context-based reasoning: only rules that can apply to this pattern
+        reasons = [
+            message for applies, message in REASONING_RULES[pattern] if applies(context)
+        ]
 
         # Feature contribution-based reasoning
         top_features = sorted(
@@ -316,16 +438,7 @@ class PatternRecommenderV2:
 
         # Default reasoning if nothing specific
         if not reasons:
-            pattern_reasons = {
-                PatternType.TRADITIONAL: ["Standard 3-meal structure provides consistent energy"],
-                PatternType.REVERSED: ["Heavy dinner option for evening preference"],
-                PatternType.IF_NOON: ["Intermittent fasting supports metabolic flexibility"],
-                PatternType.GRAZING_4_MEALS: ["Mini-meals prevent energy dips"],
-                PatternType.GRAZING_PLATTER: ["Visual variety and eating freedom"],
-                PatternType.BIG_BREAKFAST: ["Front-loaded calories for morning energy"],
-                PatternType.MORNING_FEAST: ["Completes eating early, long overnight fast"],
-            }
-            reasons = pattern_reasons.get(pattern, ["Based on historical success patterns"])
+            reasons = list(DEFAULT_REASONS.get(pattern, ["Based on historical success patterns"]))
 
         return reasons[:5]  # Limit to 5 reasons
 
@@ -363,6 +476,7 @@ class PatternRecommenderV2:
         self,
         X: List[Dict[str, Any]],
         y: List[PatternType],
+        model_family: str = "rf",
         **kwargs
     ) -> "PatternRecommenderV2":
         """
@@ -371,85 +485,204 @@ class PatternRecommenderV2:
         Args:
             X: List of feature dictionaries with extended context
             y: List of successful pattern types
+            model_family: Classifier to tune - "rf" (parallel random forest,
+                fast default), "hgb" (histogram gradient boosting) or "gbc"
+                (gradient boosting, accuracy-first refinement)
             **kwargs: Additional arguments for the classifier
         """
         if not SKLEARN_AVAILABLE:
             raise ImportError("scikit-learn required for training")
+        if model_family not in self.MODEL_FAMILIES:
+            raise ValueError(f"model_family must be one of {self.MODEL_FAMILIES}")
 
-        # Convert to feature matrix
-        X_matrix = []
-        for record in X:
-            context = ContextualFeatures(
-                date=record.get("date", date.today()),
-                day_type=DayType(record.get("day_type", "weekday")),
-                weather=WeatherCondition(record.get("weather", "sunny")),
-                stress_level=StressLevel(record.get("stress_level", 2)),
-                activity_level=ActivityLevel(record.get("activity_level", "moderate")),
-                has_morning_workout=record.get("has_morning_workout", False),
-                has_evening_social=record.get("has_evening_social", False),
-                has_calendar_event=record.get("has_calendar_event", False),
-                has_social_lunch=record.get("has_social_lunch", False),
-                has_social_dinner=record.get("has_social_dinner", False),
-                sleep_quality=record.get("sleep_quality", 3),
-                sleep_hours=record.get("sleep_hours", 7.0),
-                prev_pattern=PatternType(record.get("prev_pattern", "traditional")),
-                prev_adherence=record.get("prev_adherence", 0.8),
-                prev_energy=record.get("prev_energy", 3),
-                prev_day_outcome=record.get("prev_day_outcome", PreviousDayOutcome.SUCCESS),
-                pattern_fatigue_score=record.get("pattern_fatigue_score", 0.0),
-            )
-            features = self._extract_features(context)
-            X_matrix.append(features.flatten())
+        from sklearn.model_selection import GridSearchCV
 
-        X_array = np.array(X_matrix)
-        y_encoded = [self.pattern_map[p.value] for p in y]
+        X_array = self._build_feature_matrix(X)
+        y_encoded = np.array([self._pattern_index[p] for p in y])
 
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X_array)
+        # Tree ensembles are scale-invariant, so the matrix is used as-is
+        self.scale_features = False
 
-        # Train with hyperparameter tuning
-        base_model = GradientBoostingClassifier(random_state=42)
+        # Hold out a slice for calibration so the tuned model is fitted once
+        # and calibrated on unseen rows, instead of refitting per CV fold
+        X_train, X_calib, y_train, y_calib = self._calibration_split(X_array, y_encoded)
 
-        param_grid = {
-            "n_estimators": [100, 150, 200],
-            "max_depth": [4, 5, 6],
-            "learning_rate": [0.05, 0.1, 0.15],
-            "min_samples_split": [2, 5, 10],
-        }
+        # Train with hyperparameter tuning
+        base_model, param_grid = self._model_search_space(model_family)
 
-        # Use GridSearchCV for hyperparameter tuning
+        # Stratified folds need every class in each fold, so the smallest
+        # class bounds the fold count
+        _, train_counts = np.unique(y_train, return_counts=True)
         grid_search = GridSearchCV(
             base_model,
             param_grid,
-            cv=min(5, len(X) // 2),
+            cv=max(2, min(self.CV_FOLDS, int(train_counts.min()))),
             scoring="accuracy",
             n_jobs=-1,
         )
-        grid_search.fit(X_scaled, y_encoded)
+        grid_search.fit(X_train, y_train)
 
         self.model = grid_search.best_estimator_
+        if "n_jobs" in self.model.get_params():
+            # Trees are fitted in parallel, but a one-context predict would
+            # start a parallel job per call
+            self.model.set_params(n_jobs=1)
+        self.model_family = model_family
         self.training_accuracy = grid_search.best_score_
 
         # Calibrate probabilities for better confidence scores
-        self.calibrated_model = CalibratedClassifierCV(
-            self.model, cv=3, method="isotonic"
-        )
-        self.calibrated_model.fit(X_scaled, y_encoded)
+        self.calibrated_model = self._calibrate(self.model, X_calib, y_calib)
+
+        # Store feature importances (HistGradientBoosting has no impurity-based
+        # importances, so fall back to permutation importance on the hold-out)
+        importances = getattr(self.model, "feature_importances_", None)
+        if importances is None:
+            from sklearn.inspection import permutation_importance
 
-        # Store feature importances
+            importances = permutation_importance(
+                self.model, X_calib, y_calib, n_repeats=5, random_state=42
+            ).importances_mean
         self.feature_importances = dict(
-            zip(self.FEATURE_NAMES, self.model.feature_importances_.tolist())
+            zip(self.FEATURE_NAMES, importances.tolist())
         )
+        self._global_contributions = MappingProxyType(self.feature_importances)
+        self.path_contributions = self._build_path_contributions()
 
         self.is_fitted = True
 
         return self
 
+    def _model_search_space(self, model_family: str) -> Tuple[Any, Dict[str, List[Any]]]:
+        """Get the base estimator and hyperparameter grid for a model family."""
+        if model_family == "rf":
+            from sklearn.ensemble import RandomForestClassifier
+
+            # Trees are built in parallel across all cores
+            base_model = RandomForestClassifier(
+                n_estimators=300, max_depth=None, n_jobs=-1, random_state=42
+            )
+            param_grid = {
+                "max_features": ["sqrt", "log2", None],
+                "min_samples_leaf": [1, 3],
+            }
+        elif model_family == "hgb":
+            from sklearn.ensemble import HistGradientBoostingClassifier
+
+            base_model = HistGradientBoostingClassifier(random_state=42)
+            param_grid = {
+                "learning_rate": [0.05, 0.1],
+                "max_leaf_nodes": [15, 31],
+            }
+        else:
+            from sklearn.ensemble import GradientBoostingClassifier
+
+            base_model = GradientBoostingClassifier(random_state=42)
+            param_grid = {
+                "n_estimators": [100, 150, 200],
+                "max_depth": [4, 5, 6],
+                "learning_rate": [0.05, 0.1, 0.15],
+                "min_samples_split": [2, 5, 10],
+            }
+
+        return base_model, param_grid
+
+    def _build_path_contributions(self) -> Optional[Any]:
+        """
+        Precompute a sparse node -> (feature, pattern) contribution table.
+
+        Every non-root node contributes the change in class distribution from
+        its parent, attributed to the parent's split feature. Summing the rows
+        on a sample's decision paths, averaged over trees, gives per-sample
+        contributions towards each pattern. Only forests expose decision_path;
+        other model families return None.
+        """
+        if not hasattr(self.model, "decision_path"):
+            return None
+
+        from scipy.sparse import csr_matrix
+
+        n_patterns = len(self.patterns)
+        n_trees = len(self.model.estimators_)
+        classes = np.asarray(self.model.classes_)
+
+        rows, cols, data = [], [], []
+        offset = 0
+        for estimator in self.model.estimators_:
+            tree = estimator.tree_
+            value = tree.value[:, 0, :]
+            value = value / value.sum(axis=1, keepdims=True)
+
+            internal = np.flatnonzero(tree.children_left >= 0)
+            parent = np.full(tree.node_count, -1)
+            parent[tree.children_left[internal]] = internal
+            parent[tree.children_right[internal]] = internal
+            child = np.flatnonzero(parent >= 0)
+
+            delta = (value[child] - value[parent[child]]) / n_trees
+            split_feature = tree.feature[parent[child]]
+
+            rows.append(np.repeat(child + offset, len(classes)))
+            cols.append((split_feature[:, None] * n_patterns + classes).ravel())
+            data.append(delta.ravel())
+            offset += tree.node_count
+
+        return csr_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, len(self.FEATURE_NAMES) * n_patterns),
+        )
+
+    def _calibration_split(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Split off a stratified calibration hold-out.
+
+        A hold-out is only taken when every class has enough rows to fill
+        both it and the tuning folds; smaller sets are calibrated on the
+        training data itself.
+        """
+        from sklearn.model_selection import train_test_split
+
+        _, counts = np.unique(y, return_counts=True)
+        if counts.min() < 2 * self.CV_FOLDS:
+            return X, X, y, y
+        return train_test_split(
+            X, y,
+            test_size=self.CALIBRATION_HOLDOUT,
+            random_state=42,
+            stratify=y,
+        )
+
+    def _calibrate(self, model: Any, X: np.ndarray, y: np.ndarray) -> Any:
+        """Calibrate an already-fitted model on held-out data without refitting it."""
+        from sklearn.calibration import CalibratedClassifierCV
+
+        try:
+            from sklearn.frozen import FrozenEstimator  # sklearn >= 1.6 replaces cv="prefit"
+        except ImportError:
+            calibrated = CalibratedClassifierCV(
+                model, cv="prefit", method=self.calibration_method
+            )
+        else:
+            # A single split that scores every row skips the default k-fold
+            # CV, which would otherwise run on the frozen model's inputs
+            rows = np.arange(len(y))
+            calibrated = CalibratedClassifierCV(
+                FrozenEstimator(model),
+                method=self.calibration_method,
+                cv=[(rows, rows)],
+            )
+        calibrated.fit(X, y)
+        return calibrated
+
     def predict(
         self,
         context: ContextualFeatures,
         top_k: int = 3,
         include_all: bool = False,
+        explain: bool = True,
     ) -> List[PatternRecommendationV2]:
         """
         Predict top-k pattern recommendations.
@@ -458,25 +691,67 @@ class PatternRecommenderV2:
             context: Current day's contextual features
             top_k: Number of recommendations to return
             include_all: Include all patterns with probabilities
+            explain: Generate reasoning, suggested modifications and
+                per-prediction context factors; when False reasoning and
+                modifications are left empty and context factors fall back
+                to the global feature importances
 
         Returns:
             List of PatternRecommendationV2 sorted by probability
         """
-        features = self._extract_features(context)
-
+        contributions = None
         if self.is_fitted and self.calibrated_model is not None:
-            features_scaled = self.scaler.transform(features)
-            probabilities = self.calibrated_model.predict_proba(features_scaled)[0]
-
-            # Calculate per-prediction feature contributions
-            # Using feature importance as proxy
-            feature_contributions = self.feature_importances.copy()
+            features = self._scale(self._extract_features(context))
+            probabilities = self.calibrated_model.predict_proba(features)[0]
+            if explain:
+                contributions = self._feature_contributions(features)
         else:
             # Fallback to rule-based
             probabilities = self._rule_based_scores(context)
-            feature_contributions = {f: 0.0 for f in self.FEATURE_NAMES}
 
-        # Build recommendations
+        return self._build_recommendations(
+            context, probabilities,
+            None if contributions is None else contributions[0],
+            top_k, include_all, explain,
+        )
+
+    def _feature_contributions(self, features: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Per-sample feature contributions from the model's decision paths.
+
+        Returns:
+            (n_samples, n_features, n_patterns) array, or None when the model
+            has no path attribution table
+        """
+        if self.path_contributions is None:
+            return None
+
+        indicator, _ = self.model.decision_path(features)
+        contributions = (indicator @ self.path_contributions).toarray()
+        return contributions.reshape(len(features), len(self.FEATURE_NAMES), len(self.patterns))
+
+    def _context_factors(
+        self,
+        contributions: Optional[np.ndarray],
+        pattern: PatternType,
+    ) -> Mapping[str, float]:
+        """Feature contributions towards one pattern for a single prediction."""
+        if contributions is None:
+            return self._global_contributions
+        return dict(zip(
+            self.FEATURE_NAMES, contributions[:, self._pattern_index[pattern]].tolist()
+        ))
+
+    def _build_recommendations(
+        self,
+        context: ContextualFeatures,
+        probabilities: np.ndarray,
+        contributions: Optional[np.ndarray],
+        top_k: int = 3,
+        include_all: bool = False,
+        explain: bool = True,
+    ) -> List[PatternRecommendationV2]:
+        """Rank patterns by probability and build (optionally explained) recommendations."""
         pattern_probs = list(zip(self.patterns, probabilities))
         pattern_probs.sort(key=lambda x: x[1], reverse=True)
 
@@ -487,15 +762,22 @@ class PatternRecommenderV2:
         for rank, (pattern, prob) in enumerate(pattern_probs, 1):
             # Calculate confidence (probability spread)
             confidence = self._calculate_confidence(probabilities, prob)
+            feature_contributions = self._context_factors(contributions, pattern)
+
+            if explain:
+                reasoning = self._generate_reasoning(pattern, context, feature_contributions)
+                modifications = self._generate_modifications(pattern, context, prob)
+            else:
+                reasoning, modifications = [], []
 
             recommendations.append(PatternRecommendationV2(
                 pattern=pattern,
                 probability=float(prob),
                 confidence=confidence,
-                reasoning=self._generate_reasoning(pattern, context, feature_contributions),
+                reasoning=reasoning,
                 rank=rank,
                 context_factors=feature_contributions,
-                suggested_modifications=self._generate_modifications(pattern, context, prob),
+                suggested_modifications=modifications,
             ))
 
         return recommendations
@@ -590,29 +872,61 @@ class PatternRecommenderV2:
         - If energy is lower than expected
         - If time is limited
         """
-        main_rec = self.predict(context, top_k=3)
-
-        # Alternative scenarios
-        alternatives = {}
+        # (name, scenario context, feature-row overrides); the primary
+        # scenario comes first and the rest differ in one or two features
+        scenarios = [("primary", context, {})]
 
         # If social dinner gets cancelled
         if context.has_social_dinner:
-            alt_context = ContextualFeatures(
-                **{**context.__dict__, "has_social_dinner": False}
-            )
-            alternatives["no_social_dinner"] = self.predict(alt_context, top_k=1)[0]
+            scenarios.append((
+                "no_social_dinner",
+                replace(context, has_social_dinner=False),
+                {"has_social_dinner": 0},
+            ))
 
         # If energy drops
-        low_energy_context = ContextualFeatures(
-            **{**context.__dict__, "prev_energy": 2, "sleep_quality": 2}
-        )
-        alternatives["low_energy"] = self.predict(low_energy_context, top_k=1)[0]
+        scenarios.append((
+            "low_energy",
+            replace(context, prev_energy=2, sleep_quality=2),
+            {"prev_energy": 2 / 5.0, "sleep_quality": 2 / 5.0},
+        ))
 
         # Quick/simple option
-        simple_context = ContextualFeatures(
-            **{**context.__dict__, "stress_level": StressLevel.HIGH}
+        scenarios.append((
+            "time_limited",
+            replace(context, stress_level=StressLevel.HIGH),
+            {"stress_level": StressLevel.HIGH.value},
+        ))
+
+        if self.is_fitted and self.calibrated_model is not None:
+            # Score every scenario with a single model call
+            X = np.repeat(self._extract_features(context), len(scenarios), axis=0)
+            for row, (_, _, overrides) in enumerate(scenarios):
+                for name, value in overrides.items():
+                    X[row, self.FEATURE_INDEX[name]] = value
+            X = self._scale(X)
+            scenario_probs = self.calibrated_model.predict_proba(X)
+            contributions = self._feature_contributions(X[:1])
+        else:
+            scenario_probs = [
+                self._rule_based_scores(scenario_context)
+                for _, scenario_context, _ in scenarios
+            ]
+            contributions = None
+
+        main_rec = self._build_recommendations(
+            context, scenario_probs[0],
+            None if contributions is None else contributions[0],
+            top_k=3,
         )
-        alternatives["time_limited"] = self.predict(simple_context, top_k=1)[0]
+
+        # Alternative scenarios (returned without reasoning/modifications)
+        alternatives = {
+            name: self._build_recommendations(
+                scenario_context, probs, None, top_k=1, explain=False
+            )[0]
+            for (name, scenario_context, _), probs in zip(scenarios[1:], scenario_probs[1:])
+        }
 
         return {
             "primary": main_rec[0],
@@ -630,33 +944,10 @@ class PatternRecommenderV2:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before evaluation")
 
-        X_matrix = []
-        for record in X:
-            context = ContextualFeatures(
-                date=record.get("date", date.today()),
-                day_type=DayType(record.get("day_type", "weekday")),
-                weather=WeatherCondition(record.get("weather", "sunny")),
-                stress_level=StressLevel(record.get("stress_level", 2)),
-                activity_level=ActivityLevel(record.get("activity_level", "moderate")),
-                has_morning_workout=record.get("has_morning_workout", False),
-                has_evening_social=record.get("has_evening_social", False),
-                has_calendar_event=record.get("has_calendar_event", False),
-                has_social_lunch=record.get("has_social_lunch", False),
-                has_social_dinner=record.get("has_social_dinner", False),
-                sleep_quality=record.get("sleep_quality", 3),
-                sleep_hours=record.get("sleep_hours", 7.0),
-                prev_pattern=PatternType(record.get("prev_pattern", "traditional")),
-                prev_adherence=record.get("prev_adherence", 0.8),
-                prev_energy=record.get("prev_energy", 3),
-                prev_day_outcome=record.get("prev_day_outcome", PreviousDayOutcome.SUCCESS),
-                pattern_fatigue_score=record.get("pattern_fatigue_score", 0.0),
-            )
-            features = self._extract_features(context)
-            X_matrix.append(features.flatten())
+        from sklearn.model_selection import cross_val_score
 
-        X_array = np.array(X_matrix)
-        X_scaled = self.scaler.transform(X_array)
-        y_encoded = [self.pattern_map[p.value] for p in y]
+        X_scaled = self._scale(self._build_feature_matrix(X))
+        y_encoded = [self._pattern_index[p] for p in y]
 
         scores = cross_val_score(self.model, X_scaled, y_encoded, cv=cv)
 
@@ -682,7 +973,11 @@ class PatternRecommenderV2:
             "is_fitted": self.is_fitted,
             "version": self.MODEL_VERSION,
             "feature_importances": self.feature_importances,
+            "path_contributions": self.path_contributions,
             "training_accuracy": self.training_accuracy,
+            "calibration_method": self.calibration_method,
+            "model_family": self.model_family,
+            "scale_features": self.scale_features,
         }
         with open(path, "wb") as f:
             pickle.dump(model_data, f)
@@ -697,7 +992,55 @@ class PatternRecommenderV2:
         self.scaler = model_data["scaler"]
         self.is_fitted = model_data["is_fitted"]
         self.feature_importances = model_data.get("feature_importances", {})
+        self.path_contributions = model_data.get("path_contributions")
+        if self.feature_importances:
+            self._global_contributions = MappingProxyType(self.feature_importances)
         self.training_accuracy = model_data.get("training_accuracy", 0.0)
+        self.calibration_method = model_data.get(
+            "calibration_method", self.calibration_method
+        )
+        self.scale_features = model_data.get("scale_features", True)
+        self.model_family = model_data.get("model_family", "gbc")
+
+
+def _encode_records(
+    records: List[Dict[str, Any]],
+    encoders: Tuple[Dict[Any, int], ...],
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Encode raw training records straight into 17-feature float32 rows.
+
+    Mirrors PatternRecommenderV2._extract_features without building a
+    ContextualFeatures per record. Module-level so joblib workers can run it.
+    """
+    day_type_index, weather_index, activity_index, pattern_index, outcome_map = encoders
+    if out is None:
+        out = np.empty((len(records), len(PatternRecommenderV2.FEATURE_NAMES)), dtype=np.float32)
+
+    today = date.today()
+    for i, record in enumerate(records):
+        get = record.get
+        out[i] = (
+            get("date", today).weekday(),
+            day_type_index[DayType(get("day_type", "weekday"))],
+            weather_index[WeatherCondition(get("weather", "sunny"))],
+            StressLevel(get("stress_level", 2)).value,
+            activity_index[ActivityLevel(get("activity_level", "moderate"))],
+            int(get("has_morning_workout", False)),
+            int(get("has_evening_social", False)),
+            int(get("has_calendar_event", False)),
+            int(get("has_social_lunch", False)),
+            int(get("has_social_dinner", False)),
+            get("sleep_quality", 3) / 5.0,
+            min(get("sleep_hours", 7.0) / 10.0, 1.0),
+            pattern_index[PatternType(get("prev_pattern", "traditional"))],
+            get("prev_adherence", 0.8),
+            get("prev_energy", 3) / 5.0,
+            outcome_map.get(get("prev_day_outcome", PreviousDayOutcome.SUCCESS), 1),
+            get("pattern_fatigue_score", 0.0),
+        )
+    return out
 
 
 class SimpleScaler:
@@ -2,14 +2,31 @@
 Store Sequence Optimizer.
 Intelligent store visit ordering beyond simple TSP.
 """
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from datetime import datetime, time, timedelta
+from datetime import datetime, time
 from enum import Enum
-from typing import List, Dict, Optional, Any, Tuple, Set
+from itertools import permutations
+from typing import List, Dict, Optional, Any, Tuple, Set, Callable
+import math
 import numpy as np
 from pathlib import Path
 import json
-from itertools import permutations
+
+try:
+    from sklearn.metrics.pairwise import haversine_distances
+    from sklearn.neighbors import BallTree
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+try:
+    from rtree import index as rtree_index
+    RTREE_AVAILABLE = True
+except ImportError:
+    RTREE_AVAILABLE = False
+
+from ._route_kernels import NUMBA_AVAILABLE, score_all_perms, score_perm
 
 
 class ItemCategory(Enum):
@@ -84,6 +101,31 @@ class RouteConstraint:
     priority: int = 1
 
 
+@dataclass(slots=True)
+class RouteArrays:
+    """
+    Struct-of-arrays view of the stores on a route, indexed by store position.
+
+    Geometry is float32 (well under a meter at mile resolution) and the small
+    per-store integers are int16, halving what the scoring loops read.
+    """
+    coords_rad: np.ndarray   # (N, 2) float32 [lat, lon] in radians
+    home_rad: np.ndarray     # float32 [lat, lon] of home in radians
+    D: np.ndarray            # (N, N) float32 store-to-store miles
+    D_home: np.ndarray       # (N,) float32 home-to-store miles
+    parking: np.ndarray      # (N,) int16 parking difficulty
+    priority: np.ndarray     # (N,) int16 StorePriority value
+    checkout: np.ndarray     # (N,) int16 avg checkout minutes
+    item_qty: np.ndarray     # (N,) total item quantity
+    store_time: np.ndarray   # (N,) minutes spent shopping
+    start_min: float         # Trip start, minutes since midnight
+    opens_min: np.ndarray    # (N,) int16 opening time, minutes since midnight
+    closes_min: np.ndarray   # (N,) int16 closing time, minutes since midnight
+    perish_store: np.ndarray  # Store of each (store, perishable category) group
+    perish_limit: np.ndarray  # Minute limit of each group's category
+    perish_items: np.ndarray  # Number of items in each group
+
+
 class RouteSequenceOptimizer:
     """
     ML-enhanced route optimizer that considers:
@@ -107,6 +149,8 @@ class RouteSequenceOptimizer:
         ItemCategory.REFRIGERATED: 8,
         ItemCategory.FROZEN: 9,
     }
+    # The same categories ranked once, earliest first
+    CATEGORY_ORDER = tuple(sorted(CATEGORY_ORDER_PRIORITY, key=CATEGORY_ORDER_PRIORITY.get))
 
     # Time sensitive categories (minutes before quality degrades)
     PERISHABLE_LIMITS = {
@@ -118,11 +162,29 @@ class RouteSequenceOptimizer:
         ItemCategory.BAKERY: 240,
     }
 
+    # Above this many stores the heuristic finds neighbours with a spatial index
+    SPATIAL_INDEX_MIN_STORES = 20
+
+    # How many positions a store may move in one heuristic relocate step
+    RELOCATE_WINDOW = 6
+
+    # Store-to-store distance matrices kept across optimize() calls
+    DISTANCE_CACHE_SIZE = 64
+
     def __init__(self, model_path: Optional[Path] = None):
         """Initialize optimizer."""
         self.model_path = model_path
         self.historical_routes: List[Dict] = []
         self.store_preferences: Dict[str, float] = {}  # Learned efficiency ratings
+        self._distance_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+
+        # Integer code per category, and perishable limits indexed by that
+        # code (0 = doesn't spoil)
+        self._category_codes = {category: code for code, category in enumerate(ItemCategory)}
+        self._perish_limit_table = np.zeros(len(self._category_codes), dtype=np.int32)
+        for category, limit in self.PERISHABLE_LIMITS.items():
+            self._perish_limit_table[self._category_codes[category]] = limit
+
         self._load_model()
 
     def _load_model(self) -> None:
@@ -179,37 +241,30 @@ class RouteSequenceOptimizer:
                 cart_strategy="None needed",
             )
 
-        # Group items by store
-        store_items: Dict[str, List[ShoppingItem]] = {}
-        for item in items:
-            if item.store_id not in store_items:
-                store_items[item.store_id] = []
-            store_items[item.store_id].append(item)
-
         # Calculate constraints
         constraints = self._identify_constraints(stores, items, start_time)
 
+        # Store fields and per-store item totals as flat arrays
+        arrays = self._build_route_arrays(stores, items, start_time, home_location)
+
         # Score all possible orderings
         if len(stores) <= 6:
             # Brute force for small number of stores
-            best_order = self._brute_force_optimize(
-                stores, store_items, constraints, start_time, home_location, has_cooler
-            )
+            order_idx = self._brute_force_optimize(arrays, has_cooler)
         else:
             # Heuristic for larger sets
-            best_order = self._heuristic_optimize(
-                stores, store_items, constraints, start_time, home_location, has_cooler
-            )
+            order_idx = self._heuristic_optimize(arrays, has_cooler)
+        best_order = [stores[i] for i in order_idx]
 
         # Calculate route metrics
-        total_distance = self._calculate_route_distance(best_order, home_location)
-        total_time = self._calculate_route_time(best_order, store_items, start_time)
+        total_distance = self._calculate_route_distance(order_idx, arrays)
+        total_time = self._calculate_route_time(order_idx, arrays, distance=total_distance)
 
         # Generate arrival times
         arrival_times = self._calculate_arrival_times(best_order, start_time)
 
         # Generate reasoning
-        reasoning = self._generate_reasoning(best_order, store_items, constraints, has_cooler)
+        reasoning = self._generate_reasoning(best_order, items, constraints, has_cooler)
 
         # Check constraints
         satisfied, warnings = self._check_constraints(
@@ -217,7 +272,7 @@ class RouteSequenceOptimizer:
         )
 
         # Determine cart strategy
-        cart_strategy = self._determine_cart_strategy(best_order, store_items)
+        cart_strategy = self._determine_cart_strategy(best_order, items)
 
         return OptimizedRoute(
             store_order=best_order,
@@ -274,299 +329,691 @@ class RouteSequenceOptimizer:
 
         return constraints
 
-    def _brute_force_optimize(
+    def _build_route_arrays(
         self,
         stores: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]],
-        constraints: List[RouteConstraint],
+        items: List[ShoppingItem],
         start_time: datetime,
         home_location: Tuple[float, float],
+    ) -> RouteArrays:
+        """
+        Lay the stores out as flat arrays and aggregate their items per store.
+
+        Items for stores that aren't on the route are ignored.
+        """
+        n = len(stores)
+        store_index = {store.store_id: i for i, store in enumerate(stores)}
+        item_store = np.array([store_index.get(i.store_id, -1) for i in items], dtype=np.int64)
+        quantity = np.array([i.quantity for i in items], dtype=np.int64)
+        category = np.array([self._category_codes[i.category] for i in items], dtype=np.int8)
+        on_route = item_store >= 0
+
+        item_qty = np.bincount(
+            item_store[on_route], weights=quantity[on_route], minlength=n
+        ).astype(np.int64)
+        checkout = np.array([s.avg_checkout_time for s in stores], dtype=np.int16)
+
+        # Count perishable items per (store, category); keep non-empty groups
+        perishable = on_route & (self._perish_limit_table[category] > 0)
+        perish_count = np.zeros((n, len(self._perish_limit_table)), dtype=np.int64)
+        np.add.at(perish_count, (item_store[perishable], category[perishable]), 1)
+        perish_store, perish_category = np.nonzero(perish_count)
+
+        coords_rad = np.radians(
+            np.array([[s.latitude, s.longitude] for s in stores], dtype=np.float32)
+        )
+        home_rad = np.radians(np.array(home_location, dtype=np.float32))
+        D, D_home = self._build_distance_matrix(coords_rad, home_rad)
+
+        return RouteArrays(
+            coords_rad=coords_rad,
+            home_rad=home_rad,
+            D=D,
+            D_home=D_home,
+            parking=np.array([s.parking_difficulty for s in stores], dtype=np.int16),
+            priority=np.array([s.priority.value for s in stores], dtype=np.int16),
+            checkout=checkout,
+            item_qty=item_qty,
+            # Base time + per-item time + checkout, as in _calculate_route_time
+            store_time=10 + item_qty * 1.5 + checkout,
+            start_min=self._minutes_since_midnight(start_time),
+            opens_min=np.array(
+                [s.opens.hour * 60 + s.opens.minute for s in stores], dtype=np.int16
+            ),
+            closes_min=np.array(
+                [s.closes.hour * 60 + s.closes.minute for s in stores], dtype=np.int16
+            ),
+            perish_store=perish_store,
+            perish_limit=self._perish_limit_table[perish_category].astype(np.float64),
+            perish_items=perish_count[perish_store, perish_category],
+        )
+
+    def _minutes_since_midnight(self, moment: datetime) -> float:
+        """Convert a trip time to minutes since midnight (seconds kept as a fraction)."""
+        return moment.hour * 60 + moment.minute + moment.second / 60
+
+    def _brute_force_optimize(
+        self,
+        arrays: RouteArrays,
         has_cooler: bool,
-    ) -> List[StoreInfo]:
-        """Try all permutations for small store counts."""
-        best_score = float('inf')
-        best_order = stores.copy()
-
-        for perm in permutations(stores):
-            order = list(perm)
-            score = self._score_order(
-                order, store_items, constraints, start_time, home_location, has_cooler
+    ) -> List[int]:
+        """Find the best ordering (as store indices) for small store counts."""
+        D, D_home = arrays.D, arrays.D_home
+        position_costs = self._position_costs(arrays)
+
+        if not len(arrays.perish_store):
+            # Without perishables every score term decomposes over legs and
+            # positions, so an exact DP replaces the n! enumeration
+            return self._held_karp(D, D_home, position_costs)
+
+        # The perishable penalty depends on the whole trip's duration, so it
+        # can only be scored on complete orderings
+        if NUMBA_AVAILABLE:
+            # Compiled and threaded, scoring all n! orderings outruns the search
+            perms = np.array(list(permutations(range(len(D_home)))), dtype=np.int8)
+            scores = score_all_perms(
+                perms, D, D_home, position_costs, arrays.store_time,
+                arrays.perish_store, arrays.perish_limit, arrays.perish_items, has_cooler,
             )
-            if score < best_score:
-                best_score = score
-                best_order = order
+            return perms[np.argmin(scores)].tolist()
+
+        def score_order(perm: List[int]) -> float:
+            return score_perm(
+                np.array(perm), D, D_home, position_costs, arrays.store_time,
+                arrays.perish_store, arrays.perish_limit, arrays.perish_items, has_cooler,
+            )
+
+        return self._branch_and_bound(D, D_home, position_costs, score_order)
+
+    def _branch_and_bound(
+        self,
+        D: np.ndarray,
+        D_home: np.ndarray,
+        position_costs: np.ndarray,
+        score_order: Callable[[List[int]], float],
+    ) -> List[int]:
+        """
+        Depth-first search over orderings, pruning prefixes that can't win.
+
+        A prefix is extended only while its cost so far plus an admissible
+        lower bound on the rest stays below the best complete score: every
+        unvisited store still needs one outgoing leg (to another unvisited
+        store or home), the current store needs a leg into the unvisited set,
+        each unvisited store pays at least its cheapest remaining position
+        cost, and the perishable penalty is never negative. The incumbent is
+        seeded with the perishable-blind Held-Karp ordering.
+
+        Before searching, the same bound rules out whole (position, store)
+        pairs: a store whose position cost there plus the cheapest possible
+        rest of the trip can't beat the incumbent is never placed there.
+        Hours and priority penalties often leave a store a single allowed
+        position, fixing it without enumerating the orderings that move it.
+
+        Args:
+            score_order: Exact score of a complete ordering of store indices
+
+        Returns:
+            Store indices in visit order
+        """
+        n = len(D_home)
+        leg_costs = D * 5
+        home_costs = D_home * 5
+        # [k, i]: cheapest position cost for store i at position k or later
+        min_position_cost = np.minimum.accumulate(position_costs[::-1], axis=0)[::-1]
+
+        best_order = self._held_karp(D, D_home, position_costs)
+        best_score = score_order(best_order)
+
+        # Cheapest whole trip ignoring who goes where: one leg out of home,
+        # one leg out of each store, each store at its cheapest position
+        between = leg_costs.copy()
+        np.fill_diagonal(between, np.inf)
+        outgoing = np.minimum(between.min(axis=1), home_costs)
+        cheapest_position = position_costs.min(axis=0)
+        trip_floor = home_costs.min() + outgoing.sum() + cheapest_position.sum()
+        # [k, i]: store i may still sit at position k in a winning ordering
+        allowed = trip_floor - cheapest_position + position_costs < best_score
+
+        def lower_bound(last: int, remaining: List[int], position: int) -> float:
+            if not remaining:
+                return home_costs[last]
+            rest = np.array(remaining)
+            between = leg_costs[np.ix_(rest, rest)]
+            np.fill_diagonal(between, np.inf)
+            outgoing = np.minimum(between.min(axis=1), home_costs[rest])
+            return (
+                leg_costs[last, rest].min()
+                + outgoing.sum()
+                + min_position_cost[position, rest].sum()
+            )
+
+        def search(path: List[int], remaining: List[int], cost: float) -> None:
+            nonlocal best_order, best_score
+            if not remaining:
+                score = score_order(path)
+                if score < best_score:
+                    best_score, best_order = score, path
+                return
+
+            position = len(path)
+            last = path[-1]
+            # Try the nearest stores first so good tours tighten the bound early
+            for store in sorted(remaining, key=lambda r: leg_costs[last, r]):
+                if not allowed[position, store]:
+                    continue
+                rest = [r for r in remaining if r != store]
+                extended = cost + leg_costs[last, store] + position_costs[position, store]
+                if extended + lower_bound(store, rest, position + 1) < best_score:
+                    search(path + [store], rest, extended)
+
+        for first in np.argsort(home_costs).tolist():
+            if not allowed[0, first]:
+                continue
+            rest = [r for r in range(n) if r != first]
+            cost = home_costs[first] + position_costs[0, first]
+            if cost + lower_bound(first, rest, 1) < best_score:
+                search([first], rest, cost)
 
         return best_order
 
+    def _build_distance_matrix(
+        self,
+        coords_rad: np.ndarray,
+        home_rad: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate pairwise store distances and home-to-store distances in miles.
+
+        Built once per optimize() call; every later distance is a lookup.
+        The store matrix is cached by the stores' coordinates, so re-planning
+        the same stores (e.g. as items are added) only recomputes the home
+        vector.
+
+        Returns:
+            (D, D_home): (N, N) symmetric store matrix and (N,) home vector,
+            both float32; D is shared with the cache and read-only
+        """
+        key = coords_rad.tobytes()
+        D = self._distance_cache.get(key)
+        if D is None:
+            D = self._store_distances(coords_rad)
+            D.flags.writeable = False
+            self._distance_cache[key] = D
+            if len(self._distance_cache) > self.DISTANCE_CACHE_SIZE:
+                self._distance_cache.popitem(last=False)
+        else:
+            self._distance_cache.move_to_end(key)
+
+        return D, self._home_distances(coords_rad, home_rad)
+
+    def _store_distances(self, coords_rad: np.ndarray) -> np.ndarray:
+        """Calculate the (N, N) float32 store-to-store distance matrix in miles."""
+        R = 3959  # Earth radius in miles
+
+        if SKLEARN_AVAILABLE:
+            return (haversine_distances(coords_rad) * R).astype(np.float32)
+
+        lat, lon = coords_rad[:, 0], coords_rad[:, 1]
+        D = self._haversine_arr(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+        return D.astype(np.float32)
+
+    def _home_distances(self, coords_rad: np.ndarray, home_rad: np.ndarray) -> np.ndarray:
+        """Calculate the (N,) float32 home-to-store distance vector in miles."""
+        R = 3959  # Earth radius in miles
+
+        if SKLEARN_AVAILABLE:
+            return (haversine_distances(home_rad[None, :], coords_rad)[0] * R).astype(np.float32)
+
+        D_home = self._haversine_arr(home_rad[0], home_rad[1], coords_rad[:, 0], coords_rad[:, 1])
+        return D_home.astype(np.float32)
+
+    def _position_costs(self, arrays: RouteArrays) -> np.ndarray:
+        """
+        Calculate the position-dependent score terms for every store.
+
+        Returns:
+            (N, N) array where [k, i] is the hours, parking and priority score
+            of visiting store i at position k
+        """
+        n = len(arrays.opens_min)
+        k = np.arange(n)[:, None]
+
+        # Same arrival estimate as _calculate_hours_penalty
+        arrival = arrays.start_min + 15 + 35 * k
+        wait = arrays.opens_min - arrival
+        hours_penalty = np.where(wait > 0, wait, np.where(arrival > arrays.closes_min, 100, 0))
+
+        return (
+            hours_penalty * 20
+            + arrays.parking * (1 - (n - k) / n) * 0.5
+            + k * arrays.priority * 0.3
+        )
+
+    def _held_karp(
+        self,
+        D: np.ndarray,
+        D_home: np.ndarray,
+        position_costs: np.ndarray,
+    ) -> List[int]:
+        """
+        Held-Karp DP over visited-store bitmasks.
+
+        dp[mask, j] is the cheapest score for visiting the stores in mask and
+        ending at j, which then sits at position popcount(mask) - 1. Leg
+        distances carry the same x5 weight as _score_order.
+
+        Returns:
+            Store indices in visit order
+        """
+        n = len(D_home)
+        full = (1 << n) - 1
+        leg_costs = D * 5
+
+        dp = np.full((1 << n, n), np.inf)
+        parent = np.full((1 << n, n), -1, dtype=np.int64)
+        for j in range(n):
+            dp[1 << j, j] = D_home[j] * 5 + position_costs[0, j]
+
+        for mask in range(1, full):
+            position = bin(mask).count("1")
+            # candidates[j, k]: extend the best path ending at j with store k
+            candidates = dp[mask][:, None] + leg_costs + position_costs[position][None, :]
+            best_prev = np.argmin(candidates, axis=0)
+            best_cost = candidates[best_prev, np.arange(n)]
+
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                extended = mask | (1 << k)
+                if best_cost[k] < dp[extended, k]:
+                    dp[extended, k] = best_cost[k]
+                    parent[extended, k] = best_prev[k]
+
+        # Close the loop back home and walk the parents backwards
+        last = int(np.argmin(dp[full] + D_home * 5))
+        order = []
+        mask = full
+        while last >= 0:
+            order.append(last)
+            mask, last = mask ^ (1 << last), int(parent[mask, last])
+
+        return order[::-1]
+
     def _heuristic_optimize(
         self,
-        stores: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]],
-        constraints: List[RouteConstraint],
-        start_time: datetime,
-        home_location: Tuple[float, float],
+        arrays: RouteArrays,
         has_cooler: bool,
-    ) -> List[StoreInfo]:
-        """Use heuristic for larger store counts."""
-        # Start with stores that have earliest closing times
-        remaining = stores.copy()
-        ordered = []
-
-        while remaining:
-            # Score each remaining store for next position
-            best_store = None
-            best_score = float('inf')
-
-            for store in remaining:
-                test_order = ordered + [store]
-                score = self._score_partial_order(
-                    test_order, store_items, constraints, start_time, home_location, has_cooler
+    ) -> List[int]:
+        """
+        Use heuristic for larger store counts.
+
+        Seeds a tour by nearest neighbour from home and improves it with
+        2-opt on the distance matrix. That tour, its reverse and a greedy
+        store-by-store ordering are then each refined with relocate moves
+        under the full score, and the best of the three is kept.
+        """
+        D, D_home = arrays.D, arrays.D_home
+        position_costs = self._position_costs(arrays)
+
+        # Node 0 is home, node i + 1 is stores[i]
+        n = len(D_home)
+        M = np.empty((n + 1, n + 1))
+        M[0, 0] = 0.0
+        M[0, 1:] = M[1:, 0] = D_home
+        M[1:, 1:] = D
+
+        # Nearest-neighbour seed from home
+        index = None
+        if n > self.SPATIAL_INDEX_MIN_STORES:
+            index = self._build_spatial_index(arrays)
+
+        visited = np.zeros(n, dtype=bool)
+        ordered_indices: List[int] = []
+        for _ in range(n):
+            dist = D[ordered_indices[-1]] if ordered_indices else D_home
+            if index is not None:
+                point = (
+                    arrays.coords_rad[ordered_indices[-1]] if ordered_indices
+                    else arrays.home_rad
                 )
-                if score < best_score:
-                    best_score = score
-                    best_store = store
+                nearest = self._nearest_unvisited(index, arrays, point, dist, visited)
+            else:
+                candidates = np.flatnonzero(~visited)
+                nearest = int(candidates[np.argmin(dist[candidates])])
+            visited[nearest] = True
+            ordered_indices.append(nearest)
 
-            if best_store:
-                ordered.append(best_store)
-                remaining.remove(best_store)
+        tour = self._two_opt([0] + [i + 1 for i in ordered_indices], M)
 
-        return ordered
+        def score(order: np.ndarray) -> float:
+            return score_perm(
+                order, D, D_home, position_costs, arrays.store_time,
+                arrays.perish_store, arrays.perish_limit, arrays.perish_items, has_cooler,
+            )
+
+        def score_batch(orders: np.ndarray) -> np.ndarray:
+            return score_all_perms(
+                orders, D, D_home, position_costs, arrays.store_time,
+                arrays.perish_store, arrays.perish_limit, arrays.perish_items, has_cooler,
+            )
+
+        # Distance-only tours ignore hours and perishables; the greedy seed
+        # weighs them from the first store on. Relocate moves settle the rest
+        forward = np.array(tour[1:]) - 1
+        seeds = (forward, forward[::-1].copy(), self._greedy_order(n, score_batch))
+        best_order, best_score = None, float('inf')
+        for seed in seeds:
+            order, order_score = self._relocate(seed, score(seed), score_batch)
+            if order_score < best_score:
+                best_order, best_score = order, order_score
+
+        return best_order.tolist()
+
+    def _greedy_order(
+        self,
+        n: int,
+        score_batch: Callable[[np.ndarray], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Build an ordering store by store, each time appending the store
+        whose partial route scores best.
+
+        Args:
+            n: Number of stores
+            score_batch: Scores orderings given one per row; rows may be
+                partial routes
+        """
+        order = np.empty(0, dtype=np.int64)
+        remaining = np.arange(n)
+        for _ in range(n):
+            prefixes = np.hstack([
+                np.broadcast_to(order, (len(remaining), len(order))),
+                remaining[:, None],
+            ])
+            pick = int(np.argmin(score_batch(prefixes)))
+            order = prefixes[pick]
+            remaining = np.delete(remaining, pick)
+        return order
+
+    def _relocate(
+        self,
+        order: np.ndarray,
+        order_score: float,
+        score_batch: Callable[[np.ndarray], np.ndarray],
+    ) -> Tuple[np.ndarray, float]:
+        """
+        Move single stores to better positions until no move helps.
+
+        Each store is tried at every position within RELOCATE_WINDOW of its
+        own, with all of those orderings scored in one batch; the best one
+        is taken if it improves the score. Moves by one position are the
+        adjacent swaps.
+
+        Returns:
+            (order, score) after the last improving move
+        """
+        n = len(order)
+        positions = np.arange(n)
+        improved = True
+
+        while improved:
+            improved = False
+            for i in range(n):
+                targets = np.arange(
+                    max(0, i - self.RELOCATE_WINDOW), min(n, i + self.RELOCATE_WINDOW + 1)
+                )
+                targets = targets[targets != i][:, None]
+
+                # Row t: order without store i, with store i put back at targets[t]
+                rest = np.delete(order, i)
+                moves = rest[np.minimum(positions - (positions > targets), n - 2)]
+                moves[positions == targets] = order[i]
+
+                scores = score_batch(moves)
+                best = int(np.argmin(scores))
+                if scores[best] < order_score - 1e-9:
+                    order, order_score = moves[best], float(scores[best])
+                    improved = True
+
+        return order, order_score
+
+    def _build_spatial_index(self, arrays: RouteArrays) -> Optional[Any]:
+        """
+        Index store locations for nearest-neighbour queries.
+
+        Prefers an R-tree over an equirectangular projection around home and
+        falls back to a haversine BallTree; None if neither is installed.
+        """
+        if RTREE_AVAILABLE:
+            x, y = self._project(arrays, arrays.coords_rad)
+            return rtree_index.Index(
+                (i, (x[i], y[i], x[i], y[i]), None) for i in range(len(x))
+            )
+        if SKLEARN_AVAILABLE:
+            return BallTree(arrays.coords_rad, metric='haversine')
+        return None
+
+    def _project(
+        self,
+        arrays: RouteArrays,
+        coords_rad: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Project [lat, lon] radians to a plane that's locally true around home."""
+        coords_rad = np.atleast_2d(coords_rad)
+        return coords_rad[:, 1] * math.cos(arrays.home_rad[0]), coords_rad[:, 0]
+
+    def _nearest_unvisited(
+        self,
+        index: Any,
+        arrays: RouteArrays,
+        point: np.ndarray,
+        dist: np.ndarray,
+        visited: np.ndarray,
+    ) -> int:
+        """
+        Find the index of the closest unvisited store to a point.
+
+        Asks the spatial index for a few neighbours and widens the query only
+        when all of them have already been visited. The R-tree ranks by planar
+        distance, so the pick among the candidates uses the true distances.
+
+        Args:
+            dist: Distance from the point to every store
+        """
+        n = len(visited)
+        k = min(8, n)
+        while True:
+            if RTREE_AVAILABLE and isinstance(index, rtree_index.Index):
+                x, y = self._project(arrays, point)
+                neighbours = index.nearest((x[0], y[0], x[0], y[0]), num_results=k)
+            else:
+                neighbours = index.query(point[None, :], k=k, return_distance=False)[0]
+
+            unvisited = [int(store) for store in neighbours if not visited[store]]
+            if unvisited:
+                return min(unvisited, key=lambda store: dist[store])
+            k = min(2 * k, n)
+
+    def _two_opt(self, tour: List[int], M: np.ndarray) -> List[int]:
+        """
+        Improve a closed tour with 2-opt moves until none shortens it.
+
+        Each candidate move is priced in O(1) from the four edges it swaps.
+        tour[0] stays fixed (home), since reversals never include it.
+        """
+        tour = list(tour)
+        m = len(tour)
+        improved = True
+
+        while improved:
+            improved = False
+            for i in range(m - 2):
+                a, b = tour[i], tour[i + 1]
+                for j in range(i + 2, m if i > 0 else m - 1):
+                    c, d = tour[j], tour[(j + 1) % m]
+                    delta = M[a, c] + M[b, d] - M[a, b] - M[c, d]
+                    if delta < -1e-9:
+                        tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1]
+                        b = tour[i + 1]
+                        improved = True
+
+        return tour
 
     def _score_order(
         self,
-        order: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]],
-        constraints: List[RouteConstraint],
-        start_time: datetime,
-        home_location: Tuple[float, float],
+        order: List[int],
+        arrays: RouteArrays,
         has_cooler: bool,
+        distance: Optional[float] = None,
     ) -> float:
-        """Score a complete ordering (lower is better)."""
+        """
+        Score a complete ordering of store indices (lower is better).
+
+        score_perm computes the same score in one pass for the search loops.
+
+        Args:
+            distance: Precomputed route distance for this order, if known
+        """
         score = 0.0
 
         # Distance score
-        distance = self._calculate_route_distance(order, home_location)
+        if distance is None:
+            distance = self._calculate_route_distance(order, arrays)
         score += distance * 5  # Weight distance
 
         # Perishable score
         perishable_penalty = self._calculate_perishable_penalty(
-            order, store_items, start_time, has_cooler
+            order, arrays, has_cooler, distance
         )
         score += perishable_penalty * 10  # Heavy penalty for perishables
 
         # Store hours violation
-        hours_penalty = self._calculate_hours_penalty(order, start_time)
+        hours_penalty = self._calculate_hours_penalty(order, arrays)
         score += hours_penalty * 20
 
         # Parking difficulty (prefer hard parking early)
-        parking_score = self._calculate_parking_score(order)
+        parking_score = self._calculate_parking_score(order, arrays)
         score += parking_score
 
         # Priority score (visit high priority early)
-        priority_score = self._calculate_priority_score(order)
+        priority_score = self._calculate_priority_score(order, arrays)
         score += priority_score
 
         return score
 
-    def _score_partial_order(
-        self,
-        partial_order: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]],
-        constraints: List[RouteConstraint],
-        start_time: datetime,
-        home_location: Tuple[float, float],
-        has_cooler: bool,
-    ) -> float:
-        """Score a partial ordering for greedy heuristic."""
-        # Similar to full scoring but with position-based adjustments
-        return self._score_order(
-            partial_order, store_items, constraints, start_time, home_location, has_cooler
-        )
-
-    def _calculate_route_distance(
-        self,
-        order: List[StoreInfo],
-        home_location: Tuple[float, float]
-    ) -> float:
+    def _calculate_route_distance(self, order: List[int], arrays: RouteArrays) -> float:
         """Calculate total route distance."""
-        if not order:
+        if not len(order):
             return 0.0
 
-        total = 0.0
-
-        # Home to first store
-        total += self._haversine_distance(
-            home_location[0], home_location[1],
-            order[0].latitude, order[0].longitude
+        order = np.asarray(order)
+        return (
+            float(arrays.D_home[order[0]])
+            + float(arrays.D[order[:-1], order[1:]].sum(dtype=np.float64))
+            + float(arrays.D_home[order[-1]])
         )
 
-        # Between stores
-        for i in range(len(order) - 1):
-            total += self._haversine_distance(
-                order[i].latitude, order[i].longitude,
-                order[i+1].latitude, order[i+1].longitude
-            )
-
-        # Last store to home
-        total += self._haversine_distance(
-            order[-1].latitude, order[-1].longitude,
-            home_location[0], home_location[1]
-        )
-
-        return total
-
-    def _haversine_distance(
+    def _haversine_arr(
         self,
-        lat1: float, lon1: float,
-        lat2: float, lon2: float
-    ) -> float:
-        """Calculate distance between two points in miles."""
+        lat1: np.ndarray, lon1: np.ndarray,
+        lat2: np.ndarray, lon2: np.ndarray
+    ) -> np.ndarray:
+        """Calculate broadcast distances in miles between points given in radians."""
         R = 3959  # Earth radius in miles
 
-        lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-
         dlat = lat2 - lat1
         dlon = lon2 - lon1
 
         a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
-        c = 2 * np.arcsin(np.sqrt(a))
-
-        return R * c
+        return R * 2 * np.arcsin(np.sqrt(a))
 
     def _calculate_route_time(
         self,
-        order: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]],
-        start_time: datetime
+        order: List[int],
+        arrays: RouteArrays,
+        distance: Optional[float] = None,
     ) -> float:
-        """Calculate total route time including shopping."""
-        if not order:
-            return 0.0
+        """
+        Calculate total route time including shopping.
 
-        total = 0.0
+        Args:
+            distance: Precomputed route distance for this order, if known
+        """
+        if not len(order):
+            return 0.0
 
         # Travel time (assume 30 mph average)
-        distance = self._calculate_route_distance(
-            order,
-            (order[0].latitude - 0.01, order[0].longitude)  # Approximate home
-        )
+        if distance is None:
+            distance = self._calculate_route_distance(order, arrays)
         travel_time = (distance / 30) * 60  # Convert to minutes
-        total += travel_time
 
         # Shopping time at each store
-        for store in order:
-            items = store_items.get(store.store_id, [])
-            item_count = sum(item.quantity for item in items)
-
-            # Base time + per-item time + checkout
-            base_time = 10
-            item_time = item_count * 1.5
-            checkout_time = store.avg_checkout_time
-
-            total += base_time + item_time + checkout_time
-
-        return total
+        return travel_time + float(arrays.store_time[order].sum())
 
     def _calculate_perishable_penalty(
         self,
-        order: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]],
-        start_time: datetime,
-        has_cooler: bool
+        order: List[int],
+        arrays: RouteArrays,
+        has_cooler: bool,
+        distance: Optional[float] = None,
     ) -> float:
-        """Calculate penalty for perishable item handling."""
-        penalty = 0.0
-
-        # Calculate time from each store to end of trip
-        trip_times = self._estimate_remaining_times(order, store_items, start_time)
-
-        for i, store in enumerate(order):
-            items = store_items.get(store.store_id, [])
-            remaining_time = trip_times.get(store.store_id, 0)
-
-            for item in items:
-                if item.category in self.PERISHABLE_LIMITS:
-                    limit = self.PERISHABLE_LIMITS[item.category]
-
-                    # Cooler extends time
-                    if has_cooler:
-                        limit *= 2
-
-                    if remaining_time > limit:
-                        # Penalty proportional to time over limit
-                        penalty += (remaining_time - limit) / 10
-
-        return penalty
-
-    def _estimate_remaining_times(
-        self,
-        order: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]],
-        start_time: datetime
-    ) -> Dict[str, float]:
-        """Estimate time remaining after each store visit."""
-        remaining = {}
+        """
+        Calculate penalty for perishable item handling.
 
-        # Calculate cumulative time from end
-        total_time = self._calculate_route_time(order, store_items, start_time)
-        elapsed = 0
+        Route time and the time left after each store come from one running
+        sum of shopping times, instead of re-deriving the route time; the
+        overrun is then taken for every (store, category) group at once.
+        """
+        if not len(order):
+            return 0.0
 
-        for store in order:
-            items = store_items.get(store.store_id, [])
-            item_count = sum(item.quantity for item in items)
+        if distance is None:
+            distance = self._calculate_route_distance(order, arrays)
 
-            store_time = 10 + (item_count * 1.5) + store.avg_checkout_time
-            elapsed += store_time
+        # Time from each store to end of trip, indexed by store
+        elapsed = np.cumsum(arrays.store_time[order])
+        total_time = (distance / 30) * 60 + elapsed[-1]
+        remaining = np.zeros(len(arrays.store_time))
+        remaining[order] = total_time - elapsed
 
-            remaining[store.store_id] = total_time - elapsed
+        # Cooler extends time
+        limit = arrays.perish_limit * (2 if has_cooler else 1)
+        over = np.maximum(remaining[arrays.perish_store] - limit, 0.0)
 
-        return remaining
+        # Penalty proportional to time over limit, for each item
+        return float((arrays.perish_items * over).sum()) / 10
 
-    def _calculate_hours_penalty(
-        self,
-        order: List[StoreInfo],
-        start_time: datetime
-    ) -> float:
+    def _calculate_hours_penalty(self, order: List[int], arrays: RouteArrays) -> float:
         """Calculate penalty for store hours violations."""
-        penalty = 0.0
-        current_time = start_time
-
-        for store in order:
-            open_time = datetime.combine(start_time.date(), store.opens)
-            close_time = datetime.combine(start_time.date(), store.closes)
-
-            # Add travel time estimate
-            current_time += timedelta(minutes=15)
+        # Arrive 15 min after the trip start or the previous store's
+        # 20 min of shopping
+        arrival = arrays.start_min + 15 + 35 * np.arange(len(order))
+        opens = arrays.opens_min[order]
 
-            if current_time < open_time:
-                wait_minutes = (open_time - current_time).seconds / 60
-                penalty += wait_minutes
-            elif current_time > close_time:
-                penalty += 100  # Major penalty for missing closing time
+        wait_minutes = np.maximum(opens - arrival, 0)
+        # Major penalty for missing closing time
+        missed = (arrival >= opens) & (arrival > arrays.closes_min[order])
 
-            # Add shopping time estimate
-            current_time += timedelta(minutes=20)
+        return float(wait_minutes.sum() + 100 * missed.sum())
 
-        return penalty
-
-    def _calculate_parking_score(self, order: List[StoreInfo]) -> float:
+    def _calculate_parking_score(self, order: List[int], arrays: RouteArrays) -> float:
         """Score based on parking difficulty ordering."""
         score = 0.0
 
         for i, store in enumerate(order):
             # Prefer hard parking early (when we have less stuff)
             position_factor = (len(order) - i) / len(order)
-            score += store.parking_difficulty * (1 - position_factor) * 0.5
+            score += arrays.parking[store] * (1 - position_factor) * 0.5
 
         return score
 
-    def _calculate_priority_score(self, order: List[StoreInfo]) -> float:
+    def _calculate_priority_score(self, order: List[int], arrays: RouteArrays) -> float:
         """Score based on priority ordering."""
         score = 0.0
 
         for i, store in enumerate(order):
             # High priority stores should be earlier
-            position_penalty = i * store.priority.value
+            position_penalty = i * int(arrays.priority[store])
             score += position_penalty * 0.3
 
         return score
@@ -578,28 +1025,20 @@ class RouteSequenceOptimizer:
     ) -> Dict[str, str]:
         """Calculate estimated arrival times."""
         arrivals = {}
-        current_time = start_time
+        start_min = start_time.hour * 60 + start_time.minute
 
         for i, store in enumerate(order):
-            # Add travel time
-            if i == 0:
-                travel_time = 10  # First store
-            else:
-                # Estimate based on previous store
-                travel_time = 8
-
-            current_time += timedelta(minutes=travel_time)
-            arrivals[store.store_id] = current_time.strftime("%H:%M")
-
-            # Add shopping time for next iteration
-            current_time += timedelta(minutes=20)
+            # 10 min to the first store, then 20 min shopping + 8 min travel
+            # per stop
+            minutes = start_min + 10 + 28 * i
+            arrivals[store.store_id] = f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
 
         return arrivals
 
     def _generate_reasoning(
         self,
         order: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]],
+        items: List[ShoppingItem],
         constraints: List[RouteConstraint],
         has_cooler: bool,
     ) -> List[str]:
@@ -619,10 +1058,9 @@ class RouteSequenceOptimizer:
             reasoning.append(f"Starting at {first.name} - efficient route start")
 
         # Explain perishable handling
+        frozen_stores = {i.store_id for i in items if i.category == ItemCategory.FROZEN}
         for store in order:
-            items = store_items.get(store.store_id, [])
-            frozen_items = [i for i in items if i.category == ItemCategory.FROZEN]
-            if frozen_items:
+            if store.store_id in frozen_stores:
                 idx = order.index(store)
                 if idx >= len(order) - 2:
                     reasoning.append(f"{store.name} near end of route - frozen items stay cold")
@@ -655,11 +1093,10 @@ class RouteSequenceOptimizer:
             warnings.append(f"Trip may exceed {max_duration} minutes ({actual_duration:.0f} min estimated)")
 
         # Check store hours
-        current = start_time
+        current = self._minutes_since_midnight(start_time)
         for store in order:
-            current += timedelta(minutes=20)  # Travel + shopping estimate
-            close = datetime.combine(start_time.date(), store.closes)
-            if current < close:
+            current += 20  # Travel + shopping estimate
+            if current < store.closes.hour * 60 + store.closes.minute:
                 satisfied.append(f"{store.name} visited before closing")
             else:
                 warnings.append(f"{store.name} may be closed by arrival time")
@@ -669,13 +1106,10 @@ class RouteSequenceOptimizer:
     def _determine_cart_strategy(
         self,
         order: List[StoreInfo],
-        store_items: Dict[str, List[ShoppingItem]]
+        items: List[ShoppingItem]
     ) -> str:
         """Determine optimal cart/bag strategy."""
-        total_items = sum(
-            sum(i.quantity for i in items)
-            for items in store_items.values()
-        )
+        total_items = sum(i.quantity for i in items)
 
         if total_items < 10:
             return "Hand basket sufficient"
@@ -686,8 +1120,8 @@ class RouteSequenceOptimizer:
 
     def get_perishable_order(self, items: List[ShoppingItem]) -> List[ItemCategory]:
         """Get recommended order for purchasing item categories."""
-        categories = list(set(item.category for item in items))
-        return sorted(categories, key=lambda c: self.CATEGORY_ORDER_PRIORITY.get(c, 5))
+        present = {item.category for item in items}
+        return [c for c in self.CATEGORY_ORDER if c in present]
 
     def train(self, routes: List[Dict]) -> Dict[str, Any]:
         """Learn from historical routes."""
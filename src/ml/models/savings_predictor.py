@@ -5,10 +5,50 @@ Predicts actual savings value from multi-store shopping trips.
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Dict, Optional, Any, Tuple
+from functools import lru_cache
+from operator import attrgetter
+from typing import List, Dict, NamedTuple, Optional, Any, Tuple, Set, Union
 import numpy as np
 from pathlib import Path
+import atexit
 import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    # PyPy's JIT runs the plain-Python store paths faster than small NumPy arrays
+    import __pypy__  # noqa: F401
+    PYPY = True
+except ImportError:
+    PYPY = False
+
+try:
+    # Ahead-of-time build from _build_savings_aot, if one has been compiled
+    from .savings_kernels import predict_core as predict_savings_core
+except ImportError:
+    from ._savings_kernels import predict_savings_core
+from ._savings_kernels import evaluate_n_store, gas_price_scenarios
+
+
+logger = logging.getLogger(__name__)
+
+
+def _flush_predictor(ref: "weakref.ref") -> bool:
+    """Flush a predictor through a weak reference; False once it is gone."""
+    predictor = ref()
+    if predictor is None:
+        return False
+    predictor.flush()
+    return True
 
 
 class ShoppingStrategy(Enum):
@@ -26,7 +66,21 @@ class ValuePriority(Enum):
     QUALITY = "quality"     # Prefer quality stores
 
 
-@dataclass
+# One StoreOption per record, for ingesting many stores as a single array.
+# Names stay Python strings so nothing is truncated
+STORE_DTYPE = np.dtype([
+    ('id', 'O'),
+    ('name', 'O'),
+    ('distance', 'f8'),
+    ('items', 'i4'),
+    ('price', 'f8'),
+    ('travel', 'f8'),
+    ('shop', 'f8'),
+    ('deal', 'f8'),
+])
+
+
+@dataclass(slots=True)
 class StoreOption:
     """A store option for comparison."""
     store_id: str
@@ -38,8 +92,30 @@ class StoreOption:
     shopping_time_minutes: float
     deal_quality: float = 0.5  # 0-1 rating of deals
 
+    def to_record(self) -> np.void:
+        """This option as a STORE_DTYPE record."""
+        return np.array((
+            self.store_id, self.store_name, self.distance_miles, self.items_available,
+            self.total_price, self.travel_time_minutes, self.shopping_time_minutes,
+            self.deal_quality,
+        ), dtype=STORE_DTYPE)[()]
+
+    @classmethod
+    def from_record(cls, record: np.void) -> 'StoreOption':
+        """Rebuild an option from a STORE_DTYPE record."""
+        return cls(
+            store_id=record['id'],
+            store_name=record['name'],
+            distance_miles=float(record['distance']),
+            items_available=int(record['items']),
+            total_price=float(record['price']),
+            travel_time_minutes=float(record['travel']),
+            shopping_time_minutes=float(record['shop']),
+            deal_quality=float(record['deal']),
+        )
+
 
-@dataclass
+@dataclass(slots=True)
 class ShoppingTrip:
     """A potential shopping trip."""
     stores: List[StoreOption]
@@ -50,7 +126,7 @@ class ShoppingTrip:
     strategy: ShoppingStrategy
 
 
-@dataclass
+@dataclass(slots=True)
 class SavingsAnalysis:
     """Analysis of savings vs time trade-off."""
     gross_savings: float        # Raw price difference
@@ -61,11 +137,32 @@ class SavingsAnalysis:
     recommendation: str
     worth_it: bool
     confidence: float
-    breakdown: Dict[str, float]
+    breakdown: Dict[str, float]  # Unrounded; see as_display()
     factors: List[str]
 
+    # Decimal places shown for computed breakdown entries; the prices and
+    # times passed in are shown as given
+    DISPLAY_DIGITS = {
+        'single_store_gas': 2,
+        'multi_store_gas': 2,
+        'gross_savings': 2,
+        'gas_cost_difference': 2,
+        'net_savings': 2,
+        'extra_time_minutes': 1,
+        'time_cost': 2,
+        'effective_savings': 2,
+        'hourly_savings_rate': 2,
+    }
+
+    def as_display(self) -> Dict[str, float]:
+        """Breakdown with computed values rounded for display."""
+        return {
+            k: round(v, self.DISPLAY_DIGITS[k]) if k in self.DISPLAY_DIGITS else v
+            for k, v in self.breakdown.items()
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class WorthItRecommendation:
     """Recommendation for whether multi-store shopping is worth it."""
     recommended_strategy: ShoppingStrategy
@@ -77,7 +174,18 @@ class WorthItRecommendation:
     alternatives: List[Dict[str, Any]]
 
 
-@dataclass
+class AltOption(NamedTuple):
+    """A strategy weighed by recommend_strategy; a dict in WorthItRecommendation."""
+    strategy: ShoppingStrategy
+    stores: List[str]
+    total_cost: float
+    savings: float
+    time: float
+    extra_time: float
+    efficiency: float
+
+
+@dataclass(slots=True)
 class HistoricalTrip:
     """Historical shopping trip data."""
     trip_id: str
@@ -90,6 +198,82 @@ class HistoricalTrip:
     timestamp: datetime = field(default_factory=datetime.now)
 
 
+# Factor lines for SavingsAnalysis.factors
+_PRICE_FACTOR = "{} price savings: ${:.2f}"
+_GAS_FACTOR = "Extra gas cost: ${:.2f}"
+_TIME_FACTOR = "{}: {:.0f} minutes"
+
+
+@lru_cache(maxsize=256)
+def _recommendation_for(bucket: Tuple[bool, ...]) -> str:
+    """
+    Recommendation template for a decision bucket.
+
+    bucket is (worth_it, net_savings < 0, extra_time > 60, hourly_rate below
+    the minimum rate, hourly_rate > 50, hourly_rate > 30); the template is
+    filled with net_savings, extra_time and hourly_rate.
+    """
+    worth_it, losing_money, long_trip, low_rate, excellent_rate, good_rate = bucket
+
+    if not worth_it:
+        if losing_money:
+            return "Single store is cheaper - skip multi-store trip"
+        elif long_trip:
+            return "Time investment too high - {extra_time:.0f} min for ${net_savings:.2f}"
+        elif low_rate:
+            return "Low efficiency - ${hourly_rate:.2f}/hr saved, not worth the extra time"
+        else:
+            return "Marginal savings - single store recommended"
+
+    # Worth it cases
+    if excellent_rate:
+        return "Excellent value! Save ${net_savings:.2f} in {extra_time:.0f} extra minutes"
+    elif good_rate:
+        return "Good value - ${hourly_rate:.2f}/hr effective savings rate"
+    else:
+        return "Worth considering - saves ${net_savings:.2f} with {extra_time:.0f} min investment"
+
+
+@lru_cache(maxsize=256)
+def _reasoning_for(bucket: Tuple[Any, ...]) -> Tuple[str, ...]:
+    """
+    Strategy reasoning templates for a decision bucket.
+
+    bucket is (strategy, no savings, efficiency > 30, efficiency above the
+    minimum rate, priority); the templates are filled with store_name,
+    savings, extra_time and efficiency.
+    """
+    strategy, no_savings, excellent_rate, efficient, priority = bucket
+    reasoning = []
+
+    if strategy == ShoppingStrategy.SINGLE_STORE:
+        reasoning.append("Single store at {store_name} is most efficient")
+        if no_savings:
+            reasoning.append("Multi-store options don't offer meaningful savings")
+        else:
+            reasoning.append("Time investment outweighs ${savings:.2f} savings")
+
+    elif strategy == ShoppingStrategy.TWO_STORES:
+        reasoning.append("Two-store trip saves ${savings:.2f}")
+        reasoning.append("Extra {extra_time:.0f} minutes yields ${efficiency:.2f}/hr rate")
+        if excellent_rate:
+            reasoning.append("Excellent efficiency - worth the extra time")
+
+    else:  # MULTI_STORE
+        reasoning.append("Three-store trip maximizes savings: ${savings:.2f}")
+        reasoning.append("Requires {extra_time:.0f} extra minutes")
+        if efficient:
+            reasoning.append("Still efficient at ${efficiency:.2f}/hr")
+
+    # Add priority context
+    if priority is ValuePriority.TIME:
+        reasoning.append("Optimized for time (your preference)")
+    elif priority is ValuePriority.MONEY:
+        reasoning.append("Optimized for maximum savings (your preference)")
+
+    return tuple(reasoning)
+
+
 class SavingsPredictor:
     """
     ML model to predict savings value and recommend shopping strategy.
@@ -111,6 +295,40 @@ class SavingsPredictor:
     MIN_WORTHWHILE_SAVINGS = 5.0   # Minimum savings to consider
     MIN_HOURLY_RATE = 15.0         # Minimum $ saved per hour
 
+    # Factor buckets: gross savings over $10 / $20, extra time over 0 / 30 min
+    SAVINGS_LEVEL_BINS = np.array([10.0, 20.0])
+    SAVINGS_LEVELS = np.array(["Limited", "Moderate", "Strong"])
+    TIME_LEVEL_BINS = np.array([0.0, 30.0])
+    TIME_LEVELS = np.array(["", "Additional time", "Significant time investment"])
+
+    # Logged trips kept for training, oldest overwritten first. Savings are
+    # float16 (about 3 significant digits, enough for the 30% accuracy band)
+    # and widened to float32 only to divide
+    TRIP_HISTORY_SIZE = 1000
+    TRIP_DTYPE = np.dtype([
+        ('planned', 'f2'),
+        ('actual', 'f2'),
+        ('satisfaction', 'i1'),
+        ('timestamp', 'u4'),  # Whole Unix seconds
+    ])
+
+    # Seconds between background checks for unsaved model state
+    FLUSH_INTERVAL = 2.0
+
+    # Splitting the shop across n stores: share of the basket bought at each,
+    # share of each store's travel time on the route, and miles driven per
+    # store distance (a round trip to the first, one leg to the rest)
+    WEIGHTS = {2: np.array([0.6, 0.4]), 3: np.array([0.45, 0.35, 0.20])}
+    TIME_FACTORS = {2: np.array([1.0, 0.5]), 3: np.array([1.0, 0.4, 0.4])}
+    DISTANCE_FACTORS = {2: np.array([2.0, 1.0]), 3: np.array([2.0, 1.0, 1.0])}
+    SPLIT_STRATEGIES = {2: ShoppingStrategy.TWO_STORES, 3: ShoppingStrategy.MULTI_STORE}
+
+    # Metric columns returned by predict_savings_batch
+    BATCH_COLUMNS = (
+        'gross_savings', 'net_savings', 'time_cost', 'effective_savings',
+        'hourly_savings_rate', 'extra_time_minutes', 'multi_store_gas', 'single_store_gas',
+    )
+
     def __init__(
         self,
         model_path: Optional[Path] = None,
@@ -123,31 +341,97 @@ class SavingsPredictor:
         self.gas_price = gas_price
         self.mpg = mpg
         self.hourly_value = hourly_value
-        self.historical_trips: List[HistoricalTrip] = []
+        self._gas_per_mile = float(gas_price / mpg)
+        # Ring buffer of trip columns; _head is the next slot to write and
+        # _count the number of trips ever recorded
+        self._trips_ring = np.zeros(self.TRIP_HISTORY_SIZE, dtype=self.TRIP_DTYPE)
+        self._head = 0
+        self._count = 0
+        # Stores from satisfying logged trips, learned at the next training
+        self._pending_stores: Set[str] = set()
         self.savings_accuracy: float = 0.85  # Historical accuracy of predictions
         self.user_preferences: Dict[str, Any] = {}
+        # Stores from satisfying trips; stored under user_preferences['visited_stores']
+        self._visited_stores: Set[str] = set()
+        # Training marks the state dirty; a daemon thread started on first
+        # use writes it out at most once per FLUSH_INTERVAL
+        self._dirty = False
+        self._state_lock = threading.Lock()
+        # Held across snapshot, write and swap, so saves land in order
+        self._write_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
         self._load_model()
 
     def _load_model(self) -> None:
         """Load trained model."""
         if self.model_path and self.model_path.exists():
             try:
-                with open(self.model_path, 'r') as f:
-                    data = json.load(f)
-                    self.savings_accuracy = data.get('savings_accuracy', 0.85)
-                    self.user_preferences = data.get('user_preferences', {})
+                with open(self.model_path, 'rb') as f:
+                    raw = f.read()
+                data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+                self.savings_accuracy = data.get('savings_accuracy', 0.85)
+                self.user_preferences = data.get('user_preferences', {})
+                self._visited_stores = set(
+                    self.user_preferences.pop('visited_stores', [])
+                )
             except (json.JSONDecodeError, IOError):
                 pass
 
     def save_model(self) -> None:
-        """Save model state."""
+        """Save model state as compact JSON (orjson when installed)."""
         if self.model_path:
-            self.model_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.model_path, 'w') as f:
-                json.dump({
-                    'savings_accuracy': self.savings_accuracy,
-                    'user_preferences': self.user_preferences,
-                }, f, indent=2)
+            with self._write_lock:
+                with self._state_lock:
+                    state = {
+                        'savings_accuracy': self.savings_accuracy,
+                        'user_preferences': self._preferences_dict(),
+                    }
+                    self._dirty = False
+                # Write beside the model and swap it in, so readers never see a
+                # partial file
+                try:
+                    if ORJSON_AVAILABLE:
+                        raw = orjson.dumps(state)
+                    else:
+                        raw = json.dumps(state, separators=(',', ':')).encode()
+                    self.model_path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = self.model_path.with_suffix('.tmp')
+                    with open(tmp_path, 'wb') as f:
+                        f.write(raw)
+                    os.replace(tmp_path, self.model_path)
+                except Exception:
+                    # Not saved, so leave the state for the next flush
+                    self._dirty = True
+                    raise
+
+    def flush(self) -> None:
+        """Save model state now if it changed since the last save."""
+        if self._dirty:
+            self.save_model()
+
+    def _mark_dirty(self) -> None:
+        """Flag model state for the background flusher, starting it if needed."""
+        self._dirty = True
+        if self.model_path and self._flusher is None:
+            ref = weakref.ref(self)
+            interval = self.FLUSH_INTERVAL
+
+            def run() -> None:
+                # Holds only a weak reference, so the thread ends with the predictor
+                while True:
+                    time.sleep(interval)
+                    try:
+                        if not _flush_predictor(ref):
+                            return
+                    except Exception:
+                        # Keep flushing; the state stays dirty for the next try
+                        logger.exception("Could not save savings model")
+
+            self._flusher = threading.Thread(
+                target=run, name='savings-predictor-flush', daemon=True
+            )
+            self._flusher.start()
+            atexit.register(_flush_predictor, ref)
 
     def predict_savings(
         self,
@@ -166,86 +450,64 @@ class SavingsPredictor:
         Returns:
             Detailed savings analysis
         """
-        breakdown = {}
         factors = []
 
-        # Calculate single store costs
+        # Savings arithmetic runs in one compiled kernel
         single_total = single_store_option.total_price
-        single_gas = self._calculate_gas_cost(single_store_option.distance_miles * 2)
         single_time = (
             single_store_option.travel_time_minutes +
             single_store_option.shopping_time_minutes
         )
-        single_all_in = single_total + single_gas
-
-        breakdown['single_store_price'] = single_total
-        breakdown['single_store_gas'] = round(single_gas, 2)
-        breakdown['single_store_time'] = single_time
-
-        # Calculate multi-store costs
         multi_total = multi_store_trip.total_cost
-        multi_gas = self._calculate_gas_cost(multi_store_trip.total_distance_miles)
         multi_time = multi_store_trip.total_time_minutes
-        multi_all_in = multi_total + multi_gas
-
-        breakdown['multi_store_price'] = multi_total
-        breakdown['multi_store_gas'] = round(multi_gas, 2)
-        breakdown['multi_store_time'] = multi_time
-
-        # Calculate savings
-        gross_savings = single_total - multi_total
-        net_savings = single_all_in - multi_all_in
-
-        # Calculate time cost
-        extra_time = multi_time - single_time
-        time_cost = (extra_time / 60) * self.hourly_value
-
-        # Effective savings
-        effective_savings = net_savings - time_cost
-
-        breakdown['gross_savings'] = round(gross_savings, 2)
-        breakdown['gas_cost_difference'] = round(single_gas - multi_gas, 2)
-        breakdown['net_savings'] = round(net_savings, 2)
-        breakdown['extra_time_minutes'] = round(extra_time, 1)
-        breakdown['time_cost'] = round(time_cost, 2)
-        breakdown['effective_savings'] = round(effective_savings, 2)
-
-        # Calculate hourly rate
-        if extra_time > 0:
-            hourly_rate = (net_savings / extra_time) * 60
-        else:
-            hourly_rate = float('inf') if net_savings > 0 else 0
-
-        breakdown['hourly_savings_rate'] = round(hourly_rate, 2)
+        (
+            gross_savings, net_savings, time_cost, effective_savings,
+            hourly_rate, extra_time, multi_gas, single_gas,
+        ) = predict_savings_core(
+            float(single_total),
+            float(single_store_option.distance_miles),
+            float(single_store_option.travel_time_minutes),
+            float(single_store_option.shopping_time_minutes),
+            float(multi_total),
+            float(multi_store_trip.total_distance_miles),
+            float(multi_time),
+            self._gas_per_mile,
+            float(self.hourly_value),
+        )
 
         # Generate factors
         if gross_savings > 20:
-            factors.append(f"Strong price savings: ${gross_savings:.2f}")
+            level = "Strong"
         elif gross_savings > 10:
-            factors.append(f"Moderate price savings: ${gross_savings:.2f}")
+            level = "Moderate"
         else:
-            factors.append(f"Limited price savings: ${gross_savings:.2f}")
+            level = "Limited"
+        factors.append(_PRICE_FACTOR.format(level, gross_savings))
 
         if multi_gas > single_gas:
-            factors.append(f"Extra gas cost: ${multi_gas - single_gas:.2f}")
+            factors.append(_GAS_FACTOR.format(multi_gas - single_gas))
 
         if extra_time > 30:
-            factors.append(f"Significant time investment: {extra_time:.0f} minutes")
+            factors.append(_TIME_FACTOR.format("Significant time investment", extra_time))
         elif extra_time > 0:
-            factors.append(f"Additional time: {extra_time:.0f} minutes")
+            factors.append(_TIME_FACTOR.format("Additional time", extra_time))
 
-        # Determine if worth it based on priority
-        worth_it = self._determine_worth_it(
-            net_savings, extra_time, hourly_rate, value_priority
-        )
+        if net_savings < 0:
+            # Losing money is never worth it, whatever the priority, and the
+            # recommendation has no numbers to fill in
+            worth_it = False
+            recommendation = _recommendation_for((False, True, False, False, False, False))
+        else:
+            # Determine if worth it based on priority
+            worth_it = self._determine_worth_it(
+                net_savings, extra_time, hourly_rate, value_priority
+            )
 
-        # Generate recommendation
-        recommendation = self._generate_recommendation(
-            net_savings, extra_time, hourly_rate, worth_it, value_priority
-        )
+            # Generate recommendation
+            recommendation = self._generate_recommendation(
+                net_savings, extra_time, hourly_rate, worth_it, value_priority
+            )
 
-        # Apply historical accuracy adjustment
-        adjusted_savings = net_savings * self.savings_accuracy
         confidence = self._calculate_confidence(multi_store_trip, single_store_option)
 
         return SavingsAnalysis(
@@ -257,14 +519,110 @@ class SavingsPredictor:
             recommendation=recommendation,
             worth_it=worth_it,
             confidence=confidence,
-            breakdown=breakdown,
+            breakdown={
+                'single_store_price': single_total,
+                'single_store_gas': single_gas,
+                'single_store_time': single_time,
+                'multi_store_price': multi_total,
+                'multi_store_gas': multi_gas,
+                'multi_store_time': multi_time,
+                'gross_savings': gross_savings,
+                'gas_cost_difference': single_gas - multi_gas,
+                'net_savings': net_savings,
+                'extra_time_minutes': extra_time,
+                'time_cost': time_cost,
+                'effective_savings': effective_savings,
+                'hourly_savings_rate': hourly_rate,
+            },
             factors=factors,
         )
 
+    def predict_savings_batch(
+        self,
+        multi_trips: Dict[str, np.ndarray],
+        single_options: Dict[str, np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Savings metrics for many comparisons at once (e.g. sampled prices).
+
+        Row i compares multi-store trip i with single-store option i, using
+        the same arithmetic as predict_savings, unrounded.
+
+        Args:
+            multi_trips: 'price', 'time' and 'distance' columns, as built by
+                _trips_to_arrays
+            single_options: 'price', 'travel', 'shop' and 'distance' columns,
+                as built by _stores_to_arrays
+
+        Returns:
+            (metrics, savings_levels, time_levels): (N, 8) metrics in
+            BATCH_COLUMNS order, plus each row's SAVINGS_LEVELS and
+            TIME_LEVELS label ("" when there is no extra time)
+        """
+        single_gas = single_options['distance'] * 2 * self._gas_per_mile
+        multi_gas = multi_trips['distance'] * self._gas_per_mile
+
+        gross = single_options['price'] - multi_trips['price']
+        net = (single_options['price'] + single_gas) - (multi_trips['price'] + multi_gas)
+
+        extra_time = multi_trips['time'] - (single_options['travel'] + single_options['shop'])
+        time_cost = (extra_time / 60) * self.hourly_value
+        effective = net - time_cost
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hourly_rate = np.where(
+                extra_time > 0,
+                (net / extra_time) * 60,
+                np.where(net > 0, np.inf, 0.0),
+            )
+
+        metrics = np.column_stack((
+            gross, net, time_cost, effective, hourly_rate, extra_time, multi_gas, single_gas,
+        ))
+
+        # Bucket indices pick the factor labels without per-row branches
+        savings_levels = self.SAVINGS_LEVELS[
+            np.digitize(gross, self.SAVINGS_LEVEL_BINS, right=True)
+        ]
+        time_levels = self.TIME_LEVELS[
+            np.digitize(extra_time, self.TIME_LEVEL_BINS, right=True)
+        ]
+
+        return metrics, savings_levels, time_levels
+
+    def predict_gas_scenarios(
+        self,
+        multi_store_trip: ShoppingTrip,
+        single_store_option: StoreOption,
+        gas_prices: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Savings metrics for one comparison across many gas prices.
+
+        Args:
+            multi_store_trip: Planned multi-store trip
+            single_store_option: Single store alternative
+            gas_prices: Gas prices in $ per gallon to try, e.g. sampled
+
+        Returns:
+            (P, 8) unrounded metrics in BATCH_COLUMNS order, one row per price
+        """
+        return gas_price_scenarios(
+            np.ascontiguousarray(gas_prices, dtype=np.float64),
+            float(self.mpg),
+            float(single_store_option.total_price),
+            float(single_store_option.distance_miles),
+            float(single_store_option.travel_time_minutes),
+            float(single_store_option.shopping_time_minutes),
+            float(multi_store_trip.total_cost),
+            float(multi_store_trip.total_distance_miles),
+            float(multi_store_trip.total_time_minutes),
+            float(self.hourly_value),
+        )
+
     def _calculate_gas_cost(self, miles: float) -> float:
         """Calculate gas cost for a given distance."""
-        gallons = miles / self.mpg
-        return gallons * self.gas_price
+        return miles * self._gas_per_mile
 
     def _determine_worth_it(
         self,
@@ -274,15 +632,15 @@ class SavingsPredictor:
         priority: ValuePriority
     ) -> bool:
         """Determine if the multi-store trip is worth it."""
-        if priority == ValuePriority.TIME:
+        if priority is ValuePriority.TIME:
             # Only worth it if massive savings with minimal time
             return net_savings > 30 and extra_time < 20
 
-        elif priority == ValuePriority.MONEY:
+        elif priority is ValuePriority.MONEY:
             # Worth it if any positive savings
             return net_savings > self.MIN_WORTHWHILE_SAVINGS
 
-        elif priority == ValuePriority.QUALITY:
+        elif priority is ValuePriority.QUALITY:
             # Usually prefer single store
             return net_savings > 50
 
@@ -301,23 +659,18 @@ class SavingsPredictor:
         priority: ValuePriority
     ) -> str:
         """Generate human-readable recommendation."""
-        if not worth_it:
-            if net_savings < 0:
-                return "Single store is cheaper - skip multi-store trip"
-            elif extra_time > 60:
-                return f"Time investment too high - {extra_time:.0f} min for ${net_savings:.2f}"
-            elif hourly_rate < self.MIN_HOURLY_RATE:
-                return f"Low efficiency - ${hourly_rate:.2f}/hr saved, not worth the extra time"
-            else:
-                return "Marginal savings - single store recommended"
-
-        # Worth it cases
-        if hourly_rate > 50:
-            return f"Excellent value! Save ${net_savings:.2f} in {extra_time:.0f} extra minutes"
-        elif hourly_rate > 30:
-            return f"Good value - ${hourly_rate:.2f}/hr effective savings rate"
-        else:
-            return f"Worth considering - saves ${net_savings:.2f} with {extra_time:.0f} min investment"
+        # Templates are cached per decision; only the numbers are formatted here
+        template = _recommendation_for((
+            worth_it,
+            net_savings < 0,
+            extra_time > 60,
+            hourly_rate < self.MIN_HOURLY_RATE,
+            hourly_rate > 50,
+            hourly_rate > 30,
+        ))
+        return template.format(
+            net_savings=net_savings, extra_time=extra_time, hourly_rate=hourly_rate
+        )
 
     def _calculate_confidence(
         self,
@@ -328,12 +681,12 @@ class SavingsPredictor:
         base_confidence = 0.7
 
         # Higher confidence with historical data
-        data_bonus = min(0.15, len(self.historical_trips) * 0.01)
+        data_bonus = min(0.15, self._count * 0.01)
 
         # Higher confidence for known stores
         known_stores = sum(
             1 for s in multi_trip.stores
-            if s.store_id in self.user_preferences.get('visited_stores', [])
+            if s.store_id in self._visited_stores
         )
         store_bonus = min(0.1, known_stores * 0.03)
 
@@ -341,7 +694,7 @@ class SavingsPredictor:
 
     def recommend_strategy(
         self,
-        stores: List[StoreOption],
+        stores: Union[List[StoreOption], np.ndarray],
         total_items: int,
         value_priority: ValuePriority = ValuePriority.BALANCED,
         max_stores: int = 3
@@ -350,7 +703,9 @@ class SavingsPredictor:
         Recommend optimal shopping strategy.
 
         Args:
-            stores: Available store options sorted by total price
+            stores: Available store options, or a STORE_DTYPE array of them
+                (e.g. built once with StoreOption.to_record) to skip
+                per-store attribute access
             total_items: Total items to purchase
             value_priority: User's value priority
             max_stores: Maximum stores to consider
@@ -358,7 +713,7 @@ class SavingsPredictor:
         Returns:
             Strategy recommendation
         """
-        if not stores:
+        if len(stores) == 0:
             return WorthItRecommendation(
                 recommended_strategy=ShoppingStrategy.SINGLE_STORE,
                 reasoning=["No stores provided"],
@@ -369,30 +724,35 @@ class SavingsPredictor:
                 alternatives=[],
             )
 
-        # Sort by price
-        sorted_stores = sorted(stores, key=lambda s: s.total_price)
+        # Only the three cheapest stores are ever combined
+        candidates = self._cheapest_stores(stores, 3)
 
         # Single store baseline (cheapest overall)
-        single_store = sorted_stores[0]
+        if isinstance(candidates, np.ndarray):
+            single_store = StoreOption.from_record(candidates[0])
+            names = candidates['name'].tolist()
+        else:
+            single_store = candidates[0]
+            names = [s.store_name for s in candidates]
         single_time = single_store.travel_time_minutes + single_store.shopping_time_minutes
         single_cost = single_store.total_price + self._calculate_gas_cost(
             single_store.distance_miles * 2
         )
 
-        # Calculate multi-store options
+        # Calculate multi-store options on the cheapest stores' columns; the
+        # kernel's plain-Python fallback takes lists just as well under PyPy
+        if PYPY and isinstance(candidates, list):
+            arrays = self._stores_to_lists(candidates)
+        else:
+            arrays = self._stores_to_arrays(candidates)
         alternatives = []
 
-        # Two-store option
-        if len(sorted_stores) >= 2:
-            two_store = self._evaluate_two_store(sorted_stores[:3], single_cost, single_time)
-            if two_store:
-                alternatives.append(two_store)
-
-        # Three-store option
-        if len(sorted_stores) >= 3 and max_stores >= 3:
-            three_store = self._evaluate_three_store(sorted_stores[:4], single_cost, single_time)
-            if three_store:
-                alternatives.append(three_store)
+        # Two-store option, then three-store if allowed
+        max_split = 3 if max_stores >= 3 else 2
+        for n in range(2, max_split + 1):
+            option = self._evaluate_n_store(arrays, names, single_cost, single_time, n)
+            if option:
+                alternatives.append(option)
 
         # Find best option
         best = self._select_best_option(
@@ -400,236 +760,231 @@ class SavingsPredictor:
         )
 
         reasoning = self._generate_strategy_reasoning(
-            best['strategy'], best, single_store, value_priority
+            best.strategy, best, single_store, value_priority
         )
 
         # Calculate break-even hourly rate
-        if best['extra_time'] > 0:
-            break_even = (best['savings'] / best['extra_time']) * 60
+        if best.extra_time > 0:
+            break_even = (best.savings / best.extra_time) * 60
         else:
             break_even = 0
 
         return WorthItRecommendation(
-            recommended_strategy=best['strategy'],
+            recommended_strategy=best.strategy,
             reasoning=reasoning,
-            time_investment=best['extra_time'],
-            money_saved=best['savings'],
-            efficiency_score=best['efficiency'],
+            time_investment=best.extra_time,
+            money_saved=best.savings,
+            efficiency_score=best.efficiency,
             break_even_hourly=round(break_even, 2),
-            alternatives=[a for a in alternatives if a['strategy'] != best['strategy']],
+            alternatives=[a._asdict() for a in alternatives if a.strategy != best.strategy],
         )
 
-    def _evaluate_two_store(
+    def _cheapest_stores(
         self,
-        stores: List[StoreOption],
-        single_cost: float,
-        single_time: float
-    ) -> Optional[Dict[str, Any]]:
-        """Evaluate two-store shopping option."""
-        if len(stores) < 2:
-            return None
+        stores: Union[List[StoreOption], np.ndarray],
+        k: int
+    ) -> Union[List[StoreOption], np.ndarray]:
+        """
+        Pick the k cheapest stores in price order without sorting them all.
 
-        # Assume splitting items between best deal stores
-        store1, store2 = stores[0], stores[1]
+        Ties keep their input order, exactly as sorted(...)[:k] would.
+        STORE_DTYPE arrays come back as arrays, lists as lists.
+        """
+        if PYPY and not isinstance(stores, np.ndarray):
+            return sorted(stores, key=attrgetter('total_price'))[:k]
 
-        # Estimate combined cost (weighted average, assuming deals)
-        combined_cost = (store1.total_price * 0.6) + (store2.total_price * 0.4)
+        if isinstance(stores, np.ndarray):
+            prices = stores['price']
+        else:
+            prices = np.fromiter(
+                (s.total_price for s in stores), dtype=np.float64, count=len(stores)
+            )
+        if len(prices) > k:
+            # Everything up to the k-th lowest price, in input order
+            kth_price = np.partition(prices, k - 1)[k - 1]
+            idx = np.flatnonzero(prices <= kth_price)
+        else:
+            idx = np.arange(len(prices))
 
-        # Calculate time and gas
-        combined_time = (
-            store1.travel_time_minutes + store1.shopping_time_minutes +
-            store2.travel_time_minutes * 0.5 + store2.shopping_time_minutes
-        )
-        combined_distance = store1.distance_miles * 2 + store2.distance_miles
-        combined_gas = self._calculate_gas_cost(combined_distance)
+        idx = idx[np.argsort(prices[idx], kind='stable')][:k]
+        if isinstance(stores, np.ndarray):
+            return stores[idx]
+        return [stores[i] for i in idx]
 
-        total_two_store = combined_cost + combined_gas
-        savings = single_cost - total_two_store
-        extra_time = combined_time - single_time
+    def _stores_to_arrays(
+        self,
+        stores: Union[List[StoreOption], np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """Lay store options out as float64 columns (price, travel, shop, distance)."""
+        if isinstance(stores, np.ndarray):
+            return {k: stores[k] for k in ('price', 'travel', 'shop', 'distance')}
+        return {
+            'price': np.array([s.total_price for s in stores], dtype=np.float64),
+            'travel': np.array([s.travel_time_minutes for s in stores], dtype=np.float64),
+            'shop': np.array([s.shopping_time_minutes for s in stores], dtype=np.float64),
+            'distance': np.array([s.distance_miles for s in stores], dtype=np.float64),
+        }
 
-        efficiency = (savings / extra_time * 60) if extra_time > 0 else 0
+    def _stores_to_lists(self, stores: List[StoreOption]) -> Dict[str, List[float]]:
+        """The _stores_to_arrays columns as plain lists, for PyPy."""
+        return {
+            'price': [float(s.total_price) for s in stores],
+            'travel': [float(s.travel_time_minutes) for s in stores],
+            'shop': [float(s.shopping_time_minutes) for s in stores],
+            'distance': [float(s.distance_miles) for s in stores],
+        }
 
+    def _trips_to_arrays(self, trips: List[ShoppingTrip]) -> Dict[str, np.ndarray]:
+        """Lay shopping trips out as float64 columns (price, time, distance)."""
         return {
-            'strategy': ShoppingStrategy.TWO_STORES,
-            'stores': [store1.store_name, store2.store_name],
-            'total_cost': round(total_two_store, 2),
-            'savings': round(savings, 2),
-            'time': round(combined_time, 0),
-            'extra_time': round(extra_time, 0),
-            'efficiency': round(efficiency, 2),
+            'price': np.array([t.total_cost for t in trips], dtype=np.float64),
+            'time': np.array([t.total_time_minutes for t in trips], dtype=np.float64),
+            'distance': np.array([t.total_distance_miles for t in trips], dtype=np.float64),
         }
 
-    def _evaluate_three_store(
+    def _evaluate_n_store(
         self,
-        stores: List[StoreOption],
+        arrays: Dict[str, np.ndarray],
+        names: List[str],
         single_cost: float,
-        single_time: float
-    ) -> Optional[Dict[str, Any]]:
-        """Evaluate three-store shopping option."""
-        if len(stores) < 3:
+        single_time: float,
+        n: int,
+    ) -> Optional[AltOption]:
+        """Evaluate splitting the shop across the first n stores' columns."""
+        if len(names) < n:
             return None
 
-        store1, store2, store3 = stores[0], stores[1], stores[2]
-
-        # Estimate combined cost
-        combined_cost = (
-            store1.total_price * 0.45 +
-            store2.total_price * 0.35 +
-            store3.total_price * 0.20
-        )
-
-        # Calculate time and gas
-        combined_time = (
-            store1.travel_time_minutes + store1.shopping_time_minutes +
-            store2.travel_time_minutes * 0.4 + store2.shopping_time_minutes +
-            store3.travel_time_minutes * 0.4 + store3.shopping_time_minutes
+        # Assume splitting items between best deal stores (weighted average)
+        result = evaluate_n_store(
+            arrays['price'][:n],
+            arrays['travel'][:n],
+            arrays['shop'][:n],
+            arrays['distance'][:n],
+            self.WEIGHTS[n],
+            self.TIME_FACTORS[n],
+            self.DISTANCE_FACTORS[n],
+            self._gas_per_mile,
+            float(single_cost),
+            float(single_time),
         )
-        combined_distance = (
-            store1.distance_miles * 2 +
-            store2.distance_miles +
-            store3.distance_miles
+        # Plain floats, so round() matches the scalar arithmetic
+        total_cost, combined_time, savings, extra_time, efficiency = map(float, result)
+
+        return AltOption(
+            strategy=self.SPLIT_STRATEGIES[n],
+            stores=names[:n],
+            total_cost=round(total_cost, 2),
+            savings=round(savings, 2),
+            time=round(combined_time, 0),
+            extra_time=round(extra_time, 0),
+            efficiency=round(efficiency, 2),
         )
-        combined_gas = self._calculate_gas_cost(combined_distance)
-
-        total_three_store = combined_cost + combined_gas
-        savings = single_cost - total_three_store
-        extra_time = combined_time - single_time
-
-        efficiency = (savings / extra_time * 60) if extra_time > 0 else 0
-
-        return {
-            'strategy': ShoppingStrategy.MULTI_STORE,
-            'stores': [store1.store_name, store2.store_name, store3.store_name],
-            'total_cost': round(total_three_store, 2),
-            'savings': round(savings, 2),
-            'time': round(combined_time, 0),
-            'extra_time': round(extra_time, 0),
-            'efficiency': round(efficiency, 2),
-        }
 
     def _select_best_option(
         self,
         single_store: StoreOption,
-        alternatives: List[Dict[str, Any]],
+        alternatives: List[AltOption],
         priority: ValuePriority
-    ) -> Dict[str, Any]:
+    ) -> AltOption:
         """Select best option based on priority."""
-        single_option = {
-            'strategy': ShoppingStrategy.SINGLE_STORE,
-            'stores': [single_store.store_name],
-            'total_cost': single_store.total_price,
-            'savings': 0,
-            'time': single_store.travel_time_minutes + single_store.shopping_time_minutes,
-            'extra_time': 0,
-            'efficiency': 0,
-        }
-
-        if not alternatives:
-            return single_option
-
         # Filter worthwhile alternatives
         worthwhile = [
             a for a in alternatives
-            if a['savings'] > self.MIN_WORTHWHILE_SAVINGS
+            if a.savings > self.MIN_WORTHWHILE_SAVINGS
         ]
 
         if not worthwhile:
-            return single_option
+            return self._single_store_option(single_store)
 
-        # Select based on priority
-        if priority == ValuePriority.TIME:
+        # Select based on priority; only the top alternative matters
+        best_alt = None
+        if priority is ValuePriority.TIME:
             # Prefer least time increase with good savings
-            worthwhile.sort(key=lambda x: (x['extra_time'], -x['savings']))
-            best_alt = worthwhile[0]
-            if best_alt['extra_time'] < 30 and best_alt['savings'] > 10:
-                return best_alt
-            return single_option
+            candidate = min(worthwhile, key=lambda x: (x.extra_time, -x.savings))
+            if candidate.extra_time < 30 and candidate.savings > 10:
+                best_alt = candidate
 
-        elif priority == ValuePriority.MONEY:
+        elif priority is ValuePriority.MONEY:
             # Prefer maximum savings
-            worthwhile.sort(key=lambda x: -x['savings'])
-            return worthwhile[0]
+            best_alt = max(worthwhile, key=attrgetter('savings'))
 
-        elif priority == ValuePriority.QUALITY:
+        elif priority is ValuePriority.QUALITY:
             # Prefer single store unless massive savings
-            worthwhile.sort(key=lambda x: -x['savings'])
-            if worthwhile[0]['savings'] > 40:
-                return worthwhile[0]
-            return single_option
+            candidate = max(worthwhile, key=attrgetter('savings'))
+            if candidate.savings > 40:
+                best_alt = candidate
 
         else:  # BALANCED
             # Use efficiency (savings per hour)
-            worthwhile.sort(key=lambda x: -x['efficiency'])
-            best_alt = worthwhile[0]
-            if best_alt['efficiency'] > self.MIN_HOURLY_RATE:
-                return best_alt
-            return single_option
+            candidate = max(worthwhile, key=attrgetter('efficiency'))
+            if candidate.efficiency > self.MIN_HOURLY_RATE:
+                best_alt = candidate
+
+        if best_alt is not None:
+            return best_alt
+        return self._single_store_option(single_store)
+
+    def _single_store_option(self, single_store: StoreOption) -> AltOption:
+        """The single-store trip in the same shape as the alternatives."""
+        return AltOption(
+            strategy=ShoppingStrategy.SINGLE_STORE,
+            stores=[single_store.store_name],
+            total_cost=single_store.total_price,
+            savings=0,
+            time=single_store.travel_time_minutes + single_store.shopping_time_minutes,
+            extra_time=0,
+            efficiency=0,
+        )
 
     def _generate_strategy_reasoning(
         self,
         strategy: ShoppingStrategy,
-        best: Dict[str, Any],
+        best: AltOption,
         single: StoreOption,
         priority: ValuePriority
     ) -> List[str]:
         """Generate reasoning for the recommendation."""
-        reasoning = []
-
-        if strategy == ShoppingStrategy.SINGLE_STORE:
-            reasoning.append(f"Single store at {single.store_name} is most efficient")
-            if best.get('savings', 0) == 0:
-                reasoning.append("Multi-store options don't offer meaningful savings")
-            else:
-                reasoning.append(f"Time investment outweighs ${best.get('savings', 0):.2f} savings")
-
-        elif strategy == ShoppingStrategy.TWO_STORES:
-            reasoning.append(f"Two-store trip saves ${best['savings']:.2f}")
-            reasoning.append(f"Extra {best['extra_time']:.0f} minutes yields ${best['efficiency']:.2f}/hr rate")
-            if best['efficiency'] > 30:
-                reasoning.append("Excellent efficiency - worth the extra time")
-
-        else:  # MULTI_STORE
-            reasoning.append(f"Three-store trip maximizes savings: ${best['savings']:.2f}")
-            reasoning.append(f"Requires {best['extra_time']:.0f} extra minutes")
-            if best['efficiency'] > self.MIN_HOURLY_RATE:
-                reasoning.append(f"Still efficient at ${best['efficiency']:.2f}/hr")
-
-        # Add priority context
-        if priority == ValuePriority.TIME:
-            reasoning.append("Optimized for time (your preference)")
-        elif priority == ValuePriority.MONEY:
-            reasoning.append("Optimized for maximum savings (your preference)")
-
-        return reasoning
+        savings = best.savings
+        efficiency = best.efficiency
+        templates = _reasoning_for((
+            strategy,
+            savings == 0,
+            efficiency > 30,
+            efficiency > self.MIN_HOURLY_RATE,
+            priority,
+        ))
+        return [
+            t.format(
+                store_name=single.store_name,
+                savings=savings,
+                extra_time=best.extra_time,
+                efficiency=efficiency,
+            )
+            for t in templates
+        ]
 
     def train(self, trips: List[HistoricalTrip]) -> Dict[str, Any]:
         """Train model on historical trip data."""
-        self.historical_trips.extend(trips)
+        for trip in trips:
+            self._record_trip(trip)
 
         if len(trips) < 3:
             return {"status": "insufficient_data", "trips": len(trips)}
 
         # Calculate actual vs predicted accuracy
-        accurate_predictions = 0
-        for trip in trips:
-            if trip.planned_savings > 0:
-                accuracy = trip.actual_savings / trip.planned_savings
-                if 0.7 < accuracy < 1.3:  # Within 30%
-                    accurate_predictions += 1
-
-        if trips:
-            self.savings_accuracy = accurate_predictions / len(trips)
+        n = len(trips)
+        planned = np.fromiter((t.planned_savings for t in trips), dtype=np.float64, count=n)
+        actual = np.fromiter((t.actual_savings for t in trips), dtype=np.float64, count=n)
+        self.savings_accuracy = self._prediction_accuracy(planned, actual)
 
         # Learn store preferences from satisfaction
-        for trip in trips:
-            if trip.satisfaction >= 4:
-                for store_id in trip.stores_visited:
-                    if 'visited_stores' not in self.user_preferences:
-                        self.user_preferences['visited_stores'] = []
-                    if store_id not in self.user_preferences['visited_stores']:
-                        self.user_preferences['visited_stores'].append(store_id)
+        self._learn_stores(
+            store_id
+            for trip in trips if trip.satisfaction >= 4
+            for store_id in trip.stores_visited
+        )
 
-        self.save_model()
+        self._mark_dirty()
 
         return {
             "status": "trained",
@@ -639,10 +994,60 @@ class SavingsPredictor:
 
     def log_trip(self, trip: HistoricalTrip) -> None:
         """Log a completed trip for learning."""
-        self.historical_trips.append(trip)
-
-        if len(self.historical_trips) % 5 == 0:
-            self.train(self.historical_trips[-10:])
+        self._record_trip(trip)
+        if trip.satisfaction >= 4:
+            self._pending_stores.update(trip.stores_visited)
+
+        # Every 5 trips, retrain on the last 10
+        if self._count % 5 == 0:
+            recent = self._recent_trips(10)
+            self.savings_accuracy = self._prediction_accuracy(
+                recent['planned'], recent['actual']
+            )
+            self._learn_stores(self._pending_stores)
+            self._pending_stores = set()
+            self._mark_dirty()
+
+    def _record_trip(self, trip: HistoricalTrip) -> None:
+        """Write a trip into the ring buffer, overwriting the oldest when full."""
+        self._trips_ring[self._head] = (
+            trip.planned_savings,
+            trip.actual_savings,
+            trip.satisfaction,
+            int(trip.timestamp.timestamp()),
+        )
+        self._head = (self._head + 1) % self.TRIP_HISTORY_SIZE
+        self._count += 1
+
+    def _recent_trips(self, n: int) -> np.ndarray:
+        """The last n recorded trips (fewer if not yet logged), oldest first."""
+        n = min(n, self._count, self.TRIP_HISTORY_SIZE)
+        return self._trips_ring[(self._head - n + np.arange(n)) % self.TRIP_HISTORY_SIZE]
+
+    def _prediction_accuracy(self, planned: np.ndarray, actual: np.ndarray) -> float:
+        """Share of trips whose actual savings landed within 30% of the plan."""
+        if not len(planned):
+            return self.savings_accuracy
+
+        # Trips without planned savings count as inaccurate
+        planned = planned.astype(np.float32)
+        actual = actual.astype(np.float32)
+        has_plan = planned > 0
+        ratio = np.divide(actual, planned, out=np.zeros_like(actual), where=has_plan)
+        accurate = has_plan & (ratio > 0.7) & (ratio < 1.3)
+        return float(np.count_nonzero(accurate) / len(planned))
+
+    def _learn_stores(self, store_ids) -> None:
+        """Remember stores from satisfying trips as visited."""
+        store_ids = list(store_ids)
+        with self._state_lock:
+            self._visited_stores.update(store_ids)
+
+    def _preferences_dict(self) -> Dict[str, Any]:
+        """User preferences with visited stores as a sorted list, for JSON."""
+        if not self._visited_stores:
+            return dict(self.user_preferences)
+        return {**self.user_preferences, 'visited_stores': sorted(self._visited_stores)}
 
     def update_preferences(
         self,
@@ -658,6 +1063,10 @@ class SavingsPredictor:
         if hourly_value:
             self.hourly_value = hourly_value
 
+        # Gas cost per mile only changes here
+        self._gas_per_mile = float(self.gas_price / self.mpg)
+        self._mark_dirty()
+
     def quick_estimate(
         self,
         price_difference: float,
@@ -699,10 +1108,10 @@ class SavingsPredictor:
     def get_stats(self) -> Dict[str, Any]:
         """Get predictor statistics."""
         return {
-            "historical_trips": len(self.historical_trips),
+            "historical_trips": self._count,
             "savings_accuracy": self.savings_accuracy,
             "gas_price": self.gas_price,
             "mpg": self.mpg,
             "hourly_value": self.hourly_value,
-            "user_preferences": self.user_preferences,
+            "user_preferences": self._preferences_dict(),
         }
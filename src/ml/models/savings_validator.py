@@ -5,13 +5,30 @@ Compares predicted vs actual savings and learns correction factors.
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
+from enum import IntEnum
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 import json
+import sys
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-@dataclass
+from ._validator_kernels import validate_batch, weighted_correction
+
+
+class Strategy(IntEnum):
+    """Shopping strategy codes, ordered by number of stores."""
+    SINGLE_STORE = 0
+    TWO_STORE = 1
+    MULTI_STORE = 2
+
+
+@dataclass(slots=True)
 class SavingsRecord:
     """Record of a shopping trip's savings."""
     trip_id: str
@@ -27,7 +44,7 @@ class SavingsRecord:
     strategy: str  # single_store, two_store, multi_store
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """Result of savings validation."""
     accuracy: float  # actual/predicted ratio
@@ -37,7 +54,7 @@ class ValidationResult:
     factors: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class CorrectionFactor:
     """Learned correction factor for predictions."""
     factor_type: str  # store, category, time_of_day, day_of_week
@@ -47,7 +64,7 @@ class CorrectionFactor:
     confidence: float
 
 
-@dataclass
+@dataclass(slots=True)
 class ROIAnalysis:
     """ROI analysis for multi-store shopping."""
     period_start: date
@@ -87,6 +104,21 @@ class SavingsValidator:
     DEFAULT_MPG = 25
     DEFAULT_HOURLY_VALUE = 25.0
 
+    # Strategy codes in the record columns; any other strategy is -1 and
+    # counts as neither single- nor multi-store
+    STRATEGY_IDS = {s.name.lower(): s for s in Strategy}
+
+    # Starting rows of the record columns; doubled whenever they fill up
+    INITIAL_CAPACITY = 64
+
+    # Most recent accuracies kept per store for its performance stats
+    STORE_WINDOW = 256
+
+    # Correction factor keys for the fixed days, basket sizes and strategies
+    _DAY_KEYS = tuple(sys.intern(f"day:{i}") for i in range(7))
+    _BASKET_KEYS = {b: sys.intern(f"basket:{b}") for b in ("small", "medium", "large")}
+    _STRATEGY_KEYS = {s: sys.intern(f"strategy:{s}") for s in STRATEGY_IDS}
+
     def __init__(
         self,
         model_path: Optional[Path] = None,
@@ -103,11 +135,36 @@ class SavingsValidator:
         # Historical data
         self.savings_records: List[SavingsRecord] = []
         self.correction_factors: Dict[str, CorrectionFactor] = {}
+        self._store_key_cache: Dict[str, str] = {}
+
+        # The records' numeric fields as columns, row i for savings_records[i]
+        self._n_records = 0
+        self._predicted_savings_arr = np.zeros(self.INITIAL_CAPACITY)
+        self._actual_savings_arr = np.zeros(self.INITIAL_CAPACITY)
+        self._actual_time_arr = np.zeros(self.INITIAL_CAPACITY)
+        self._actual_distance_arr = np.zeros(self.INITIAL_CAPACITY)
+        self._trip_date_ord = np.zeros(self.INITIAL_CAPACITY, dtype=np.int32)
+        self._strategy_id = np.zeros(self.INITIAL_CAPACITY, dtype=np.int8)
+
+        # Rows of the records that visited each store
+        self._store_to_record_ids: Dict[str, set] = defaultdict(set)
+
+        # Record log of the last save: its path, records and bytes written
+        self._log_path: Optional[Path] = None
+        self._logged_records = 0
+        self._log_size = 0
+
+        # Per store, a ring of its last STORE_WINDOW accuracies and the number
+        # of accuracies ever written to it
+        self.store_window: Dict[str, Tuple[np.ndarray, int]] = {}
+
+        # Aggregated stats, as running [count, sum, sum of squares] of accuracy
+        self.strategy_stats: Dict[str, List[float]] = {}
+        self.day_stats: Dict[int, List[float]] = {}
 
-        # Aggregated stats
-        self.store_accuracy: Dict[str, List[float]] = defaultdict(list)
-        self.strategy_accuracy: Dict[str, List[float]] = defaultdict(list)
-        self.day_accuracy: Dict[int, List[float]] = defaultdict(list)
+        # Performance reports, each with the _stats_version it was built at
+        self._stats_version = 0
+        self._cache: Dict[str, Tuple[int, Any]] = {}
 
         # Overall metrics
         self.total_predictions = 0
@@ -136,6 +193,19 @@ class SavingsValidator:
         Returns:
             ValidationResult with accuracy assessment
         """
+        self._stats_version += 1
+        return self._validate(
+            predicted_savings, actual_savings, stores, trip_date.weekday()
+        )
+
+    def _validate(
+        self,
+        predicted_savings: float,
+        actual_savings: float,
+        stores: List[str],
+        weekday: int,
+    ) -> ValidationResult:
+        """Validate a prediction for a trip on the given weekday (Monday is 0)."""
         if predicted_savings <= 0:
             return ValidationResult(
                 accuracy=0.0,
@@ -146,9 +216,9 @@ class SavingsValidator:
             )
 
         # Calculate metrics
-        accuracy = actual_savings / predicted_savings if predicted_savings > 0 else 0
+        accuracy = actual_savings / predicted_savings
         deviation = actual_savings - predicted_savings
-        deviation_percent = (deviation / predicted_savings) * 100 if predicted_savings > 0 else 0
+        deviation_percent = (deviation / predicted_savings) * 100
 
         # Determine if accurate
         is_accurate = abs(deviation_percent) <= self.ACCURATE_THRESHOLD * 100
@@ -167,10 +237,10 @@ class SavingsValidator:
 
         # Track accuracy by store
         for store in stores:
-            self.store_accuracy[store].append(accuracy)
+            self._push_store_accuracy(store, accuracy)
 
         # Track accuracy by day
-        self.day_accuracy[trip_date.weekday()].append(accuracy)
+        self._accumulate(self.day_stats, weekday, accuracy)
 
         return ValidationResult(
             accuracy=round(accuracy, 3),
@@ -180,6 +250,28 @@ class SavingsValidator:
             factors=factors,
         )
 
+    def validate_batch(
+        self,
+        predicted_savings: np.ndarray,
+        actual_savings: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Validate many predictions at once, without recording them.
+
+        Args:
+            predicted_savings: (N,) predicted savings
+            actual_savings: (N,) actual savings
+
+        Returns:
+            (accuracy, deviation, is_accurate) arrays, unrounded, matching
+            validate for each pair
+        """
+        return validate_batch(
+            np.asarray(predicted_savings, dtype=np.float64),
+            np.asarray(actual_savings, dtype=np.float64),
+            self.ACCURATE_THRESHOLD,
+        )
+
     def record_trip(self, record: SavingsRecord) -> ValidationResult:
         """
         Record a completed trip and validate predictions.
@@ -190,14 +282,57 @@ class SavingsValidator:
         Returns:
             Validation result
         """
+        result, weekday = self._ingest(record)
+        self._stats_version += 1
+
+        # Learn correction factors
+        self._learn_from_record(record, result, weekday)
+
+        return result
+
+    def record_trips(self, records: List[SavingsRecord]) -> List[ValidationResult]:
+        """
+        Record many completed trips, e.g. when replaying history.
+
+        Same as calling record_trip for each in turn, except that each
+        correction factor takes all its new samples in one update.
+
+        Args:
+            records: Complete trip records, oldest first
+
+        Returns:
+            Validation result for each record
+        """
+        # Room for every row up front rather than doubling as they arrive
+        while self._n_records + len(records) > len(self._trip_date_ord):
+            self._grow()
+
+        results = []
+        learned: Dict[str, List[float]] = {}
+        for record in records:
+            result, weekday = self._ingest(record)
+            for key in self._factor_keys(record, weekday):
+                learned.setdefault(key, []).append(result.accuracy)
+            results.append(result)
+        self._stats_version += 1
+
+        for key, accuracies in learned.items():
+            self._update_correction_factor_batch(key, accuracies)
+
+        return results
+
+    def _ingest(self, record: SavingsRecord) -> Tuple[ValidationResult, int]:
+        """Store, validate and count a trip; returns its result and weekday."""
         self.savings_records.append(record)
+        self._append_columns(record)
+        weekday = record.trip_date.weekday()
 
         # Validate savings
-        result = self.validate(
+        result = self._validate(
             record.predicted_savings,
             record.actual_savings,
             record.stores_visited,
-            record.trip_date,
+            weekday,
         )
 
         # Update overall stats
@@ -207,49 +342,96 @@ class SavingsValidator:
         self.cumulative_deviation += result.deviation
 
         # Track by strategy
-        self.strategy_accuracy[record.strategy].append(result.accuracy)
-
-        # Learn correction factors
-        self._learn_from_record(record, result)
-
-        return result
+        self._accumulate(self.strategy_stats, record.strategy, result.accuracy)
+
+        return result, weekday
+
+    def _append_columns(self, record: SavingsRecord) -> None:
+        """Add a record's row to the numeric columns."""
+        if self._n_records == len(self._trip_date_ord):
+            self._grow()
+
+        i = self._n_records
+        self._predicted_savings_arr[i] = record.predicted_savings
+        self._actual_savings_arr[i] = record.actual_savings
+        self._actual_time_arr[i] = record.actual_time
+        self._actual_distance_arr[i] = record.actual_distance
+        self._trip_date_ord[i] = record.trip_date.toordinal()
+        self._strategy_id[i] = self.STRATEGY_IDS.get(record.strategy, -1)
+        for store in record.stores_visited:
+            self._store_to_record_ids[store].add(i)
+        self._n_records += 1
+
+    def _grow(self) -> None:
+        """Double the capacity of the record columns."""
+        for name in (
+            "_predicted_savings_arr", "_actual_savings_arr", "_actual_time_arr",
+            "_actual_distance_arr", "_trip_date_ord", "_strategy_id",
+        ):
+            column = getattr(self, name)
+            grown = np.zeros(2 * len(column), dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _accumulate(self, stats: Dict[Any, List[float]], key: Any, accuracy: float) -> None:
+        """Add an accuracy to the running [count, sum, sum of squares] under key."""
+        s = stats.get(key)
+        if s is None:
+            s = stats[key] = [0, 0.0, 0.0]
+        s[0] += 1
+        s[1] += accuracy
+        s[2] += accuracy * accuracy
+
+    def _push_store_accuracy(self, store: str, accuracy: float) -> None:
+        """Write an accuracy into the store's ring, over its oldest one."""
+        ring, count = self.store_window.get(store) or (np.empty(self.STORE_WINDOW), 0)
+        ring[count % self.STORE_WINDOW] = accuracy
+        self.store_window[store] = (ring, count + 1)
+
+    def _recent_store_accuracies(self, store: str) -> np.ndarray:
+        """The store's windowed accuracies, oldest first."""
+        ring, count = self.store_window[store]
+        if count <= self.STORE_WINDOW:
+            return ring[:count]
+        return np.roll(ring, -(count % self.STORE_WINDOW))
 
     def _learn_from_record(
         self,
         record: SavingsRecord,
         result: ValidationResult,
+        weekday: int,
     ) -> None:
         """Learn correction factors from a trip record."""
-        # Store-level corrections
-        for store in record.stores_visited:
-            self._update_correction_factor(
-                f"store:{store}",
-                result.accuracy,
-            )
-
-        # Strategy-level correction
-        self._update_correction_factor(
-            f"strategy:{record.strategy}",
-            result.accuracy,
-        )
-
-        # Day of week correction
-        self._update_correction_factor(
-            f"day:{record.trip_date.weekday()}",
-            result.accuracy,
-        )
+        for key in self._factor_keys(record, weekday):
+            self._update_correction_factor(key, result.accuracy)
 
-        # Item count buckets
-        if record.item_count <= 10:
-            bucket = "small"
-        elif record.item_count <= 25:
-            bucket = "medium"
-        else:
-            bucket = "large"
-        self._update_correction_factor(
-            f"basket:{bucket}",
-            result.accuracy,
-        )
+    def _factor_keys(self, record: SavingsRecord, weekday: int) -> List[str]:
+        """Correction factor keys a trip record updates."""
+        # Store-level corrections
+        keys = [self._store_key(store) for store in record.stores_visited]
+
+        # Strategy, day of week and item count bucket
+        keys.append(self._strategy_key(record.strategy))
+        keys.append(self._DAY_KEYS[weekday])
+        keys.append(self._basket_key(record.item_count))
+        return keys
+
+    def _store_key(self, store: str) -> str:
+        """Correction factor key for a store, built once per store."""
+        key = self._store_key_cache.get(store)
+        if key is None:
+            key = self._store_key_cache[store] = f"store:{store}"
+        return key
+
+    def _strategy_key(self, strategy: str) -> str:
+        """Correction factor key for a strategy."""
+        return self._STRATEGY_KEYS.get(strategy) or f"strategy:{strategy}"
+
+    def _basket_key(self, item_count: int) -> str:
+        """Correction factor key for the basket size bucket of an item count."""
+        return self._BASKET_KEYS[
+            "small" if item_count <= 10 else "medium" if item_count <= 25 else "large"
+        ]
 
     def _update_correction_factor(
         self,
@@ -257,12 +439,11 @@ class SavingsValidator:
         accuracy: float,
     ) -> None:
         """Update or create a correction factor."""
-        if factor_key in self.correction_factors:
-            cf = self.correction_factors[factor_key]
-            # Running average
-            total = cf.correction_multiplier * cf.sample_size + accuracy
+        cf = self.correction_factors.get(factor_key)
+        if cf is not None:
+            # Running average, moved toward the new sample
             cf.sample_size += 1
-            cf.correction_multiplier = total / cf.sample_size
+            cf.correction_multiplier += (accuracy - cf.correction_multiplier) / cf.sample_size
             cf.confidence = min(0.95, 0.5 + (cf.sample_size * 0.02))
         else:
             factor_type, factor_value = factor_key.split(":", 1)
@@ -274,6 +455,26 @@ class SavingsValidator:
                 confidence=0.5,
             )
 
+    def _update_correction_factor_batch(
+        self,
+        factor_key: str,
+        accuracies: List[float],
+    ) -> None:
+        """Update or create a correction factor with several samples at once."""
+        cf = self.correction_factors.get(factor_key)
+        if cf is None:
+            self._update_correction_factor(factor_key, accuracies[0])
+            cf = self.correction_factors[factor_key]
+            accuracies = accuracies[1:]
+            if not accuracies:
+                return
+
+        # Running average over the old and new samples together
+        n = cf.sample_size + len(accuracies)
+        cf.correction_multiplier = (cf.correction_multiplier * cf.sample_size + sum(accuracies)) / n
+        cf.sample_size = n
+        cf.confidence = min(0.95, 0.5 + (n * 0.02))
+
     def get_correction_factor(
         self,
         stores: List[str],
@@ -293,54 +494,46 @@ class SavingsValidator:
         Returns:
             Correction multiplier to apply to prediction
         """
-        factors = []
-        weights = []
+        # At most one factor per store plus strategy, day and basket size
+        factors = np.empty(len(stores) + 3)
+        weights = np.empty(len(stores) + 3)
+        n = 0
 
         # Store factors
         for store in stores:
-            key = f"store:{store}"
-            if key in self.correction_factors:
-                cf = self.correction_factors[key]
-                factors.append(cf.correction_multiplier)
-                weights.append(cf.confidence)
+            cf = self.correction_factors.get(self._store_key(store))
+            if cf is not None:
+                factors[n] = cf.correction_multiplier
+                weights[n] = cf.confidence
+                n += 1
 
         # Strategy factor
-        key = f"strategy:{strategy}"
-        if key in self.correction_factors:
-            cf = self.correction_factors[key]
-            factors.append(cf.correction_multiplier)
-            weights.append(cf.confidence * 1.5)  # Higher weight
+        cf = self.correction_factors.get(self._strategy_key(strategy))
+        if cf is not None:
+            factors[n] = cf.correction_multiplier
+            weights[n] = cf.confidence * 1.5  # Higher weight
+            n += 1
 
         # Day factor
-        key = f"day:{trip_date.weekday()}"
-        if key in self.correction_factors:
-            cf = self.correction_factors[key]
-            factors.append(cf.correction_multiplier)
-            weights.append(cf.confidence)
+        cf = self.correction_factors.get(self._DAY_KEYS[trip_date.weekday()])
+        if cf is not None:
+            factors[n] = cf.correction_multiplier
+            weights[n] = cf.confidence
+            n += 1
 
         # Basket size factor
-        if item_count <= 10:
-            bucket = "small"
-        elif item_count <= 25:
-            bucket = "medium"
-        else:
-            bucket = "large"
-        key = f"basket:{bucket}"
-        if key in self.correction_factors:
-            cf = self.correction_factors[key]
-            factors.append(cf.correction_multiplier)
-            weights.append(cf.confidence)
-
-        if not factors:
+        cf = self.correction_factors.get(self._basket_key(item_count))
+        if cf is not None:
+            factors[n] = cf.correction_multiplier
+            weights[n] = cf.confidence
+            n += 1
+
+        if not n:
             return 1.0  # No correction
 
         # Weighted average
-        total_weight = sum(weights)
-        if total_weight == 0:
-            return 1.0
-
-        correction = sum(f * w for f, w in zip(factors, weights)) / total_weight
-        return round(correction, 3)
+        correction = weighted_correction(factors[:n], weights[:n])
+        return round(float(correction), 3)
 
     def adjust_prediction(
         self,
@@ -370,10 +563,10 @@ class SavingsValidator:
         adjusted = predicted_savings * correction
 
         # Calculate confidence based on data quality
-        relevant_records = [
-            r for r in self.savings_records
-            if any(s in r.stores_visited for s in stores)
-        ]
+        index = self._store_to_record_ids
+        relevant_records = set().union(
+            *(index[s] for s in stores if s in index)
+        )
         confidence = min(0.9, 0.4 + (len(relevant_records) * 0.05))
 
         return {
@@ -404,13 +597,13 @@ class SavingsValidator:
         start = start_date or (today - timedelta(days=30))
         end = end_date or today
 
-        # Filter records in period
-        records = [
-            r for r in self.savings_records
-            if start <= r.trip_date <= end
-        ]
+        # Rows in the period
+        n = self._n_records
+        dates = self._trip_date_ord[:n]
+        in_period = (dates >= start.toordinal()) & (dates <= end.toordinal())
+        total_trips = int(np.count_nonzero(in_period))
 
-        if not records:
+        if not total_trips:
             return ROIAnalysis(
                 period_start=start,
                 period_end=end,
@@ -427,14 +620,17 @@ class SavingsValidator:
                 recommendation="Insufficient data",
             )
 
-        # Calculate totals
-        multi_store = [r for r in records if r.strategy in ["two_store", "multi_store"]]
-        single_store = [r for r in records if r.strategy == "single_store"]
+        # Calculate totals over the multi-store trips
+        strategy_id = self._strategy_id[:n]
+        multi_store = np.flatnonzero(in_period & (strategy_id >= Strategy.TWO_STORE))
+        single_store_trips = int(
+            np.count_nonzero(in_period & (strategy_id == Strategy.SINGLE_STORE))
+        )
 
-        total_predicted = sum(r.predicted_savings for r in multi_store)
-        total_actual = sum(r.actual_savings for r in multi_store)
-        total_extra_time = sum(r.actual_time - 30 for r in multi_store)  # Baseline 30 min
-        total_extra_distance = sum(r.actual_distance for r in multi_store)
+        total_predicted = float(self._predicted_savings_arr.take(multi_store).sum())
+        total_actual = float(self._actual_savings_arr.take(multi_store).sum())
+        total_extra_time = float((self._actual_time_arr.take(multi_store) - 30).sum())  # Baseline 30 min
+        total_extra_distance = float(self._actual_distance_arr.take(multi_store).sum())
 
         # Calculate costs
         gas_cost = (total_extra_distance / self.mpg) * self.gas_price
@@ -462,9 +658,9 @@ class SavingsValidator:
         return ROIAnalysis(
             period_start=start,
             period_end=end,
-            total_trips=len(records),
+            total_trips=total_trips,
             multi_store_trips=len(multi_store),
-            single_store_trips=len(single_store),
+            single_store_trips=single_store_trips,
             total_predicted_savings=round(total_predicted, 2),
             total_actual_savings=round(total_actual, 2),
             total_extra_time=round(total_extra_time, 0),
@@ -495,24 +691,20 @@ class SavingsValidator:
                 "improvement": 0,
             }
 
-        recent = self.savings_records[-window_size:]
-        older = self.savings_records[:-window_size] if len(self.savings_records) > window_size else []
+        # Split the record columns into the recent window and everything older
+        n = self._n_records
+        predicted = self._predicted_savings_arr[:n]
+        actual = self._actual_savings_arr[:n]
+        recent_predicted = predicted[-window_size:]
+        older_predicted = predicted[:-window_size]
 
         # Calculate accuracies
-        recent_accuracies = [
-            r.actual_savings / r.predicted_savings
-            for r in recent
-            if r.predicted_savings > 0
-        ]
-        recent_avg = np.mean(recent_accuracies) if recent_accuracies else 0
-
-        if older:
-            older_accuracies = [
-                r.actual_savings / r.predicted_savings
-                for r in older
-                if r.predicted_savings > 0
-            ]
-            older_avg = np.mean(older_accuracies) if older_accuracies else 0
+        recent_accuracies = self._accuracies(recent_predicted, actual[-window_size:])
+        recent_avg = recent_accuracies.mean() if recent_accuracies.size else 0
+
+        if older_predicted.size:
+            older_accuracies = self._accuracies(older_predicted, actual[:-window_size])
+            older_avg = older_accuracies.mean() if older_accuracies.size else 0
         else:
             older_avg = recent_avg
 
@@ -531,56 +723,89 @@ class SavingsValidator:
             "current_accuracy": round(recent_avg, 3),
             "previous_accuracy": round(older_avg, 3),
             "improvement": round(improvement, 3),
-            "samples_analyzed": len(recent),
+            "samples_analyzed": len(recent_predicted),
         }
 
+    def _accuracies(self, predicted: np.ndarray, actual: np.ndarray) -> np.ndarray:
+        """Actual over predicted savings, for records that predicted savings."""
+        has_prediction = predicted > 0
+        return actual[has_prediction] / predicted[has_prediction]
+
     def get_store_performance(self) -> Dict[str, Any]:
         """Get accuracy performance by store."""
+        return self._cached("store_performance", self._store_performance)
+
+    def get_strategy_performance(self) -> Dict[str, Any]:
+        """Get accuracy performance by shopping strategy."""
+        return self._cached("strategy_performance", self._strategy_performance)
+
+    def _cached(self, name: str, build) -> Any:
+        """
+        A report built since the last recorded trip, or a fresh one.
+
+        The same object is returned until the stats change, so callers must
+        not modify it.
+        """
+        hit = self._cache.get(name)
+        if hit is not None and hit[0] == self._stats_version:
+            return hit[1]
+
+        report = build()
+        self._cache[name] = (self._stats_version, report)
+        return report
+
+    def _store_performance(self) -> Dict[str, Any]:
+        """Accuracy performance by store."""
         performance = {}
 
-        for store, accuracies in self.store_accuracy.items():
-            if len(accuracies) >= 3:
-                avg_accuracy = np.mean(accuracies)
-                std_accuracy = np.std(accuracies)
+        for store, (ring, count) in self.store_window.items():
+            if count >= 3:
+                recent = ring[:min(count, self.STORE_WINDOW)]
+                avg_accuracy = float(recent.mean())
+                std_accuracy = float(recent.std())
 
                 performance[store] = {
                     "average_accuracy": round(avg_accuracy, 3),
                     "consistency": round(1 - std_accuracy, 3),
-                    "sample_size": len(accuracies),
+                    "sample_size": count,
                     "reliability": "high" if avg_accuracy > 0.9 and std_accuracy < 0.2 else "medium" if avg_accuracy > 0.8 else "low",
                 }
 
-        # Sort by accuracy
-        return dict(
-            sorted(
-                performance.items(),
-                key=lambda x: x[1]["average_accuracy"],
-                reverse=True,
-            )
+        # Sort by accuracy, best first; ties keep their order
+        stores = list(performance)
+        averages = np.fromiter(
+            (p["average_accuracy"] for p in performance.values()),
+            dtype=np.float64,
+            count=len(stores),
         )
+        order = np.argsort(-averages, kind="stable")
+        return {stores[i]: performance[stores[i]] for i in order}
 
-    def get_strategy_performance(self) -> Dict[str, Any]:
-        """Get accuracy performance by shopping strategy."""
+    def _strategy_performance(self) -> Dict[str, Any]:
+        """Accuracy performance by shopping strategy."""
         performance = {}
 
-        for strategy, accuracies in self.strategy_accuracy.items():
-            if accuracies:
-                avg_accuracy = np.mean(accuracies)
+        for strategy, stats in self.strategy_stats.items():
+            if stats[0]:
+                avg_accuracy = stats[1] / stats[0]
 
                 performance[strategy] = {
                     "average_accuracy": round(avg_accuracy, 3),
-                    "sample_size": len(accuracies),
+                    "sample_size": stats[0],
                     "recommended": avg_accuracy > 0.85,
                 }
 
         return performance
 
     def save(self, path: Path) -> None:
-        """Save validator state."""
-        def date_serializer(obj):
-            if isinstance(obj, date):
-                return obj.isoformat()
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+        """
+        Save validator state as compact JSON (orjson when installed).
+
+        Records go to an append-only log beside the file, one JSON line per
+        trip, so saving again to the same path only writes the new trips.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._append_records_log(self._records_log_path(path))
 
         data = {
             "version": self.MODEL_VERSION,
@@ -597,34 +822,22 @@ class SavingsValidator:
                 }
                 for k, cf in self.correction_factors.items()
             },
-            "store_accuracy": {k: list(v) for k, v in self.store_accuracy.items()},
-            "strategy_accuracy": {k: list(v) for k, v in self.strategy_accuracy.items()},
-            "savings_records": [
-                {
-                    "trip_id": r.trip_id,
-                    "trip_date": r.trip_date.isoformat(),
-                    "stores_visited": r.stores_visited,
-                    "predicted_savings": r.predicted_savings,
-                    "actual_savings": r.actual_savings,
-                    "predicted_time": r.predicted_time,
-                    "actual_time": r.actual_time,
-                    "predicted_distance": r.predicted_distance,
-                    "actual_distance": r.actual_distance,
-                    "item_count": r.item_count,
-                    "strategy": r.strategy,
-                }
-                for r in self.savings_records
-            ],
+            "store_window": {
+                store: {"count": count, "recent": self._recent_store_accuracies(store).tolist()}
+                for store, (_, count) in self.store_window.items()
+            },
+            "strategy_stats": self.strategy_stats,
+            "record_count": self._logged_records,
         }
 
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2, default=date_serializer)
+        with open(path, "wb") as f:
+            f.write(self._dumps(data))
 
     def load(self, path: Path) -> None:
         """Load validator state."""
-        with open(path, "r") as f:
-            data = json.load(f)
+        self._stats_version += 1
+        with open(path, "rb") as f:
+            data = self._loads(f.read())
 
         self.total_predictions = data.get("total_predictions", 0)
         self.accurate_predictions = data.get("accurate_predictions", 0)
@@ -641,12 +854,19 @@ class SavingsValidator:
             )
 
         # Load accuracy tracking
-        self.store_accuracy = defaultdict(list, data.get("store_accuracy", {}))
-        self.strategy_accuracy = defaultdict(list, data.get("strategy_accuracy", {}))
+        self._load_store_window(data)
+        self.strategy_stats = self._load_stats(data, "strategy_stats", "strategy_accuracy")
 
-        # Load savings records
-        for r_data in data.get("savings_records", []):
-            self.savings_records.append(SavingsRecord(
+        # Load savings records, inline in saves from older versions
+        if "savings_records" in data:
+            records = data["savings_records"]
+        else:
+            records = self._read_records_log(
+                self._records_log_path(path), data.get("record_count", 0)
+            )
+
+        for r_data in records:
+            record = SavingsRecord(
                 trip_id=r_data["trip_id"],
                 trip_date=date.fromisoformat(r_data["trip_date"]),
                 stores_visited=r_data["stores_visited"],
@@ -658,7 +878,118 @@ class SavingsValidator:
                 actual_distance=r_data["actual_distance"],
                 item_count=r_data["item_count"],
                 strategy=r_data["strategy"],
-            ))
+            )
+            self.savings_records.append(record)
+            self._append_columns(record)
+
+        # Only a log holding exactly our records can be appended to
+        if self._log_path is not None and self._logged_records != len(self.savings_records):
+            self._log_path = None
+
+    def _records_log_path(self, path: Path) -> Path:
+        """Record log that goes with a saved validator file."""
+        return path.with_suffix(".records.jsonl")
+
+    def _append_records_log(self, log_path: Path) -> None:
+        """Write the records not yet in log_path to the end of it."""
+        if (
+            log_path != self._log_path
+            or not log_path.exists()
+            or log_path.stat().st_size < self._log_size
+        ):
+            # A new or replaced log gets every record
+            self._log_path = log_path
+            self._logged_records = 0
+            self._log_size = 0
+
+        raw = b"".join(
+            self._dumps({
+                "trip_id": r.trip_id,
+                "trip_date": r.trip_date.isoformat(),
+                "stores_visited": r.stores_visited,
+                "predicted_savings": r.predicted_savings,
+                "actual_savings": r.actual_savings,
+                "predicted_time": r.predicted_time,
+                "actual_time": r.actual_time,
+                "predicted_distance": r.predicted_distance,
+                "actual_distance": r.actual_distance,
+                "item_count": r.item_count,
+                "strategy": r.strategy,
+            }) + b"\n"
+            for r in self.savings_records[self._logged_records:]
+        )
+
+        with open(log_path, "r+b" if self._log_size else "wb") as f:
+            # Drop anything past our last save, e.g. from an interrupted one
+            f.truncate(self._log_size)
+            f.seek(self._log_size)
+            f.write(raw)
+
+        self._log_size += len(raw)
+        self._logged_records = len(self.savings_records)
+
+    def _read_records_log(self, log_path: Path, count: int) -> List[Dict[str, Any]]:
+        """The first count records of a record log."""
+        self._log_path = None
+        if not count or not log_path.exists():
+            return []
+
+        with open(log_path, "rb") as f:
+            lines = f.read().split(b"\n")[:count]
+        records = [self._loads(line) for line in lines if line]
+
+        if len(records) == count:
+            self._log_path = log_path
+            self._logged_records = count
+            self._log_size = sum(len(line) + 1 for line in lines)
+        return records
+
+    def _dumps(self, obj: Any) -> bytes:
+        """Compact JSON bytes, through orjson when installed."""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def _loads(self, raw: bytes) -> Any:
+        """Parse JSON bytes, through orjson when installed."""
+        return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+    def _load_store_window(self, data: Dict[str, Any]) -> None:
+        """Store rings from a save, or from the accuracy lists of older saves."""
+        if "store_window" in data:
+            windows = data["store_window"].items()
+        else:
+            windows = (
+                (store, {"count": len(accuracies), "recent": accuracies[-self.STORE_WINDOW:]})
+                for store, accuracies in data.get("store_accuracy", {}).items()
+            )
+
+        self.store_window = {}
+        for store, window in windows:
+            ring = np.empty(self.STORE_WINDOW)
+            count = window["count"]
+            recent = window["recent"]
+            # Put each accuracy back where the ring had it, oldest first
+            start = count - len(recent)
+            for j, accuracy in enumerate(recent):
+                ring[(start + j) % self.STORE_WINDOW] = accuracy
+            self.store_window[store] = (ring, count)
+
+    def _load_stats(
+        self,
+        data: Dict[str, Any],
+        key: str,
+        legacy_key: str,
+    ) -> Dict[str, List[float]]:
+        """Running stats from a save, or from the accuracy lists of older saves."""
+        if key in data:
+            return {k: [int(s[0]), s[1], s[2]] for k, s in data[key].items()}
+
+        stats: Dict[str, List[float]] = {}
+        for k, accuracies in data.get(legacy_key, {}).items():
+            for accuracy in accuracies:
+                self._accumulate(stats, k, accuracy)
+        return stats
 
     def get_stats(self) -> Dict[str, Any]:
         """Get validator statistics."""
@@ -676,6 +1007,6 @@ class SavingsValidator:
                 self.cumulative_deviation / max(1, self.total_predictions), 2
             ),
             "correction_factors_learned": len(self.correction_factors),
-            "stores_tracked": len(self.store_accuracy),
+            "stores_tracked": len(self.store_window),
             "meets_target": accuracy_rate >= self.GOOD_ACCURACY_RATE,
         }
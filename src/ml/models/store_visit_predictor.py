@@ -8,8 +8,11 @@ from enum import Enum
 from typing import List, Dict, Optional, Any, Tuple
 import numpy as np
 from pathlib import Path
+from statistics import median
 import json
 
+from ._visit_kernels import score_visit
+
 
 class StoreType(Enum):
     """Types of grocery stores."""
@@ -21,6 +24,11 @@ class StoreType(Enum):
     CONVENIENCE = "convenience"  # 7-Eleven, gas stations
 
 
+# Definition-order position of each store type, for indexing lookup tables
+for _idx, _store_type in enumerate(StoreType):
+    _store_type.idx = _idx
+
+
 class CrowdLevel(Enum):
     """Store crowd level."""
     EMPTY = 1       # Early morning, late night
@@ -41,7 +49,7 @@ class DayOfWeek(Enum):
     SUNDAY = 6
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StoreVisitFeatures:
     """Features for predicting store visit duration."""
     store_type: StoreType
@@ -57,7 +65,7 @@ class StoreVisitFeatures:
     is_member: bool = False  # For warehouse stores
 
 
-@dataclass
+@dataclass(slots=True)
 class VisitDurationPrediction:
     """Prediction result for store visit duration."""
     estimated_minutes: float
@@ -68,7 +76,7 @@ class VisitDurationPrediction:
     range_max: float  # Upper bound
 
 
-@dataclass
+@dataclass(slots=True)
 class HistoricalVisit:
     """Historical store visit data for training."""
     store_id: str
@@ -132,12 +140,65 @@ class StoreVisitPredictor:
         StoreType.CONVENIENCE: [7, 8, 12, 17, 18],
     }
 
+    # Predictions kept for repeated features; the oldest goes when full
+    PREDICTION_CACHE_SIZE = 1024
+    # Starting rows of the history columns, doubled as visits are added
+    INITIAL_HISTORY_CAPACITY = 64
+
+    # The tables above by StoreType.idx and by CrowdLevel value less one:
+    # tuples for single predictions, arrays for batch estimates
+    _BASE_BY_INDEX = tuple(map(BASE_DURATIONS.__getitem__, StoreType))
+    _MPI_BY_INDEX = tuple(map(MINUTES_PER_ITEM.__getitem__, StoreType))
+    _CROWD_BY_INDEX = tuple(map(CROWD_MULTIPLIERS.__getitem__, CrowdLevel))
+    # Peak hours as 24-bit masks, bit h set when hour h is a peak hour
+    _PEAK_MASKS = tuple(
+        sum(1 << hour for hour in peak_hours)
+        for peak_hours in map(PEAK_HOURS.__getitem__, StoreType)
+    )
+    # Factor descriptions by bit of the factor mask built in _predict
+    _FACTOR_TEXT = (
+        "Unfamiliar store layout",
+        f"High crowd level: {CrowdLevel.BUSY.name}",
+        f"High crowd level: {CrowdLevel.PACKED.name}",
+        "No shopping list",
+        "Deli counter stop",
+        "Pharmacy stop",
+        "Self-checkout available",
+        "Member access",
+        "Peak shopping hours",
+        "Weekend shopping",
+    )
+
+    # Off-peak CrowdLevel value by hour: EMPTY overnight, LIGHT either side
+    # of the working day, MODERATE from 10 AM to 7 PM
+    _OFF_PEAK_CROWD = (1,) * 8 + (2,) * 2 + (3,) * 10 + (2,) + (1,) * 3
+    _CROWD_LEVELS = tuple(CrowdLevel)
+
+    # Base minutes, minutes per item and peak mask for each StoreType.idx,
+    # so a prediction fetches its store type's constants in one lookup
+    _STORE_CONSTANTS = tuple(zip(_BASE_BY_INDEX, _MPI_BY_INDEX, _PEAK_MASKS))
+    _BASE_ARRAY = np.array(_BASE_BY_INDEX)
+    _MPI_ARRAY = np.array(_MPI_BY_INDEX)
+    _CROWD_ARRAY = np.array(_CROWD_BY_INDEX)
+
     def __init__(self, model_path: Optional[Path] = None):
         """Initialize predictor with optional trained model."""
         self.model_path = model_path
         self.historical_data: List[HistoricalVisit] = []
+        self._visits_by_type: Dict[str, int] = {}  # Store type value -> visits in history
+
+        # The history as columns, one row per visit, for training
+        self._n_visits = 0
+        self._visit_store_idx = np.zeros(self.INITIAL_HISTORY_CAPACITY, dtype=np.int8)
+        self._visit_item_count = np.zeros(self.INITIAL_HISTORY_CAPACITY, dtype=np.int32)
+        self._visit_crowd = np.zeros(self.INITIAL_HISTORY_CAPACITY, dtype=np.int8)
+        self._visit_is_peak = np.zeros(self.INITIAL_HISTORY_CAPACITY, dtype=bool)
+        self._visit_is_weekend = np.zeros(self.INITIAL_HISTORY_CAPACITY, dtype=bool)
+        self._visit_minutes = np.zeros(self.INITIAL_HISTORY_CAPACITY)
+
         self.store_adjustments: Dict[str, float] = {}  # Per-store learned adjustments
         self.user_speed_factor: float = 1.0  # User's shopping speed vs average
+        self._predictions: Dict[StoreVisitFeatures, VisitDurationPrediction] = {}
         self._load_model()
 
     def _load_model(self) -> None:
@@ -148,6 +209,7 @@ class StoreVisitPredictor:
                     data = json.load(f)
                     self.store_adjustments = data.get('store_adjustments', {})
                     self.user_speed_factor = data.get('user_speed_factor', 1.0)
+                self._predictions.clear()
             except (json.JSONDecodeError, IOError):
                 pass
 
@@ -171,80 +233,76 @@ class StoreVisitPredictor:
         Returns:
             Prediction with estimated duration and confidence
         """
+        cached = self._predictions.get(features)
+        if cached is None:
+            cached = self._predict(features)
+            if len(self._predictions) >= self.PREDICTION_CACHE_SIZE:
+                del self._predictions[next(iter(self._predictions))]
+            self._predictions[features] = cached
+
+        # Fresh breakdown and factors, so callers cannot alter the cached entry
+        return VisitDurationPrediction(
+            estimated_minutes=cached.estimated_minutes,
+            confidence=cached.confidence,
+            breakdown=dict(cached.breakdown),
+            factors=list(cached.factors),
+            range_min=cached.range_min,
+            range_max=cached.range_max,
+        )
+
+    def _predict(self, features: StoreVisitFeatures) -> VisitDurationPrediction:
+        """Predict store visit duration without the prediction cache."""
         breakdown = {}
-        factors = []
+        base, minutes_per_item, peak_mask = self._STORE_CONSTANTS[features.store_type.idx]
+        crowd_value = features.crowd_level.value
+
+        # Counter waits, checkout lane, peak hours and weekend
+        counter_time = (8 if features.needs_deli_counter else 0) + (12 if features.needs_pharmacy else 0)
+        self_checkout = features.has_self_checkout and features.item_count < 20
+        is_peak = bool((peak_mask >> features.hour_of_day) & 1)
+        is_weekend = features.day_of_week.value >= 5  # Saturday or Sunday
+
+        total_time, item_time, checkout_time = score_visit(
+            base,
+            minutes_per_item,
+            features.item_count,
+            features.store_familiarity,
+            self._CROWD_BY_INDEX[crowd_value - 1],
+            crowd_value,
+            features.has_list,
+            counter_time,
+            self_checkout,
+            is_peak,
+            is_weekend,
+            self.user_speed_factor,
+            self.store_adjustments.get(features.store_type.value, 1.0),
+        )
 
-        # 1. Base duration for store type
-        base = self.BASE_DURATIONS[features.store_type]
+        # Time breakdown by activity
         breakdown['base_time'] = base
-
-        # 2. Item count time
-        item_time = features.item_count * self.MINUTES_PER_ITEM[features.store_type]
         breakdown['item_time'] = item_time
-
-        # 3. Familiarity adjustment (unfamiliar stores take longer)
-        familiarity_multiplier = 1.0 + (0.3 * (1 - features.store_familiarity))
-        if features.store_familiarity < 0.5:
-            factors.append("Unfamiliar store layout")
-
-        # 4. Crowd level adjustment
-        crowd_multiplier = self.CROWD_MULTIPLIERS[features.crowd_level]
-        if features.crowd_level in [CrowdLevel.BUSY, CrowdLevel.PACKED]:
-            factors.append(f"High crowd level: {features.crowd_level.name}")
-
-        # 5. No list penalty
-        list_multiplier = 1.0 if features.has_list else 1.2
         if not features.has_list:
-            factors.append("No shopping list")
             breakdown['no_list_penalty'] = (base + item_time) * 0.2
-
-        # 6. Special counter time
-        counter_time = 0
         if features.needs_deli_counter:
-            counter_time += 8  # Average deli wait
-            factors.append("Deli counter stop")
-            breakdown['deli_counter'] = 8
+            breakdown['deli_counter'] = 8  # Average deli wait
         if features.needs_pharmacy:
-            counter_time += 12  # Average pharmacy wait
-            factors.append("Pharmacy stop")
-            breakdown['pharmacy'] = 12
-
-        # 7. Checkout time based on crowd and self-checkout
-        if features.has_self_checkout and features.item_count < 20:
-            checkout_time = 3 + (features.item_count * 0.15)
-            factors.append("Self-checkout available")
-        else:
-            checkout_base = 5 if features.crowd_level.value <= 2 else 10
-            checkout_time = checkout_base + (features.item_count * 0.2)
-        checkout_time *= crowd_multiplier
+            breakdown['pharmacy'] = 12  # Average pharmacy wait
         breakdown['checkout'] = checkout_time
 
-        # 8. Warehouse store member benefits
-        if features.store_type == StoreType.WAREHOUSE and features.is_member:
-            factors.append("Member access")
-
-        # 9. Time-of-day adjustment (peak hours)
-        peak_hours = self.PEAK_HOURS.get(features.store_type, [])
-        is_peak = features.hour_of_day in peak_hours
-        peak_multiplier = 1.15 if is_peak else 1.0
-        if is_peak:
-            factors.append("Peak shopping hours")
-
-        # 10. Weekend adjustment
-        is_weekend = features.day_of_week in [DayOfWeek.SATURDAY, DayOfWeek.SUNDAY]
-        weekend_multiplier = 1.2 if is_weekend else 1.0
-        if is_weekend:
-            factors.append("Weekend shopping")
-
-        # Calculate total
-        shopping_time = (base + item_time) * familiarity_multiplier
-        total_time = (shopping_time * list_multiplier + counter_time + checkout_time)
-        total_time *= crowd_multiplier * peak_multiplier * weekend_multiplier
-        total_time *= self.user_speed_factor
-
-        # Apply learned store adjustments
-        store_adj = self.store_adjustments.get(features.store_type.value, 1.0)
-        total_time *= store_adj
+        # Key factors as bits of _FACTOR_TEXT, in order of the adjustments applied
+        factor_mask = (
+            (features.store_familiarity < 0.5)
+            | (crowd_value == CrowdLevel.BUSY.value) << 1
+            | (crowd_value == CrowdLevel.PACKED.value) << 2
+            | (not features.has_list) << 3
+            | features.needs_deli_counter << 4
+            | features.needs_pharmacy << 5
+            | self_checkout << 6
+            | (features.store_type == StoreType.WAREHOUSE and features.is_member) << 7
+            | is_peak << 8
+            | is_weekend << 9
+        )
+        factors = [text for bit, text in enumerate(self._FACTOR_TEXT) if factor_mask >> bit & 1]
 
         # Calculate confidence based on data
         confidence = self._calculate_confidence(features)
@@ -263,16 +321,56 @@ class StoreVisitPredictor:
             range_max=round(range_max, 1),
         )
 
+    def _estimate_batch(
+        self,
+        store_idx: np.ndarray,
+        item_count: np.ndarray,
+        crowd: np.ndarray,
+        is_peak: np.ndarray,
+        is_weekend: np.ndarray,
+        store_adj: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Unrounded estimated minutes for visits with the default features
+        (shopping list, average familiarity, self-checkout, no counter stops).
+
+        Mirrors the arithmetic of predict, one visit per element.
+
+        Args:
+            store_idx: Position of each visit's store type in StoreType
+            item_count: Items per visit
+            crowd: CrowdLevel values
+            is_peak: Whether each visit falls in its store type's peak hours
+            is_weekend: Whether each visit is on a weekend
+            store_adj: Learned adjustment for each visit's store type
+        """
+        base = self._BASE_ARRAY[store_idx]
+        item_time = item_count * self._MPI_ARRAY[store_idx]
+        familiarity_multiplier = 1.0 + (0.3 * (1 - 0.5))
+        crowd_multiplier = self._CROWD_ARRAY[crowd - 1]
+
+        # Self-checkout under 20 items, otherwise a lane that is slower when busy
+        checkout_time = np.where(
+            item_count < 20,
+            3 + (item_count * 0.15),
+            np.where(crowd <= 2, 5, 10) + (item_count * 0.2),
+        ) * crowd_multiplier
+
+        peak_multiplier = np.where(is_peak, 1.15, 1.0)
+        weekend_multiplier = np.where(is_weekend, 1.2, 1.0)
+
+        total_time = (base + item_time) * familiarity_multiplier + checkout_time
+        total_time = total_time * (crowd_multiplier * peak_multiplier * weekend_multiplier)
+        total_time = total_time * self.user_speed_factor
+        return total_time * store_adj
+
     def _calculate_confidence(self, features: StoreVisitFeatures) -> float:
         """Calculate prediction confidence based on available data."""
         base_confidence = 0.7
 
         # Higher confidence with more historical data
-        relevant_visits = [
-            v for v in self.historical_data
-            if v.store_type == features.store_type
-        ]
-        data_bonus = min(0.2, len(relevant_visits) * 0.02)
+        relevant_visits = self._visits_by_type.get(features.store_type.value, 0)
+        data_bonus = min(0.2, relevant_visits * 0.02)
 
         # Higher confidence with familiar stores
         familiarity_bonus = features.store_familiarity * 0.1
@@ -284,67 +382,99 @@ class StoreVisitPredictor:
         Train model on historical visit data.
 
         Args:
-            visits: List of historical store visits
+            visits: List of historical store visits, added to the history
 
         Returns:
             Training metrics
         """
+        start = self._n_visits
         self.historical_data.extend(visits)
+        for visit in visits:
+            self._append_visit(visit)
+        return self._fit(start)
+
+    def _fit(self, start: int) -> Dict[str, Any]:
+        """Fit adjustments to the history columns from row start onwards."""
+        # History and adjustments change below, so cached predictions are stale
+        self._predictions.clear()
+
+        stop = self._n_visits
+        if stop - start < 5:
+            return {"status": "insufficient_data", "visits": stop - start}
+
+        # Estimate every visit as predict would, with adjustments disabled
+        store_idx = self._visit_store_idx[start:stop]
+        minutes = self._estimate_batch(
+            store_idx,
+            self._visit_item_count[start:stop],
+            self._visit_crowd[start:stop],
+            self._visit_is_peak[start:stop],
+            self._visit_is_weekend[start:stop],
+            1.0,
+        )
+        estimated = np.array([round(m, 1) for m in minutes.tolist()])
 
-        if len(visits) < 5:
-            return {"status": "insufficient_data", "visits": len(visits)}
+        # Calculate prediction errors
+        errors = self._visit_minutes[start:stop] / estimated
 
-        # Calculate prediction errors for each store type
-        errors_by_type: Dict[StoreType, List[float]] = {}
-        for visit in visits:
-            features = StoreVisitFeatures(
-                store_type=visit.store_type,
-                item_count=visit.item_count,
-                day_of_week=visit.day_of_week,
-                hour_of_day=visit.hour_of_day,
-                crowd_level=visit.crowd_level,
-            )
-
-            # Temporarily disable adjustments for training
-            old_adj = self.store_adjustments.copy()
-            self.store_adjustments = {}
-            prediction = self.predict(features)
-            self.store_adjustments = old_adj
-
-            error = visit.actual_duration_minutes / prediction.estimated_minutes
-
-            if visit.store_type not in errors_by_type:
-                errors_by_type[visit.store_type] = []
-            errors_by_type[visit.store_type].append(error)
-
-        # Calculate adjustments
-        for store_type, errors in errors_by_type.items():
-            if errors:
-                # Use median to reduce outlier impact
-                adjustment = float(np.median(errors))
-                self.store_adjustments[store_type.value] = adjustment
+        # Calculate adjustments per store type, in order of first visit
+        store_types = tuple(StoreType)
+        types, first_seen = np.unique(store_idx, return_index=True)
+        for k in types[np.argsort(first_seen)].tolist():
+            # Use median to reduce outlier impact
+            adjustment = median(errors[store_idx == k].tolist())
+            self.store_adjustments[store_types[k].value] = adjustment
 
         # Calculate overall user speed factor
-        all_errors = [e for errors in errors_by_type.values() for e in errors]
-        if all_errors:
-            self.user_speed_factor = float(np.median(all_errors))
+        self.user_speed_factor = median(errors.tolist())
 
         self.save_model()
 
         return {
             "status": "trained",
-            "visits_used": len(visits),
+            "visits_used": stop - start,
             "store_adjustments": self.store_adjustments,
             "user_speed_factor": self.user_speed_factor,
         }
 
+    def _append_visit(self, visit: HistoricalVisit) -> None:
+        """Count a visit added to the history and add its row to the columns."""
+        key = visit.store_type.value
+        self._visits_by_type[key] = self._visits_by_type.get(key, 0) + 1
+
+        if self._n_visits == len(self._visit_minutes):
+            self._grow_history()
+
+        i = self._n_visits
+        store_idx = visit.store_type.idx
+        self._visit_store_idx[i] = store_idx
+        self._visit_item_count[i] = visit.item_count
+        self._visit_crowd[i] = visit.crowd_level.value
+        self._visit_is_peak[i] = (self._PEAK_MASKS[store_idx] >> visit.hour_of_day) & 1
+        self._visit_is_weekend[i] = visit.day_of_week.value >= 5
+        self._visit_minutes[i] = visit.actual_duration_minutes
+        self._n_visits += 1
+
+    def _grow_history(self) -> None:
+        """Double the capacity of the history columns."""
+        for name in (
+            "_visit_store_idx", "_visit_item_count", "_visit_crowd",
+            "_visit_is_peak", "_visit_is_weekend", "_visit_minutes",
+        ):
+            column = getattr(self, name)
+            grown = np.zeros(2 * len(column), dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
     def log_visit(self, visit: HistoricalVisit) -> None:
         """Log a completed store visit for learning."""
         self.historical_data.append(visit)
+        self._append_visit(visit)
+        self._predictions.clear()
 
-        # Retrain if enough new data
-        if len(self.historical_data) % 10 == 0:
-            self.train(self.historical_data[-20:])
+        # Retrain on the latest visits if enough new data
+        if self._n_visits % 10 == 0:
+            self._fit(max(0, self._n_visits - 20))
 
     def get_optimal_time(
         self,
@@ -363,33 +493,35 @@ class StoreVisitPredictor:
         Returns:
             Optimal visit time recommendation
         """
-        hourly_predictions = []
-
-        for hour in range(6, 22):  # 6 AM to 10 PM
-            # Estimate crowd level by hour
-            peak_hours = self.PEAK_HOURS.get(store_type, [])
-            if hour in peak_hours:
-                crowd = CrowdLevel.BUSY
-            elif hour < 9 or hour > 20:
-                crowd = CrowdLevel.LIGHT
-            else:
-                crowd = CrowdLevel.MODERATE
-
-            features = StoreVisitFeatures(
-                store_type=store_type,
-                item_count=item_count,
-                day_of_week=day,
-                hour_of_day=hour,
-                crowd_level=crowd,
-            )
-
-            prediction = self.predict(features)
-            hourly_predictions.append({
+        hours = np.arange(6, 22)  # 6 AM to 10 PM
+
+        # Estimate crowd level by hour
+        is_peak = (self._PEAK_MASKS[store_type.idx] >> hours) & 1
+        crowd = np.where(
+            is_peak,
+            CrowdLevel.BUSY.value,
+            np.where((hours < 9) | (hours > 20), CrowdLevel.LIGHT.value, CrowdLevel.MODERATE.value),
+        )
+
+        # All hours in one batch, as predict would estimate each
+        minutes = self._estimate_batch(
+            store_type.idx,
+            item_count,
+            crowd,
+            is_peak,
+            day in [DayOfWeek.SATURDAY, DayOfWeek.SUNDAY],
+            self.store_adjustments.get(store_type.value, 1.0),
+        )
+
+        hourly_predictions = [
+            {
                 "hour": hour,
                 "time_display": f"{hour:02d}:00",
-                "estimated_minutes": prediction.estimated_minutes,
-                "crowd_level": crowd.name,
-            })
+                "estimated_minutes": round(estimate, 1),
+                "crowd_level": CrowdLevel(level).name,
+            }
+            for hour, estimate, level in zip(hours.tolist(), minutes.tolist(), crowd.tolist())
+        ]
 
         # Find optimal
         optimal = min(hourly_predictions, key=lambda x: x['estimated_minutes'])
@@ -408,36 +540,23 @@ class StoreVisitPredictor:
         day: DayOfWeek,
         hour: int
     ) -> CrowdLevel:
-        """Predict crowd level for a store at a given time."""
-        peak_hours = self.PEAK_HOURS.get(store_type, [])
-        is_weekend = day in [DayOfWeek.SATURDAY, DayOfWeek.SUNDAY]
-
-        if hour in peak_hours:
-            base_level = 4
-        elif hour < 8 or hour > 20:
-            base_level = 1
-        elif hour < 10 or hour > 19:
-            base_level = 2
+        """Predict crowd level for a store at a given time (hour 0-23)."""
+        if (self._PEAK_MASKS[store_type.idx] >> hour) & 1:
+            level = CrowdLevel.BUSY.value
         else:
-            base_level = 3
+            level = self._OFF_PEAK_CROWD[hour]
 
-        if is_weekend:
-            base_level = min(5, base_level + 1)
+        # One level busier at weekends, up to PACKED
+        if day.value >= 5:
+            level = min(CrowdLevel.PACKED.value, level + 1)
 
-        return CrowdLevel(base_level)
+        return self._CROWD_LEVELS[level - 1]
 
     def get_stats(self) -> Dict[str, Any]:
         """Get model statistics."""
-        visits_by_type = {}
-        for visit in self.historical_data:
-            key = visit.store_type.value
-            if key not in visits_by_type:
-                visits_by_type[key] = 0
-            visits_by_type[key] += 1
-
         return {
             "total_historical_visits": len(self.historical_data),
-            "visits_by_store_type": visits_by_type,
+            "visits_by_store_type": dict(self._visits_by_type),
             "store_adjustments": self.store_adjustments,
             "user_speed_factor": self.user_speed_factor,
         }
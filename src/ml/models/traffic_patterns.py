@@ -10,6 +10,8 @@ import numpy as np
 from pathlib import Path
 import json
 
+from ._traffic_kernels import route_durations
+
 
 class TrafficCondition(Enum):
     """Traffic condition levels."""
@@ -28,6 +30,11 @@ class RouteType(Enum):
     MIXED = "mixed"
 
 
+# Definition-order position of each route type, for indexing lookup tables
+for _idx, _route_type in enumerate(RouteType):
+    _route_type.idx = _idx
+
+
 @dataclass
 class Location:
     """Geographic location."""
@@ -116,10 +123,41 @@ class TrafficPatternLearner:
         RouteType.MIXED: 1.0,
     }
 
+    # The tables above by hour, weekday then weekend, and by RouteType.idx,
+    # as tuples; the hourly table also as an array for whole-day forecasts
+    # and the departure kernel
+    _TRAFFIC_BY_HOUR = (
+        tuple(map(WEEKDAY_TRAFFIC.__getitem__, range(24))),
+        tuple(map(WEEKEND_TRAFFIC.__getitem__, range(24))),
+    )
+    _ROUTE_FACTOR_BY_INDEX = tuple(map(ROUTE_TYPE_FACTORS.__getitem__, RouteType))
+    _TRAFFIC_ARRAY = np.array(_TRAFFIC_BY_HOUR)
+    # segment_adjustments keys for each hour
+    _HOUR_KEYS = tuple(map(str, range(24)))
+
+    # Lowest multiplier of each TrafficCondition above FREE_FLOW
+    _CONDITION_THRESHOLDS = np.array([1.1, 1.3, 1.5, 1.7])
+    _CONDITIONS = tuple(TrafficCondition)
+
+    # Starting rows of the history columns, doubled as observations are added
+    INITIAL_HISTORY_CAPACITY = 64
+
     def __init__(self, model_path: Optional[Path] = None):
         """Initialize traffic pattern learner."""
         self.model_path = model_path
         self.historical_data: List[HistoricalTraffic] = []
+        self._observations_by_hour: Dict[Tuple[str, int], int] = {}  # (segment_id, hour) -> observations in history
+
+        # The history as columns, one row per observation, for training;
+        # segments are numbered in order of first observation
+        self._segment_ids: List[str] = []
+        self._segment_index: Dict[str, int] = {}
+        self._n_observations = 0
+        self._obs_segment = np.zeros(self.INITIAL_HISTORY_CAPACITY, dtype=np.int32)
+        self._obs_hour = np.zeros(self.INITIAL_HISTORY_CAPACITY, dtype=np.int8)
+        self._obs_actual = np.zeros(self.INITIAL_HISTORY_CAPACITY)
+        self._obs_base = np.zeros(self.INITIAL_HISTORY_CAPACITY)
+
         self.segment_adjustments: Dict[str, Dict[int, float]] = {}  # segment_id -> {hour: multiplier}
         self._load_model()
 
@@ -164,13 +202,10 @@ class TrafficPatternLearner:
         factors = []
 
         # Get base traffic multiplier
-        if is_weekend:
-            base_multiplier = self.WEEKEND_TRAFFIC[hour]
-        else:
-            base_multiplier = self.WEEKDAY_TRAFFIC[hour]
+        base_multiplier = self._TRAFFIC_BY_HOUR[is_weekend][hour]
 
         # Apply route type factor
-        route_factor = self.ROUTE_TYPE_FACTORS[segment.route_type]
+        route_factor = self._ROUTE_FACTOR_BY_INDEX[segment.route_type.idx]
 
         # Check for learned segment-specific patterns
         segment_id = self._get_segment_id(segment)
@@ -236,20 +271,13 @@ class TrafficPatternLearner:
         window_hours: int = 2
     ) -> str:
         """Find best departure time within a window."""
-        best_hour = target_time.hour
-        best_multiplier = float('inf')
-
-        is_weekend = target_time.weekday() >= 5
-        traffic_pattern = self.WEEKEND_TRAFFIC if is_weekend else self.WEEKDAY_TRAFFIC
+        traffic_pattern = self._TRAFFIC_BY_HOUR[target_time.weekday() >= 5]
 
         start_hour = max(0, target_time.hour - window_hours)
         end_hour = min(23, target_time.hour + window_hours)
 
-        for hour in range(start_hour, end_hour + 1):
-            multiplier = traffic_pattern[hour]
-            if multiplier < best_multiplier:
-                best_multiplier = multiplier
-                best_hour = hour
+        # Earliest hour with the lowest multiplier
+        best_hour = min(range(start_hour, end_hour + 1), key=traffic_pattern.__getitem__)
 
         return f"{best_hour:02d}:00"
 
@@ -263,11 +291,8 @@ class TrafficPatternLearner:
                 base_confidence += 0.15
 
         # Count relevant historical data
-        relevant_data = [
-            d for d in self.historical_data
-            if d.segment_id == segment_id and d.hour == hour
-        ]
-        data_bonus = min(0.1, len(relevant_data) * 0.02)
+        relevant_data = self._observations_by_hour.get((segment_id, hour), 0)
+        data_bonus = min(0.1, relevant_data * 0.02)
 
         return min(0.95, base_confidence + data_bonus)
 
@@ -288,30 +313,41 @@ class TrafficPatternLearner:
         Returns:
             Departure recommendation
         """
-        # Test different departure times
-        candidates = []
-
-        for offset in range(-flexibility_minutes, flexibility_minutes + 1, 15):
-            test_time = arrival_target - timedelta(minutes=offset)
-
-            # Calculate total trip duration at this time
-            current_time = test_time
-            total_duration = 0
-
-            for segment in segments:
-                prediction = self.predict_traffic(segment, current_time)
-                total_duration += prediction.predicted_duration
-                current_time = current_time + timedelta(minutes=prediction.predicted_duration)
+        # Test different departure times, every 15 minutes either side
+        departures = [
+            arrival_target - timedelta(minutes=offset)
+            for offset in range(-flexibility_minutes, flexibility_minutes + 1, 15)
+        ]
 
-            candidates.append({
-                'departure': test_time,
-                'duration': total_duration,
-                'arrival': current_time,
-            })
+        # Drive the whole route from each departure in one kernel call
+        start_us = np.array([
+            ((t.weekday() * 24 + t.hour) * 60 + t.minute) * 60_000_000
+            + t.second * 1_000_000 + t.microsecond
+            for t in departures
+        ], dtype=np.int64)
+        adjustments = [
+            self.segment_adjustments.get(self._get_segment_id(segment), {})
+            for segment in segments
+        ]
+        durations, elapsed_us = route_durations(
+            start_us,
+            np.array([segment.base_duration_minutes for segment in segments], dtype=float),
+            np.array([self._ROUTE_FACTOR_BY_INDEX[segment.route_type.idx] for segment in segments]),
+            np.array(
+                [[hours.get(key, 1.0) for key in self._HOUR_KEYS] for hours in adjustments],
+                dtype=float,
+            ).reshape(len(segments), 24),
+            self._TRAFFIC_ARRAY,
+        )
 
-        # Find best option
-        best = min(candidates, key=lambda x: x['duration'])
-        worst = max(candidates, key=lambda x: x['duration'])
+        # Find best option (the earliest candidate on ties)
+        best_idx = int(np.argmin(durations))
+        best = {
+            'departure': departures[best_idx],
+            'duration': durations[best_idx].item(),
+            'arrival': departures[best_idx] + timedelta(microseconds=elapsed_us[best_idx].item()),
+        }
+        worst = {'duration': durations[np.argmax(durations)].item()}
 
         # Get traffic condition for the best departure
         test_prediction = self.predict_traffic(segments[0], best['departure'])
@@ -345,52 +381,97 @@ class TrafficPatternLearner:
         Returns:
             Training metrics
         """
+        start = self._n_observations
         self.historical_data.extend(data)
-
-        if len(data) < 5:
-            return {"status": "insufficient_data", "observations": len(data)}
-
-        # Group by segment and hour
-        segment_hour_data: Dict[str, Dict[int, List[float]]] = {}
-
         for obs in data:
-            if obs.segment_id not in segment_hour_data:
-                segment_hour_data[obs.segment_id] = {}
-
-            if obs.hour not in segment_hour_data[obs.segment_id]:
-                segment_hour_data[obs.segment_id][obs.hour] = []
-
-            # Calculate actual multiplier
-            if obs.base_duration > 0:
-                multiplier = obs.actual_duration / obs.base_duration
-                segment_hour_data[obs.segment_id][obs.hour].append(multiplier)
-
-        # Calculate adjustments
-        for segment_id, hour_data in segment_hour_data.items():
-            self.segment_adjustments[segment_id] = {}
-            for hour, multipliers in hour_data.items():
-                if multipliers:
-                    # Use median for robustness
-                    learned_multiplier = float(np.median(multipliers))
-
-                    # Compare to expected
-                    is_weekend = False  # Assume weekday for now
-                    expected = self.WEEKDAY_TRAFFIC[hour]
-
-                    # Store relative adjustment
-                    self.segment_adjustments[segment_id][str(hour)] = learned_multiplier / expected
+            self._append_observation(obs)
+        return self._fit(start)
+
+    def _fit(self, start: int) -> Dict[str, Any]:
+        """Fit segment adjustments to the history columns from row start onwards."""
+        stop = self._n_observations
+        if stop - start < 5:
+            return {"status": "insufficient_data", "observations": stop - start}
+
+        # Group the rows by segment and hour, in order of first observation
+        keys = self._obs_segment[start:stop].astype(np.int64) * 24 + self._obs_hour[start:stop]
+        group_keys, first_seen, group = np.unique(keys, return_index=True, return_inverse=True)
+
+        # Calculate actual multipliers
+        actual = self._obs_actual[start:stop]
+        base = self._obs_base[start:stop]
+        has_base = base > 0
+        multipliers = np.divide(actual, base, out=np.zeros_like(actual), where=has_base)
+
+        # Median multiplier of each group, for robustness: sort the
+        # multipliers by group then value, and average each group's middle two
+        counts = np.bincount(group[has_base], minlength=len(group_keys))
+        starts = np.cumsum(counts) - counts
+        ordered = multipliers[has_base]
+        ordered = ordered[np.lexsort((ordered, group[has_base]))]
+        observed = counts > 0
+        lower = starts[observed] + (counts[observed] - 1) // 2
+        upper = starts[observed] + counts[observed] // 2
+        medians = np.zeros(len(group_keys))
+        medians[observed] = (ordered[lower] + ordered[upper]) / 2
+
+        # Calculate adjustments, starting afresh for each segment observed
+        learned_segments = set()
+        group_counts = counts.tolist()
+        group_medians = medians.tolist()
+        for g in np.argsort(first_seen).tolist():
+            segment, hour = divmod(int(group_keys[g]), 24)
+            segment_id = self._segment_ids[segment]
+            if segment_id not in learned_segments:
+                learned_segments.add(segment_id)
+                self.segment_adjustments[segment_id] = {}
+
+            if group_counts[g]:
+                # Compare to expected (weekday pattern for now)
+                expected = self._TRAFFIC_BY_HOUR[0][hour]
+
+                # Store relative adjustment
+                self.segment_adjustments[segment_id][str(hour)] = group_medians[g] / expected
 
         self.save_model()
 
         return {
             "status": "trained",
-            "observations_used": len(data),
+            "observations_used": stop - start,
             "segments_learned": len(self.segment_adjustments),
             "segment_adjustments": {
                 k: len(v) for k, v in self.segment_adjustments.items()
             },
         }
 
+    def _append_observation(self, obs: HistoricalTraffic) -> None:
+        """Count an observation added to the history and add its row to the columns."""
+        key = (obs.segment_id, obs.hour)
+        self._observations_by_hour[key] = self._observations_by_hour.get(key, 0) + 1
+
+        segment = self._segment_index.get(obs.segment_id)
+        if segment is None:
+            segment = self._segment_index[obs.segment_id] = len(self._segment_ids)
+            self._segment_ids.append(obs.segment_id)
+
+        if self._n_observations == len(self._obs_base):
+            self._grow_history()
+
+        i = self._n_observations
+        self._obs_segment[i] = segment
+        self._obs_hour[i] = obs.hour
+        self._obs_actual[i] = obs.actual_duration
+        self._obs_base[i] = obs.base_duration
+        self._n_observations += 1
+
+    def _grow_history(self) -> None:
+        """Double the capacity of the history columns."""
+        for name in ("_obs_segment", "_obs_hour", "_obs_actual", "_obs_base"):
+            column = getattr(self, name)
+            grown = np.zeros(2 * len(column), dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
     def log_trip(
         self,
         segment: RouteSegment,
@@ -407,10 +488,11 @@ class TrafficPatternLearner:
             timestamp=departure_time,
         )
         self.historical_data.append(obs)
+        self._append_observation(obs)
 
-        # Periodic retraining
-        if len(self.historical_data) % 10 == 0:
-            self.train(self.historical_data[-30:])
+        # Periodic retraining on the latest observations, already in the history
+        if self._n_observations % 10 == 0:
+            self._fit(max(0, self._n_observations - 30))
 
     def get_hourly_forecast(
         self,
@@ -427,22 +509,28 @@ class TrafficPatternLearner:
         Returns:
             Hourly traffic predictions
         """
-        forecasts = []
-
-        for hour in range(24):
-            departure = date.replace(hour=hour, minute=0, second=0)
-            prediction = self.predict_traffic(segment, departure)
-
-            forecasts.append({
+        # Every hour's multiplier in one pass, as predict_traffic computes it
+        route_factor = self._ROUTE_FACTOR_BY_INDEX[segment.route_type.idx]
+        hour_adjustments = self.segment_adjustments.get(self._get_segment_id(segment), {})
+        segment_adj = np.array([hour_adjustments.get(key, 1.0) for key in self._HOUR_KEYS])
+        traffic_pattern = self._TRAFFIC_ARRAY[int(date.weekday() >= 5)]
+        total_multiplier = traffic_pattern * route_factor * segment_adj
+
+        conditions = np.searchsorted(self._CONDITION_THRESHOLDS, total_multiplier, side='right')
+        base_duration = segment.base_duration_minutes
+        durations = base_duration * total_multiplier
+
+        return [
+            {
                 "hour": hour,
                 "time_display": f"{hour:02d}:00",
-                "duration_minutes": prediction.predicted_duration,
-                "delay_minutes": prediction.delay_minutes,
-                "traffic_condition": prediction.traffic_condition.name,
-                "traffic_level": prediction.traffic_condition.value,
-            })
-
-        return forecasts
+                "duration_minutes": round(duration, 1),
+                "delay_minutes": round(duration - base_duration, 1),
+                "traffic_condition": self._CONDITIONS[level].name,
+                "traffic_level": self._CONDITIONS[level].value,
+            }
+            for hour, duration, level in zip(range(24), durations.tolist(), conditions.tolist())
+        ]
 
     def get_best_times(
         self,
@@ -4,8 +4,13 @@ Tests store visit prediction, traffic patterns, route optimization, and savings
 """
 import pytest
 from datetime import datetime, time, timedelta
+from itertools import permutations
 from pathlib import Path
 import tempfile
+import threading
+from time import sleep
+
+import numpy as np
 
 from src.ml.models.store_visit_predictor import (
     StoreVisitPredictor,
@@ -21,6 +26,7 @@ from src.ml.models.traffic_patterns import (
     Location,
     TrafficCondition,
     HistoricalTraffic,
+    RouteType,
 )
 from src.ml.models.route_sequence_optimizer import (
     RouteSequenceOptimizer,
@@ -29,7 +35,10 @@ from src.ml.models.route_sequence_optimizer import (
     ItemCategory,
     StorePriority,
 )
+from src.ml.models._route_kernels import score_all_perms, score_perm
+from src.ml.models._savings_kernels import predict_savings_core
 from src.ml.models.savings_predictor import (
+    STORE_DTYPE,
     SavingsPredictor,
     StoreOption,
     ShoppingTrip,
@@ -141,6 +150,33 @@ class TestStoreVisitPredictor:
         assert deli_pred.estimated_minutes > base_pred.estimated_minutes
         assert "Deli counter stop" in deli_pred.factors
 
+    def test_factors_listed_in_adjustment_order(self, predictor):
+        """Test every factor is reported, in the order adjustments apply."""
+        features = StoreVisitFeatures(
+            store_type=StoreType.WAREHOUSE,
+            item_count=10,
+            day_of_week=DayOfWeek.SATURDAY,
+            hour_of_day=11,
+            crowd_level=CrowdLevel.PACKED,
+            has_list=False,
+            store_familiarity=0.2,
+            needs_deli_counter=True,
+            needs_pharmacy=True,
+            is_member=True,
+        )
+
+        assert predictor.predict(features).factors == [
+            "Unfamiliar store layout",
+            "High crowd level: PACKED",
+            "No shopping list",
+            "Deli counter stop",
+            "Pharmacy stop",
+            "Self-checkout available",
+            "Member access",
+            "Peak shopping hours",
+            "Weekend shopping",
+        ]
+
     def test_optimal_time_returns_recommendation(self, predictor):
         """Test optimal time recommendation."""
         result = predictor.get_optimal_time(
@@ -154,6 +190,99 @@ class TestStoreVisitPredictor:
         assert "hourly_breakdown" in result
         assert len(result["hourly_breakdown"]) > 0
 
+    def test_crowd_level_by_hour(self, predictor):
+        """Test crowd levels through the day, one busier at weekends."""
+        hours = (3, 9, 12, 15, 20, 23)
+
+        weekday = [
+            predictor.predict_crowd_level(StoreType.SUPERMARKET, DayOfWeek.TUESDAY, h)
+            for h in hours
+        ]
+        weekend = [
+            predictor.predict_crowd_level(StoreType.SUPERMARKET, DayOfWeek.SUNDAY, h)
+            for h in hours
+        ]
+
+        assert weekday == [
+            CrowdLevel.EMPTY, CrowdLevel.LIGHT, CrowdLevel.BUSY,
+            CrowdLevel.MODERATE, CrowdLevel.LIGHT, CrowdLevel.EMPTY,
+        ]
+        assert weekend == [
+            CrowdLevel.LIGHT, CrowdLevel.MODERATE, CrowdLevel.PACKED,
+            CrowdLevel.BUSY, CrowdLevel.MODERATE, CrowdLevel.LIGHT,
+        ]
+
+    def test_score_visit_kernel_matches_prediction(self, predictor):
+        """Test the scoring kernel reproduces predict's totals."""
+        from src.ml.models._visit_kernels import score_visit
+
+        features = StoreVisitFeatures(
+            store_type=StoreType.WAREHOUSE,
+            item_count=30,
+            day_of_week=DayOfWeek.SUNDAY,
+            hour_of_day=12,
+            crowd_level=CrowdLevel.BUSY,
+            has_list=False,
+            needs_deli_counter=True,
+        )
+        prediction = predictor.predict(features)
+
+        total_time, item_time, checkout_time = score_visit(
+            45.0, 1.2, 30, 0.5, 1.3, 4, False, 8.0, False, True, True, 1.0, 1.0,
+        )
+
+        assert round(total_time, 1) == prediction.estimated_minutes
+        assert item_time == prediction.breakdown["item_time"]
+        assert checkout_time == prediction.breakdown["checkout"]
+
+    def test_repeated_prediction_refreshes_after_training(self, predictor):
+        """Test repeated predictions are independent and follow training."""
+        features = StoreVisitFeatures(
+            store_type=StoreType.SUPERMARKET,
+            item_count=10,
+            day_of_week=DayOfWeek.MONDAY,
+            hour_of_day=10,
+            crowd_level=CrowdLevel.MODERATE,
+        )
+
+        first = predictor.predict(features)
+        first.factors.append("changed by caller")
+        assert predictor.predict(features).factors == first.factors[:-1]
+
+        predictor.train([
+            HistoricalVisit(
+                store_id="store1",
+                store_type=StoreType.SUPERMARKET,
+                item_count=10,
+                actual_duration_minutes=60,
+                day_of_week=DayOfWeek.MONDAY,
+                hour_of_day=10,
+                crowd_level=CrowdLevel.MODERATE,
+            )
+            for _ in range(5)
+        ])
+        assert predictor.predict(features).estimated_minutes > first.estimated_minutes
+
+    def test_optimal_time_matches_single_prediction(self, predictor):
+        """Test the batched hourly estimates agree with predict for each hour."""
+        for item_count in (15, 30):
+            result = predictor.get_optimal_time(
+                store_type=StoreType.SUPERMARKET,
+                item_count=item_count,
+                day=DayOfWeek.SATURDAY,
+            )
+
+            for entry in result["hourly_breakdown"]:
+                features = StoreVisitFeatures(
+                    store_type=StoreType.SUPERMARKET,
+                    item_count=item_count,
+                    day_of_week=DayOfWeek.SATURDAY,
+                    hour_of_day=entry["hour"],
+                    crowd_level=CrowdLevel[entry["crowd_level"]],
+                )
+                prediction = predictor.predict(features)
+                assert entry["estimated_minutes"] == prediction.estimated_minutes
+
     def test_training_updates_model(self, predictor):
         """Test that training updates model parameters."""
         visits = [
@@ -174,6 +303,24 @@ class TestStoreVisitPredictor:
         assert result["status"] == "trained"
         assert result["visits_used"] == 10
 
+    def test_log_visit_retrains_without_duplicating_history(self, predictor):
+        """Test periodic retraining leaves each logged visit in history once."""
+        for i in range(25):
+            predictor.log_visit(HistoricalVisit(
+                store_id="store1",
+                store_type=StoreType.SUPERMARKET,
+                item_count=10,
+                actual_duration_minutes=30 + i,
+                day_of_week=DayOfWeek.MONDAY,
+                hour_of_day=10,
+                crowd_level=CrowdLevel.MODERATE,
+            ))
+
+        stats = predictor.get_stats()
+        assert stats["total_historical_visits"] == 25
+        assert stats["visits_by_store_type"] == {"supermarket": 25}
+        assert predictor.store_adjustments["supermarket"] != 1.0
+
 
 # ========================================
 # Traffic Pattern Learner Tests
@@ -229,6 +376,71 @@ class TestTrafficPatternLearner:
             assert "duration_minutes" in forecast
             assert "traffic_condition" in forecast
 
+    def test_hourly_forecast_matches_predictions(self, learner, sample_segment):
+        """Test each forecast hour agrees with predict_traffic, learned hours included."""
+        learner.train([
+            HistoricalTraffic("Home->Store", 0, 8, 40.0, 15.0),
+            HistoricalTraffic("Home->Store", 0, 8, 42.0, 15.0),
+            HistoricalTraffic("Home->Store", 0, 14, 16.0, 15.0),
+            HistoricalTraffic("Home->Store", 0, 14, 18.0, 15.0),
+            HistoricalTraffic("Home->Store", 0, 20, 15.0, 15.0),
+        ])
+        day = datetime(2025, 11, 24)  # A Monday
+
+        for forecast in learner.get_hourly_forecast(sample_segment, day):
+            prediction = learner.predict_traffic(sample_segment, day.replace(hour=forecast["hour"]))
+            assert forecast["duration_minutes"] == prediction.predicted_duration
+            assert forecast["delay_minutes"] == prediction.delay_minutes
+            assert forecast["traffic_condition"] == prediction.traffic_condition.name
+
+    def test_confidence_counts_trips_at_hour(self, learner, sample_segment):
+        """Test logged trips raise confidence only for their segment and hour."""
+        departure = datetime(2025, 11, 24, 9, 0)  # A Monday
+        before = learner.predict_traffic(sample_segment, departure).confidence
+
+        for _ in range(3):
+            learner.log_trip(sample_segment, 20.0, departure)
+
+        assert learner.predict_traffic(sample_segment, departure).confidence == pytest.approx(before + 0.06)
+        assert learner.predict_traffic(sample_segment, departure.replace(hour=10)).confidence == before
+
+    def test_training_takes_median_per_segment_hour(self, learner):
+        """Test learned adjustments are each segment and hour's median multiplier."""
+        learner.train([
+            HistoricalTraffic("Home->Store", 0, 8, 30.0, 10.0),
+            HistoricalTraffic("Home->Store", 0, 8, 18.0, 10.0),
+            HistoricalTraffic("Home->Store", 0, 8, 90.0, 10.0),
+            HistoricalTraffic("Home->Store", 0, 8, 20.0, 10.0),
+            HistoricalTraffic("Home->Store", 0, 3, 11.0, 10.0),
+            HistoricalTraffic("Home->Store", 0, 3, 99.0, 0.0),
+        ])
+
+        adjustments = learner.segment_adjustments["Home->Store"]
+        assert adjustments["8"] == pytest.approx(2.5 / learner.WEEKDAY_TRAFFIC[8])
+        assert adjustments["3"] == pytest.approx(1.1 / learner.WEEKDAY_TRAFFIC[3])
+
+    def test_log_trip_retrains_without_duplicating_history(self, learner, sample_segment):
+        """Test periodic retraining learns from logged trips without re-adding them."""
+        departure = datetime(2025, 11, 24, 8, 0)  # A Monday
+
+        for _ in range(30):
+            learner.log_trip(sample_segment, 30.0, departure)
+
+        assert learner.get_stats()["total_observations"] == 30
+        assert learner._observations_by_hour[("Home->Store", 8)] == 30
+        assert learner.segment_adjustments["Home->Store"]["8"] == pytest.approx(2.0 / 1.8)
+
+    def test_log_trip_learns_median_of_logged_trips(self, learner, sample_segment):
+        """Test periodic retraining learns the median of the trips actually logged."""
+        departure = datetime(2025, 11, 24, 8, 0)  # A Monday
+
+        for minutes in range(20, 40):
+            learner.log_trip(sample_segment, float(minutes), departure)
+
+        # Median of 20..39 minutes over a 15 minute base, against 8am weekday traffic
+        expected = (29.5 / 15.0) / 1.8
+        assert learner.segment_adjustments["Home->Store"]["8"] == pytest.approx(expected)
+
     def test_best_times_returns_sorted(self, learner, sample_segment):
         """Test that best times are sorted by duration."""
         today = datetime.now()
@@ -239,6 +451,39 @@ class TestTrafficPatternLearner:
         for i in range(len(best_times) - 1):
             assert best_times[i]['duration_minutes'] <= best_times[i + 1]['duration_minutes']
 
+    def test_optimal_departure_matches_route_prediction(self, learner):
+        """Test the recommended departure's duration and arrival match a route prediction."""
+        segments = [
+            RouteSegment(
+                origin=Location(40.7128, -74.0060, "Home"),
+                destination=Location(40.7580, -73.9855, "Store1"),
+                base_duration_minutes=7.5,
+                distance_miles=3.0,
+                route_type=RouteType.HIGHWAY,
+            ),
+            RouteSegment(
+                origin=Location(40.7580, -73.9855, "Store1"),
+                destination=Location(40.7614, -73.9776, "Store2"),
+                base_duration_minutes=12.25,
+                distance_miles=2.0,
+            ),
+        ]
+        arrival = datetime(2025, 11, 24, 17, 40)  # A Monday
+
+        recommendation = learner.get_optimal_departure(segments, arrival, flexibility_minutes=90)
+        hour, minute = map(int, recommendation.recommended_time.split(":"))
+        route = learner.predict_route_duration(segments, arrival.replace(hour=hour, minute=minute))
+
+        assert recommendation.total_duration == route["total_duration_minutes"]
+        assert recommendation.estimated_arrival == route["estimated_arrival"]
+
+    def test_round_tenth_matches_round(self):
+        """Test the kernel rounding agrees with round(x, 1), near-ties included."""
+        from src.ml.models._traffic_kernels import round_tenth
+
+        for x in (9.75, 0.05, 0.15, 2.675, 1.45, 12.25 * 1.3, -0.25, 7.5 * 1.2 * 1.3, 100.0):
+            assert round_tenth(x) == round(x, 1)
+
     def test_multi_segment_route(self, learner):
         """Test route duration for multiple segments."""
         segments = [
@@ -405,6 +650,92 @@ class TestRouteSequenceOptimizer:
 
         assert result.cart_strategy != ""
 
+    def test_kernel_score_matches_score_order(self, optimizer, sample_stores, sample_items):
+        """Test the one-pass scoring kernel against the step-by-step score."""
+        start_time = datetime(2024, 1, 6, 9, 0)
+        arrays = optimizer._build_route_arrays(
+            sample_stores, sample_items, start_time, (40.7, -74.0)
+        )
+        position_costs = optimizer._position_costs(arrays)
+
+        for perm in permutations(range(len(sample_stores))):
+            for has_cooler in (False, True):
+                expected = optimizer._score_order(list(perm), arrays, has_cooler)
+                actual = score_perm(
+                    np.array(perm), arrays.D, arrays.D_home, position_costs, arrays.store_time,
+                    arrays.perish_store, arrays.perish_limit, arrays.perish_items,
+                    has_cooler,
+                )
+                assert actual == pytest.approx(expected)
+
+    def test_all_perms_kernel_matches_single_kernel(self, optimizer, sample_stores, sample_items):
+        """Test scoring every ordering at once against one ordering at a time."""
+        start_time = datetime(2024, 1, 6, 9, 0)
+        arrays = optimizer._build_route_arrays(
+            sample_stores, sample_items, start_time, (40.7, -74.0)
+        )
+        position_costs = optimizer._position_costs(arrays)
+        perms = np.array(list(permutations(range(len(sample_stores)))), dtype=np.int8)
+        fields = (
+            arrays.D, arrays.D_home, position_costs, arrays.store_time,
+            arrays.perish_store, arrays.perish_limit, arrays.perish_items, True,
+        )
+
+        scores = score_all_perms(perms, *fields)
+
+        assert scores == pytest.approx([score_perm(perm, *fields) for perm in perms])
+
+    @pytest.mark.parametrize("seed", [5, 9])
+    def test_heuristic_matches_exhaustive_search(self, optimizer, seed):
+        """Test the large-route heuristic finds the best ordering on seven stores."""
+        rng = np.random.default_rng(seed)
+        categories = list(ItemCategory)
+        stores = [
+            StoreInfo(
+                f"store{i}", f"Store {i}",
+                40.7 + rng.uniform(-0.1, 0.1), -74.0 + rng.uniform(-0.1, 0.1),
+                time(int(rng.integers(6, 12)), 0), time(int(rng.integers(17, 23)), 0),
+                parking_difficulty=int(rng.integers(1, 6)),
+                priority=StorePriority(int(rng.integers(1, 5))),
+            )
+            for i in range(7)
+        ]
+        items = [
+            ShoppingItem(
+                f"item{k}", categories[int(rng.integers(len(categories)))],
+                f"store{int(rng.integers(len(stores)))}",
+            )
+            for k in range(14)
+        ]
+        arrays = optimizer._build_route_arrays(
+            stores, items, datetime(2024, 1, 8, 9, 0), (40.7, -74.0)
+        )
+        fields = (
+            arrays.D, arrays.D_home, optimizer._position_costs(arrays), arrays.store_time,
+            arrays.perish_store, arrays.perish_limit, arrays.perish_items, False,
+        )
+        perms = np.array(list(permutations(range(len(stores)))), dtype=np.int8)
+
+        order = optimizer._heuristic_optimize(arrays, has_cooler=False)
+
+        assert sorted(order) == list(range(len(stores)))
+        assert score_perm(np.array(order), *fields) == pytest.approx(
+            score_all_perms(perms, *fields).min()
+        )
+
+    def test_distance_matrix_reused_across_calls(self, optimizer, sample_stores, sample_items):
+        """Test re-planning the same stores reuses the cached distance matrix."""
+        start_time = datetime(2024, 1, 6, 9, 0)
+        first = optimizer._build_route_arrays(
+            sample_stores, sample_items, start_time, (40.7, -74.0)
+        )
+        second = optimizer._build_route_arrays(
+            sample_stores, sample_items[:1], start_time, (40.71, -74.0)
+        )
+
+        assert second.D is first.D
+        assert not np.array_equal(second.D_home, first.D_home)
+
 
 # ========================================
 # Savings Predictor Tests
@@ -484,6 +815,59 @@ class TestSavingsPredictor:
         # Higher time value = higher time cost
         assert high_analysis.time_cost > low_analysis.time_cost
 
+    def test_savings_core_matches_analysis(self, predictor, multi_store_trip, single_store_option):
+        """Test the savings kernel against the rounded analysis fields."""
+        gross, net, time_cost, effective, hourly, extra_time, multi_gas, single_gas = (
+            predict_savings_core(100.0, 5.0, 15.0, 30.0, 85.0, 15.0, 90.0, 3.5 / 25, 25.0)
+        )
+        analysis = predictor.predict_savings(
+            multi_store_trip=multi_store_trip,
+            single_store_option=single_store_option,
+        )
+
+        assert gross == pytest.approx(15.0)
+        assert single_gas == pytest.approx(1.4)
+        assert multi_gas == pytest.approx(2.1)
+        assert extra_time == pytest.approx(45.0)
+        assert analysis.net_savings == round(net, 2)
+        assert analysis.time_cost == round(time_cost, 2)
+        assert analysis.effective_savings == round(effective, 2)
+        assert analysis.hourly_savings_rate == round(hourly, 2)
+
+    def test_gas_scenarios_match_single_prediction(self, predictor, multi_store_trip, single_store_option):
+        """Test each gas price scenario against predict_savings at that price."""
+        gas_prices = np.array([2.5, predictor.gas_price, 5.0])
+        scenarios = predictor.predict_gas_scenarios(
+            multi_store_trip, single_store_option, gas_prices
+        )
+
+        assert scenarios.shape == (3, len(SavingsPredictor.BATCH_COLUMNS))
+        for gas_price, row in zip(gas_prices, scenarios):
+            predictor.update_preferences(gas_price=gas_price)
+            analysis = predictor.predict_savings(multi_store_trip, single_store_option)
+            assert analysis.net_savings == round(row[1], 2)
+            assert analysis.breakdown['multi_store_gas'] == row[6]
+        # Dearer gas only widens the multi-store trip's extra mileage cost
+        assert scenarios[0, 1] > scenarios[2, 1]
+
+    def test_batch_matches_single_prediction(self, predictor, multi_store_trip, single_store_option):
+        """Test batch metrics and factor levels against predict_savings."""
+        analysis = predictor.predict_savings(
+            multi_store_trip=multi_store_trip,
+            single_store_option=single_store_option,
+        )
+
+        metrics, savings_levels, time_levels = predictor.predict_savings_batch(
+            predictor._trips_to_arrays([multi_store_trip] * 2),
+            predictor._stores_to_arrays([single_store_option] * 2),
+        )
+
+        assert metrics.shape == (2, len(predictor.BATCH_COLUMNS))
+        assert round(metrics[0, 1], 2) == analysis.net_savings
+        assert round(metrics[0, 3], 2) == analysis.effective_savings
+        assert analysis.factors[0].startswith(savings_levels[0])
+        assert time_levels[1] == "Significant time investment"
+
     def test_quick_estimate(self, predictor):
         """Test quick savings estimate."""
         result = predictor.quick_estimate(
@@ -563,6 +947,112 @@ class TestSavingsPredictor:
         assert money_rec.money_saved >= time_rec.money_saved or \
                money_rec.time_investment <= time_rec.time_investment
 
+    def test_recommend_strategy_accepts_store_records(self, predictor):
+        """Test a STORE_DTYPE array gives the same recommendation as the list."""
+        stores = [
+            StoreOption("s1", "Store 1", 3, 20, 100.0, 10, 25),
+            StoreOption("s2", "Store 2", 8, 20, 70.0, 25, 35),
+            StoreOption("s3", "Store 3", 5, 20, 80.0, 15, 30),
+            StoreOption("s4", "Store 4", 2, 20, 120.0, 5, 20),
+        ]
+        records = np.array([s.to_record() for s in stores], dtype=STORE_DTYPE)
+
+        for priority in ValuePriority:
+            assert predictor.recommend_strategy(records, 20, priority) == \
+                predictor.recommend_strategy(stores, 20, priority)
+        assert StoreOption.from_record(records[1]) == stores[1]
+
+    def test_log_trip_trains_on_recent_trips(self, predictor):
+        """Test logged trips are counted once and retrain every 5 trips."""
+        for i in range(12):
+            predictor.log_trip(HistoricalTrip(
+                trip_id=f"trip{i}",
+                strategy=ShoppingStrategy.TWO_STORES,
+                stores_visited=[f"store{i}"],
+                planned_savings=10.0,
+                actual_savings=10.0 if i >= 5 else 0.0,
+                total_time=60,
+                satisfaction=5 if i < 10 else 3,
+            ))
+
+        recent = predictor._recent_trips(10)
+
+        assert predictor.get_stats()["historical_trips"] == 12
+        assert list(recent['actual']) == [0.0] * 3 + [10.0] * 7
+        # Trained on trips 0-9 at the tenth trip; 10 and 11 are not yet learned
+        assert predictor.savings_accuracy == 0.5
+        assert predictor.get_stats()["user_preferences"]["visited_stores"] == [
+            f"store{i}" for i in range(10)
+        ]
+
+    def test_training_flushes_to_disk(self):
+        """Test training marks state dirty and flush persists it."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = Path(tmp_dir) / "savings.json"
+            predictor = SavingsPredictor(model_path=model_path)
+            predictor.log_trip(HistoricalTrip(
+                trip_id="trip0",
+                strategy=ShoppingStrategy.SINGLE_STORE,
+                stores_visited=["store0"],
+                planned_savings=10.0,
+                actual_savings=10.0,
+                total_time=30,
+                satisfaction=5,
+            ))
+            predictor._learn_stores(["store0"])
+            predictor._mark_dirty()
+            predictor.flush()
+
+            assert not predictor._dirty
+            assert not model_path.with_suffix('.tmp').exists()
+            reloaded = SavingsPredictor(model_path=model_path)
+            assert reloaded.get_stats()["user_preferences"]["visited_stores"] == ["store0"]
+
+    def test_concurrent_saves_do_not_collide(self):
+        """Test saves from several threads all land without losing the file."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = Path(tmp_dir) / "savings.json"
+            predictor = SavingsPredictor(model_path=model_path)
+            errors = []
+
+            def save_repeatedly():
+                for _ in range(50):
+                    try:
+                        predictor.save_model()
+                    except OSError as e:
+                        errors.append(e)
+
+            threads = [threading.Thread(target=save_repeatedly) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert errors == []
+            assert model_path.exists()
+            assert not model_path.with_suffix('.tmp').exists()
+
+    def test_flusher_survives_failed_save(self):
+        """Test a failed background save keeps state dirty and is retried."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            blocker = Path(tmp_dir) / "blocker"
+            blocker.write_text("")
+            predictor = SavingsPredictor(model_path=blocker / "savings.json")
+            predictor.FLUSH_INTERVAL = 0.01
+            predictor._mark_dirty()
+            sleep(0.1)
+
+            # Failed at least once, yet still running and retrying
+            assert predictor._flusher.is_alive()
+
+            model_path = Path(tmp_dir) / "savings.json"
+            predictor.model_path = model_path
+            for _ in range(200):
+                if model_path.exists():
+                    break
+                sleep(0.01)
+            assert model_path.exists()
+
     def test_update_preferences(self, predictor):
         """Test preference updates."""
         predictor.update_preferences(
@@ -8,6 +8,7 @@ Tests:
 - SavingsValidator
 """
 import pytest
+import numpy as np
 from datetime import date, timedelta
 from pathlib import Path
 import tempfile
@@ -193,6 +194,80 @@ class TestPatternRecommenderV2:
             assert len(rec.reasoning) > 0
             assert all(isinstance(r, str) for r in rec.reasoning)
 
+    @pytest.mark.parametrize("rows_per_pattern", [5, 20])
+    def test_fit_small_balanced_training_set(self, rows_per_pattern):
+        """Test fitting on a few rows of every pattern, with and without a hold-out."""
+        from src.ml.models.pattern_recommender_v2 import (
+            PatternRecommenderV2, ContextualFeatures
+        )
+
+        X, y = [], []
+        for i, pattern in enumerate(PatternType):
+            for j in range(rows_per_pattern):
+                X.append({
+                    "date": date(2025, 1, 1) + timedelta(days=j),
+                    "stress_level": 1 + (i + j) % 4,
+                    "has_morning_workout": i % 2 == 1,
+                })
+                y.append(pattern)
+
+        recommender = PatternRecommenderV2().fit(X, y, model_family="hgb")
+        recommendations = recommender.predict(ContextualFeatures(date=date.today()), top_k=3)
+
+        assert recommender.is_fitted
+        assert len(recommendations) == 3
+
+    def test_fitted_forest_predicts_single_threaded(self):
+        """Test the random forest drops its parallel jobs once fitted."""
+        from src.ml.models.pattern_recommender_v2 import PatternRecommenderV2
+
+        X = [
+            {"date": date(2025, 1, 1) + timedelta(days=j), "stress_level": 1 + (i + j) % 4}
+            for i in range(len(PatternType)) for j in range(5)
+        ]
+        y = [pattern for pattern in PatternType for _ in range(5)]
+
+        recommender = PatternRecommenderV2().fit(X, y, model_family="rf")
+
+        assert recommender.model.n_jobs == 1
+
+    def test_predict_without_explanations(self):
+        """Test explain=False skips reasoning but keeps the ranking."""
+        from src.ml.models.pattern_recommender_v2 import (
+            PatternRecommenderV2, ContextualFeatures
+        )
+
+        recommender = PatternRecommenderV2()
+        context = ContextualFeatures(
+            date=date.today(),
+            has_morning_workout=True,
+            stress_level=StressLevel.HIGH,
+        )
+
+        explained = recommender.predict(context, top_k=3)
+        unexplained = recommender.predict(context, top_k=3, explain=False)
+
+        assert [r.pattern for r in unexplained] == [r.pattern for r in explained]
+        assert all(r.reasoning == [] for r in unexplained)
+        assert all(r.suggested_modifications == [] for r in unexplained)
+
+    def test_calculate_pattern_fatigue(self):
+        """Test fatigue from consecutive days and low variety."""
+        from src.ml.models.pattern_recommender_v2 import PatternRecommenderV2
+
+        recommender = PatternRecommenderV2()
+        history = [PatternType.IF_NOON] + [PatternType.TRADITIONAL] * 5
+
+        fatigue = recommender._calculate_pattern_fatigue(history, PatternType.TRADITIONAL)
+        encoded = recommender._encode_pattern_history(history)
+
+        # 5 consecutive days (0.6) plus 2 of 7 patterns (0.4 * 3/7)
+        assert fatigue == pytest.approx(0.6 + 0.4 * (1 - 4 / 7))
+        assert recommender._calculate_pattern_fatigue(
+            encoded, PatternType.TRADITIONAL
+        ) == pytest.approx(fatigue)
+        assert recommender._calculate_pattern_fatigue([], PatternType.TRADITIONAL) == 0.0
+
     def test_pattern_fatigue_reduces_current_pattern_score(self):
         """Test that fatigue reduces score for current pattern."""
         from src.ml.models.pattern_recommender_v2 import (
@@ -229,6 +304,35 @@ class TestPatternRecommenderV2:
 
         assert trad_high < trad_low
 
+    def test_predict_with_alternatives(self):
+        """Test alternatives match predicting each scenario individually."""
+        from dataclasses import replace
+        from src.ml.models.pattern_recommender_v2 import (
+            PatternRecommenderV2, ContextualFeatures
+        )
+
+        recommender = PatternRecommenderV2()
+        context = ContextualFeatures(
+            date=date.today(),
+            has_social_dinner=True,
+        )
+
+        result = recommender.predict_with_alternatives(context)
+
+        assert result["primary"].rank == 1
+        assert len(result["secondary"]) == 2
+        assert set(result["alternatives"]) == {
+            "no_social_dinner", "low_energy", "time_limited"
+        }
+
+        low_energy = recommender.predict(
+            replace(context, prev_energy=2, sleep_quality=2), top_k=1
+        )[0]
+        assert result["alternatives"]["low_energy"].pattern == low_energy.pattern
+        assert result["alternatives"]["low_energy"].probability == pytest.approx(
+            low_energy.probability
+        )
+
 
 class TestPatternEffectivenessAnalyzer:
     """Tests for pattern effectiveness analyzer."""
@@ -540,6 +644,97 @@ class TestSavingsValidator:
         assert "correction_factor" in result
         assert "confidence" in result
 
+    def test_weighted_correction_kernel(self):
+        """Test the weighted average of correction factors."""
+        from src.ml.models._validator_kernels import weighted_correction
+
+        factors = np.array([0.8, 1.2, 1.0])
+        weights = np.array([0.5, 0.75, 0.5])
+
+        assert weighted_correction(factors, weights) == pytest.approx(1.8 / 1.75)
+        assert weighted_correction(factors, np.zeros(3)) == 1.0
+
+    def test_store_performance_uses_recent_window(self):
+        """Test store performance covers only the most recent accuracies."""
+        from src.ml.models.savings_validator import SavingsValidator
+
+        validator = SavingsValidator()
+        window = validator.STORE_WINDOW
+
+        # A run of poor trips, then a full window of accurate ones
+        for _ in range(10):
+            validator.validate(10.0, 5.0, ["store_1"], date.today())
+        for _ in range(window):
+            validator.validate(10.0, 9.5, ["store_1"], date.today())
+
+        performance = validator.get_store_performance()["store_1"]
+        assert performance["average_accuracy"] == 0.95
+        assert performance["sample_size"] == window + 10
+
+    def test_performance_reports_refresh_after_trips(self):
+        """Test cached performance reports are rebuilt when trips arrive."""
+        from src.ml.models.savings_validator import SavingsValidator
+
+        validator = SavingsValidator()
+        for _ in range(3):
+            validator.validate(10.0, 9.0, ["store_1"], date.today())
+
+        first = validator.get_store_performance()
+        assert validator.get_store_performance() is first
+
+        validator.validate(10.0, 5.0, ["store_1"], date.today())
+        assert validator.get_store_performance()["store_1"]["sample_size"] == 4
+
+    def test_record_trips_matches_record_trip(self):
+        """Test bulk recording learns the same as recording trips one by one."""
+        from src.ml.models.savings_validator import SavingsValidator, SavingsRecord
+
+        records = [
+            SavingsRecord(
+                trip_id=f"trip_{i}",
+                trip_date=date.today() - timedelta(days=i),
+                stores_visited=["store_1", "store_2"][: 1 + i % 2],
+                predicted_savings=10.00,
+                actual_savings=7.00 + i,
+                predicted_time=40,
+                actual_time=45,
+                predicted_distance=8,
+                actual_distance=9,
+                item_count=5 + 5 * i,
+                strategy="two_store" if i % 2 else "single_store",
+            )
+            for i in range(6)
+        ]
+
+        one_by_one = SavingsValidator()
+        results = [one_by_one.record_trip(record) for record in records]
+        bulk = SavingsValidator()
+
+        assert bulk.record_trips(records) == results
+        assert bulk.get_stats() == one_by_one.get_stats()
+        for key, cf in one_by_one.correction_factors.items():
+            assert bulk.correction_factors[key].correction_multiplier == pytest.approx(
+                cf.correction_multiplier
+            )
+            assert bulk.correction_factors[key].sample_size == cf.sample_size
+            assert bulk.correction_factors[key].confidence == cf.confidence
+
+    def test_validate_batch_matches_validate(self):
+        """Test batch validation agrees with validating one trip at a time."""
+        from src.ml.models.savings_validator import SavingsValidator
+
+        validator = SavingsValidator()
+        predicted = np.array([10.0, 10.0, 20.0, 0.0])
+        actual = np.array([9.0, 7.5, 26.0, 5.0])
+
+        accuracy, deviation, is_accurate = validator.validate_batch(predicted, actual)
+
+        for i in range(len(predicted)):
+            result = validator.validate(predicted[i], actual[i], [], date.today())
+            assert round(accuracy[i], 3) == result.accuracy
+            assert round(deviation[i], 2) == result.deviation
+            assert is_accurate[i] == result.is_accurate
+
     def test_roi_analysis(self):
         """Test ROI analysis."""
         from src.ml.models.savings_validator import SavingsValidator, SavingsRecord
@@ -616,6 +811,43 @@ class TestSaveLoad:
             assert validator2.total_predictions == 1
             assert len(validator2.savings_records) == 1
 
+    def test_savings_validator_resave_appends_records(self):
+        """Test saving again only appends the new trips to the record log."""
+        from src.ml.models.savings_validator import SavingsValidator, SavingsRecord
+
+        def make_record(i):
+            return SavingsRecord(
+                trip_id=f"trip_{i}",
+                trip_date=date.today(),
+                stores_visited=["store_1", "store_2"],
+                predicted_savings=10.00,
+                actual_savings=9.00 + i,
+                predicted_time=40,
+                actual_time=45,
+                predicted_distance=8,
+                actual_distance=9,
+                item_count=20,
+                strategy="two_store",
+            )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            model_path = Path(tmpdir) / "validator.json"
+            log_path = Path(tmpdir) / "validator.records.jsonl"
+
+            validator = SavingsValidator(model_path=model_path)
+            validator.record_trip(make_record(0))
+            validator.save(model_path)
+            first_log = log_path.read_bytes()
+
+            validator.record_trip(make_record(1))
+            validator.save(model_path)
+
+            # The first save's records are left as they were
+            assert log_path.read_bytes().startswith(first_log)
+
+            validator2 = SavingsValidator(model_path=model_path)
+            assert validator2.savings_records == validator.savings_records
+
     def test_deal_cycle_predictor_save_load(self):
         """Test saving and loading deal cycle predictor."""
         from src.ml.models.deal_cycle_predictor import DealCyclePredictor, SaleRecord